@@ -0,0 +1,43 @@
+"""add unread_count to conversation_participants
+
+Revision ID: 4d1e2a7c9b30
+Revises: c3c2b073b21b
+Create Date: 2026-10-18 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = '4d1e2a7c9b30'
+down_revision: Union[str, Sequence[str], None] = 'c3c2b073b21b'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        'conversation_participants',
+        sa.Column('unread_count', sa.Integer(), nullable=False, server_default='0'),
+    )
+    # Backfill: messages from others, not deleted, newer than the read marker
+    op.execute(
+        """
+        UPDATE conversation_participants AS cp
+        SET unread_count = (
+            SELECT count(*)
+            FROM messages AS m
+            LEFT JOIN messages AS lr ON lr.id = cp.last_read_message_id
+            WHERE m.conversation_id = cp.conversation_id
+              AND m.sender_id <> cp.user_id
+              AND NOT m.deleted_for_everyone
+              AND (lr.created_at IS NULL OR m.created_at > lr.created_at)
+        )
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_column('conversation_participants', 'unread_count')
@@ -0,0 +1,57 @@
+"""add participant_key to conversations
+
+Revision ID: 9a6c3f1d2e84
+Revises: 4d1e2a7c9b30
+Create Date: 2026-10-18 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = '9a6c3f1d2e84'
+down_revision: Union[str, Sequence[str], None] = '4d1e2a7c9b30'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        'conversations',
+        sa.Column('participant_key', sa.String(length=64), nullable=True),
+    )
+    # sha256 of the comma-joined participant ids in uuid order, matching
+    # participant_set_key() in the conversation repository. If the same set
+    # already has several conversations, only the most recently active one
+    # gets the key; the others stay reachable by id but are no longer reused.
+    op.execute(
+        """
+        WITH keys AS (
+            SELECT cp.conversation_id,
+                   encode(sha256(convert_to(string_agg(cp.user_id::text, ',' ORDER BY cp.user_id), 'UTF8')), 'hex') AS participant_key
+            FROM conversation_participants AS cp
+            GROUP BY cp.conversation_id
+        ),
+        ranked AS (
+            SELECT k.conversation_id, k.participant_key,
+                   row_number() OVER (
+                       PARTITION BY k.participant_key
+                       ORDER BY c.last_message_created_at DESC NULLS LAST, c.created_at DESC NULLS LAST, c.id
+                   ) AS rank
+            FROM keys AS k
+            JOIN conversations AS c ON c.id = k.conversation_id
+        )
+        UPDATE conversations AS c
+        SET participant_key = r.participant_key
+        FROM ranked AS r
+        WHERE r.conversation_id = c.id AND r.rank = 1
+        """
+    )
+    op.create_index('uq_conversations_participant_key', 'conversations', ['participant_key'], unique=True)
+
+
+def downgrade() -> None:
+    op.drop_index('uq_conversations_participant_key', table_name='conversations')
+    op.drop_column('conversations', 'participant_key')
@@ -0,0 +1,60 @@
+"""add lookup indexes for participants and friends
+
+Revision ID: b7e4d2a9c615
+Revises: 9a6c3f1d2e84
+Create Date: 2026-10-18 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = 'b7e4d2a9c615'
+down_revision: Union[str, Sequence[str], None] = '9a6c3f1d2e84'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # A user is in a conversation at most once; keep the row that read furthest
+    op.execute(
+        """
+        DELETE FROM conversation_participants AS cp
+        USING (
+            SELECT p.id,
+                   row_number() OVER (
+                       PARTITION BY p.conversation_id, p.user_id
+                       ORDER BY m.created_at DESC NULLS LAST, p.joined_at NULLS LAST, p.id
+                   ) AS rank
+            FROM conversation_participants AS p
+            LEFT JOIN messages AS m ON m.id = p.last_read_message_id
+        ) AS d
+        WHERE cp.id = d.id AND d.rank > 1
+        """
+    )
+    op.create_index(
+        'uq_conversation_participants_conversation_user',
+        'conversation_participants', ['conversation_id', 'user_id'], unique=True,
+    )
+    op.create_index(
+        'ix_conversation_participants_user_conversation',
+        'conversation_participants', ['user_id', 'conversation_id'], unique=False,
+    )
+    # Covered by the leading column of the unique index above
+    op.drop_index('ix_conversation_participants_conversation_id', table_name='conversation_participants')
+
+    # The pair indexes serve lookups by their first column; these serve the other side
+    op.create_index('ix_friendships_reverse_pair', 'friendships', ['user_b_id', 'user_a_id'], unique=False)
+    op.create_index('ix_friend_requests_reverse_pair', 'friend_requests', ['to_user_id', 'from_user_id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_friend_requests_reverse_pair', table_name='friend_requests')
+    op.drop_index('ix_friendships_reverse_pair', table_name='friendships')
+    op.create_index(
+        'ix_conversation_participants_conversation_id',
+        'conversation_participants', ['conversation_id'], unique=False,
+    )
+    op.drop_index('ix_conversation_participants_user_conversation', table_name='conversation_participants')
+    op.drop_index('uq_conversation_participants_conversation_user', table_name='conversation_participants')
@@ -1,4 +1,4 @@
-from typing import Optional
+from typing import Literal, Optional
 import uuid
 
 from pydantic import Field
@@ -26,6 +26,18 @@ class Settings(BaseSettings):
     POSTGRES_HOST: str = "postgres"
     POSTGRES_PORT: int = 5432
     POSTGRES_DB: str = "chat_db"
+    # Connection pool shared by request handlers and WebSocket/background sessions
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 20
+    DB_POOL_TIMEOUT_SECONDS: float = 30.0
+    DB_POOL_RECYCLE_SECONDS: int = 1800
+    DB_POOL_PRE_PING: bool = True
+    # asyncpg prepared statements cached per connection (0 disables, e.g. behind pgbouncer)
+    DB_STATEMENT_CACHE_SIZE: int = 500
+    # Serve /metrics with pool, WebSocket and cache counters; off by default, since it
+    # exposes worker internals. When METRICS_TOKEN is set it must be sent as a Bearer token.
+    METRICS_ENABLED: bool = False
+    METRICS_TOKEN: Optional[str] = None
     
     # OpenAI chat helpers
     OPENAI_API_KEY: Optional[str] = None
@@ -35,12 +47,90 @@ class Settings(BaseSettings):
     OPENAI_BOT_EMAIL: str = Field(default="openai-bot@realtime-chat.com")
     OPENAI_BOT_DISPLAY_NAME: str = Field(default="OpenAI Bot")
     OPENAI_BOT_AVATAR_URL: Optional[str] = Field(default=None)
+    # Bot replies are generated by background workers; more waiting conversations are not answered
+    OPENAI_REPLY_WORKERS: int = 4
+    OPENAI_REPLY_MAX_PENDING: int = 1000
+    # Stream replies as message_delta events; deltas after the first are batched per interval
+    OPENAI_STREAM_REPLIES: bool = True
+    OPENAI_STREAM_FLUSH_SECONDS: float = 0.05
+    # Bot prompt: newest messages read, approximate token budget for them, and the rolling summary of older ones
+    OPENAI_CONTEXT_MAX_MESSAGES: int = 50
+    OPENAI_CONTEXT_TOKEN_BUDGET: int = 2000
+    OPENAI_SUMMARY_MAX_TOKENS: int = 256
+    OPENAI_SUMMARY_CACHE_MAX_CONVERSATIONS: int = 10000
+    # One pooled HTTP client per process (HTTP/2 when the h2 package is installed)
+    OPENAI_BASE_URL: str = "https://api.openai.com/v1"
+    OPENAI_TIMEOUT_SECONDS: float = 30.0
+    OPENAI_HTTP2: bool = True
+    OPENAI_MAX_CONNECTIONS: int = 20
+    OPENAI_MAX_KEEPALIVE_CONNECTIONS: int = 10
+    OPENAI_KEEPALIVE_EXPIRY_SECONDS: float = 30.0
+    # 429/5xx and transport errors are retried with exponential backoff and jitter
+    OPENAI_MAX_RETRIES: int = 3
+    OPENAI_RETRY_BACKOFF_SECONDS: float = 0.5
+    OPENAI_RETRY_BACKOFF_MAX_SECONDS: float = 8.0
+    # Consecutive failed calls that open the circuit, and how long it stays open
+    OPENAI_BREAKER_FAILURE_THRESHOLD: int = 5
+    OPENAI_BREAKER_RESET_SECONDS: float = 30.0
     
+    # Delivery receipts: flushed to the DB in batches by a background task
+    DELIVERY_RECEIPT_BATCH_SIZE: int = 500
+    DELIVERY_RECEIPT_FLUSH_INTERVAL_SECONDS: float = 0.25
+    # Receipts kept while the DB is unavailable; beyond it the oldest are dropped
+    DELIVERY_RECEIPT_MAX_PENDING: int = 50000
+
+    # WebSocket fan-out: per-socket outbound queue and what to do when it is full
+    WS_SEND_QUEUE_SIZE: int = 256
+    WS_SEND_OVERFLOW_POLICY: Literal["drop_oldest", "disconnect", "coalesce"] = "drop_oldest"
+    # Cross-worker event fan-out: "memory" for a single process, "postgres" for LISTEN/NOTIFY
+    WS_BACKPLANE: Literal["memory", "postgres"] = "memory"
+    WS_BACKPLANE_CHANNEL: str = "ws_events"
+    # Presence gossip: workers silent for longer than the TTL are considered dead
+    WS_PRESENCE_HEARTBEAT_SECONDS: float = 10.0
+    WS_PRESENCE_TTL_SECONDS: float = 30.0
+    # Typing indicators: state lapses unless refreshed; idle->typing transitions are rate limited per user
+    WS_TYPING_TTL_SECONDS: float = 6.0
+    WS_TYPING_RATE_PER_SECOND: float = 1.0
+    WS_TYPING_RATE_BURST: int = 5
+    # Admission: sockets per user (cluster-wide) and per worker
+    WS_MAX_CONNECTIONS_PER_USER: int = 5
+    WS_MAX_CONNECTIONS: int = 10000
+    # Inbound frames per socket; sustained excess closes the socket
+    WS_INBOUND_RATE_PER_SECOND: float = 20.0
+    WS_INBOUND_RATE_BURST: int = 40
+    WS_MAX_INBOUND_FRAME_BYTES: int = 4096
+    # Sockets are pinged every interval; one silent for longer than the timeout is reaped (0 disables)
+    WS_HEARTBEAT_INTERVAL_SECONDS: float = 25.0
+    WS_HEARTBEAT_TIMEOUT_SECONDS: float = 60.0
+    # Recent events kept per user so a reconnecting client receives only what it missed
+    WS_RESUME_BUFFER_SIZE: int = 256
+    WS_RESUME_RETENTION_SECONDS: float = 120.0
+    # In-memory conversation membership index (LRU-bounded, invalidated on change)
+    MEMBERSHIP_CACHE_MAX_CONVERSATIONS: int = 10000
+    MEMBERSHIP_CACHE_MAX_USERS: int = 10000
+    # How often the materialized unread counters are checked against messages (0 disables)
+    UNREAD_RECONCILE_INTERVAL_SECONDS: float = 3600.0
+    # Display names and avatars shown next to messages
+    USER_PROFILE_CACHE_TTL_SECONDS: float = 300.0
+    USER_PROFILE_CACHE_MAX_USERS: int = 10000
+
     #JWT
     JWT_SECRET_KEY: str
     JWT_ALGORITHM: str = 'HS256'
     JWT_TOKEN_AVAILABILITY_MIN: int 
     REFRESH_TOKEN_AVAILABILITY_MIN: int 
+    # Identify API callers from the signed token claims without loading the user row
+    AUTH_TRUST_TOKEN_CLAIMS: bool = True
+    # Routes that need the full user row read it through a short-lived cache. Token
+    # revocations (logout, credential changes) live in the same process memory only:
+    # they are shared with running workers but lost on restart.
+    AUTH_USER_CACHE_TTL_SECONDS: float = 30.0
+    AUTH_USER_CACHE_MAX_USERS: int = 10000
+    # bcrypt cost factor; stored hashes with a different cost are rehashed on login
+    PASSWORD_BCRYPT_ROUNDS: int = 12
+    # Password hashing runs on this many threads; more pending operations get a 429
+    PASSWORD_HASH_WORKERS: int = 4
+    PASSWORD_HASH_MAX_PENDING: int = 32
     
     #GOOGLE AUTH
     GOOGLE_CLIENT_ID: str
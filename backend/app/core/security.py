@@ -6,10 +6,10 @@ import secrets
 import hashlib
 
 from app.core.config import settings
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=settings.PASSWORD_BCRYPT_ROUNDS)
 
 def hash_password(password: str) -> str:
-    """Hash a password using bcrypt"""
+    """Hash a password using bcrypt (blocking; async code uses services.auth.password_hasher)"""
     return pwd_context.hash(password)
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
@@ -24,7 +24,9 @@ def create_access_token(data: Dict[str, Any], expires_delta: Optional[timedelta]
     else:
         expire = datetime.now(timezone.utc) + timedelta(minutes=settings.JWT_TOKEN_AVAILABILITY_MIN)
         
-    to_encode.update({"exp": expire})
+    # iat lets tokens issued before a revocation be rejected; it keeps sub-second
+    # precision so a token minted right after a revocation is not caught by it
+    to_encode.update({"exp": expire, "iat": datetime.now(timezone.utc).timestamp()})
     
     encoded_jwt = jwt.encode(to_encode, settings.JWT_SECRET_KEY, algorithm=settings.JWT_ALGORITHM)
     return encoded_jwt
@@ -6,7 +6,8 @@ from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.db.session import AsyncSessionLocal
-from app.services.auth import get_current_user
+from app.core.config import settings
+from app.services.auth import get_current_user, get_user_id_from_token
 
 
 security = HTTPBearer()
@@ -34,7 +35,8 @@ async def get_current_user_id(
 
     Requires an ``Authorization: Bearer <token>`` header. If the token is
     missing or invalid, raises 401/403 so protected routes cannot be
-    accessed without logging in.
+    accessed without logging in. With ``AUTH_TRUST_TOKEN_CLAIMS`` the id is
+    taken from the verified token without loading the user row.
     """
     if not credentials or not credentials.scheme.lower() == "bearer":
         raise HTTPException(
@@ -42,6 +44,9 @@ async def get_current_user_id(
             detail="Not authenticated",
         )
 
+    if settings.AUTH_TRUST_TOKEN_CLAIMS:
+        return get_user_id_from_token(credentials.credentials)
+
     user = await get_current_user(token=credentials.credentials, db=db)
     return user.id
 
@@ -0,0 +1,105 @@
+import time
+from typing import Any, Dict, Optional
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+from sqlalchemy.pool import Pool
+
+_CONNECT_STARTED = "pool_metrics_connect_started"
+
+
+class PoolMetrics:
+    """Counters describing how hard the connection pool is being used.
+
+    Everything is collected through public pool events and the pool's own
+    ``checkedout()``/``overflow()`` accessors. Overflow checkouts are those
+    that had to open a connection beyond ``pool_size``; ``connect`` is the
+    time spent opening new connections. SQLAlchemy has no event for a checkout
+    that gives up after ``pool_timeout``, so ``timeouts`` is counted by the
+    caller that sees the ``TimeoutError`` (the app's exception handler).
+    """
+
+    def __init__(self) -> None:
+        self.pool: Optional[Pool] = None
+        self.checkouts = 0
+        self.checkins = 0
+        self.peak_checked_out = 0
+        self.overflow_checkouts = 0
+        self.timeouts = 0
+        self.open_connections = 0
+        self.connects = 0
+        self.invalidations = 0
+        self.connect_seconds_total = 0.0
+        self.connect_seconds_max = 0.0
+
+    def record_checkout(self) -> None:
+        self.checkouts += 1
+        if self.pool is not None:
+            self.peak_checked_out = max(self.peak_checked_out, self.pool.checkedout())
+
+    def record_connect(self, seconds: float) -> None:
+        self.connects += 1
+        self.open_connections += 1
+        if self.pool is not None and self.open_connections > self.pool.size():
+            self.overflow_checkouts += 1
+        self.connect_seconds_total += seconds
+        self.connect_seconds_max = max(self.connect_seconds_max, seconds)
+
+    def record_close(self) -> None:
+        self.open_connections = max(0, self.open_connections - 1)
+
+    def stats(self) -> Dict[str, Any]:
+        pool = self.pool
+        return {
+            "pool_size": pool.size() if pool is not None else 0,
+            "checked_out": pool.checkedout() if pool is not None else 0,
+            "checked_in": pool.checkedin() if pool is not None else 0,
+            "overflow": max(0, pool.overflow()) if pool is not None else 0,
+            "status": pool.status() if pool is not None else "",
+            "peak_checked_out": self.peak_checked_out,
+            "checkouts": self.checkouts,
+            "checkins": self.checkins,
+            "overflow_checkouts": self.overflow_checkouts,
+            "timeouts": self.timeouts,
+            "open_connections": self.open_connections,
+            "connects": self.connects,
+            "invalidations": self.invalidations,
+            "connect_ms_avg": round(1000 * self.connect_seconds_total / self.connects, 3) if self.connects else 0.0,
+            "connect_ms_max": round(1000 * self.connect_seconds_max, 3),
+        }
+
+
+def create_instrumented_engine(url: str, metrics: PoolMetrics, **kwargs: Any) -> AsyncEngine:
+    """``create_async_engine`` whose pool events feed ``metrics``."""
+    engine = create_async_engine(url, **kwargs)
+    sync_engine = engine.sync_engine
+    metrics.pool = sync_engine.pool
+
+    @event.listens_for(sync_engine, "do_connect")
+    def _on_do_connect(dialect, connection_record, cargs, cparams):
+        connection_record.info[_CONNECT_STARTED] = time.perf_counter()
+
+    @event.listens_for(sync_engine, "connect")
+    def _on_connect(dbapi_connection, connection_record):
+        started = connection_record.info.pop(_CONNECT_STARTED, None)
+        metrics.record_connect(time.perf_counter() - started if started is not None else 0.0)
+
+    @event.listens_for(sync_engine, "close")
+    def _on_close(dbapi_connection, connection_record):
+        metrics.record_close()
+
+    @event.listens_for(sync_engine, "checkout")
+    def _on_checkout(dbapi_connection, connection_record, connection_proxy):
+        # engine.dispose() swaps in a fresh pool; follow the one in use
+        metrics.pool = sync_engine.pool
+        metrics.record_checkout()
+
+    @event.listens_for(sync_engine, "checkin")
+    def _on_checkin(dbapi_connection, connection_record):
+        metrics.checkins += 1
+
+    @event.listens_for(sync_engine, "invalidate")
+    def _on_invalidate(dbapi_connection, connection_record, exception):
+        metrics.invalidations += 1
+
+    return engine
@@ -0,0 +1,20 @@
+import uuid
+from typing import List
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.conversation_participants import ConversationsParticipants
+
+
+async def get_participant_ids(
+    db: AsyncSession,
+    conversation_id: uuid.UUID,
+) -> List[uuid.UUID]:
+    result = await db.execute(
+        select(ConversationsParticipants.user_id).where(
+            ConversationsParticipants.conversation_id == conversation_id
+        )
+    )
+
+    return list(result.scalars().all())
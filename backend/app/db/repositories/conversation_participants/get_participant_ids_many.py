@@ -0,0 +1,25 @@
+import uuid
+from typing import Dict, List, Sequence
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.conversation_participants import ConversationsParticipants
+
+
+async def get_participant_ids_many(
+    db: AsyncSession,
+    conversation_ids: Sequence[uuid.UUID],
+) -> Dict[uuid.UUID, List[uuid.UUID]]:
+    members: Dict[uuid.UUID, List[uuid.UUID]] = {conv_id: [] for conv_id in conversation_ids}
+    if not members:
+        return members
+    result = await db.execute(
+        select(ConversationsParticipants.conversation_id, ConversationsParticipants.user_id).where(
+            ConversationsParticipants.conversation_id.in_(list(members))
+        )
+    )
+    for conv_id, user_id in result.all():
+        members[conv_id].append(user_id)
+
+    return members
@@ -0,0 +1,20 @@
+import uuid
+from typing import List
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.conversation_participants import ConversationsParticipants
+
+
+async def get_user_conversation_ids(
+    db: AsyncSession,
+    user_id: uuid.UUID,
+) -> List[uuid.UUID]:
+    result = await db.execute(
+        select(ConversationsParticipants.conversation_id).where(
+            ConversationsParticipants.user_id == user_id
+        )
+    )
+
+    return list(result.scalars().all())
@@ -0,0 +1,99 @@
+import uuid
+from datetime import datetime
+
+from sqlalchemy import func, or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import aliased
+
+from app.models.conversation_participants import ConversationsParticipants
+from app.models.messages import Message
+
+# These helpers only stage their UPDATE; callers commit together with the
+# write that changed the count, so counter and messages never disagree.
+
+
+def _unread_expression():
+    """Correlated COUNT of a participant's unread messages, the source of truth for the counter."""
+    last_read = aliased(Message)
+    return (
+        select(func.count())
+        .select_from(Message)
+        .outerjoin(last_read, last_read.id == ConversationsParticipants.last_read_message_id)
+        .where(
+            Message.conversation_id == ConversationsParticipants.conversation_id,
+            Message.sender_id != ConversationsParticipants.user_id,
+            Message.deleted_for_everyone == False,  # noqa: E712
+            or_(last_read.created_at.is_(None), Message.created_at > last_read.created_at),
+        )
+        .correlate(ConversationsParticipants)
+        .scalar_subquery()
+    )
+
+
+async def increment_unread(db: AsyncSession, conversation_id: uuid.UUID, sender_id: uuid.UUID) -> None:
+    """Count a new message as unread for every participant but its sender."""
+    await db.execute(
+        update(ConversationsParticipants)
+        .where(
+            ConversationsParticipants.conversation_id == conversation_id,
+            ConversationsParticipants.user_id != sender_id,
+        )
+        .values(unread_count=ConversationsParticipants.unread_count + 1)
+        .execution_options(synchronize_session=False)
+    )
+
+
+async def decrement_unread(
+    db: AsyncSession,
+    conversation_id: uuid.UUID,
+    sender_id: uuid.UUID,
+    created_at: datetime,
+) -> None:
+    """Uncount a message deleted for everyone from participants who had not read it yet."""
+    last_read_at = (
+        select(Message.created_at)
+        .where(Message.id == ConversationsParticipants.last_read_message_id)
+        .correlate(ConversationsParticipants)
+        .scalar_subquery()
+    )
+    await db.execute(
+        update(ConversationsParticipants)
+        .where(
+            ConversationsParticipants.conversation_id == conversation_id,
+            ConversationsParticipants.user_id != sender_id,
+            ConversationsParticipants.unread_count > 0,
+            or_(ConversationsParticipants.last_read_message_id.is_(None), last_read_at < created_at),
+        )
+        .values(unread_count=ConversationsParticipants.unread_count - 1)
+        .execution_options(synchronize_session=False)
+    )
+
+
+async def recompute_unread(db: AsyncSession, conversation_id: uuid.UUID, user_id: uuid.UUID) -> int:
+    """Set one participant's counter from the messages after their read marker."""
+    result = await db.execute(
+        update(ConversationsParticipants)
+        .where(
+            ConversationsParticipants.conversation_id == conversation_id,
+            ConversationsParticipants.user_id == user_id,
+        )
+        .values(unread_count=_unread_expression())
+        .returning(ConversationsParticipants.unread_count)
+        .execution_options(synchronize_session=False)
+    )
+    return result.scalar() or 0
+
+
+async def reconcile_unread_counts(db: AsyncSession) -> int:
+    """Repair every counter that drifted from the messages table; returns how many were fixed."""
+    expected = _unread_expression()
+    result = await db.execute(
+        update(ConversationsParticipants)
+        .where(ConversationsParticipants.unread_count != expected)
+        .values(unread_count=expected)
+        .returning(ConversationsParticipants.id)
+        .execution_options(synchronize_session=False)
+    )
+    repaired = len(result.all())
+    await db.commit()
+    return repaired
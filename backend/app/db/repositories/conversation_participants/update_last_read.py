@@ -1,8 +1,12 @@
 import uuid
 from datetime import datetime
 
-from sqlalchemy import update, select
+from sqlalchemy import Text, cast, func, or_, select, update
+from sqlalchemy.dialects.postgresql import ARRAY, JSONB, array
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import aliased
+from sqlalchemy.orm.attributes import set_committed_value
+from app.db.repositories.conversation_participants.unread_count import recompute_unread
 from app.models.conversation_participants import ConversationsParticipants
 from app.models.messages import Message
 
@@ -13,37 +17,69 @@ async def update_last_read(
     user_id: uuid.UUID,
     message_id: uuid.UUID
 ) -> tuple[ConversationsParticipants, list[uuid.UUID]]:
-    result = await db.execute(
-        update(ConversationsParticipants)
+    """Move the read marker to ``message_id`` and stamp ``seen_at`` on what it passed.
+
+    Only messages after the previous marker and up to the new one are
+    touched, in a single UPDATE ... RETURNING id, so the cost follows the
+    number of newly read messages rather than the conversation's history.
+    The marker never moves backward.
+    """
+    previous = aliased(Message)
+    target = aliased(Message)
+    # Lock the participant row so concurrent receipts for this user serialize
+    row = (await db.execute(
+        select(
+            ConversationsParticipants,
+            previous.created_at,
+            previous.id,
+            target.created_at,
+        )
+        .outerjoin(previous, previous.id == ConversationsParticipants.last_read_message_id)
+        .join(target, (target.id == message_id) & (target.conversation_id == conversation_id))
         .where(
             ConversationsParticipants.conversation_id == conversation_id,
             ConversationsParticipants.user_id == user_id
         )
-        .values(last_read_message_id=message_id)
-        .returning(ConversationsParticipants)
-    )
+        .with_for_update(of=ConversationsParticipants)
+    )).one()
+    participant, prev_created_at, prev_id, target_created_at = row
 
-    participant = result.scalar_one()
+    if prev_id is not None and (prev_created_at, prev_id) >= (target_created_at, message_id):
+        await db.commit()
+        return participant, []
 
-    now = datetime.utcnow().isoformat()
     user_key = str(user_id)
-    updated_message_ids: list[uuid.UUID] = []
-
-    msgs_result = await db.execute(
-        select(Message).where(Message.conversation_id == conversation_id)
+    stmt = (
+        update(Message)
+        .where(
+            Message.conversation_id == conversation_id,
+            Message.sender_id != user_id,
+            Message.created_at <= target_created_at,
+            or_(Message.created_at < target_created_at, Message.id <= message_id),
+            or_(Message.seen_at.is_(None), ~Message.seen_at.has_key(user_key)),
+        )
+        .values(
+            seen_at=func.jsonb_set(
+                func.coalesce(Message.seen_at, cast({}, JSONB)),
+                cast(array([user_key]), ARRAY(Text)),
+                func.to_jsonb(cast(datetime.utcnow().isoformat(), Text)),
+            )
+        )
+        .returning(Message.id)
+        .execution_options(synchronize_session=False)
     )
-    messages = msgs_result.scalars().all()
-
-    for msg in messages:
-        if msg.sender_id == user_id:
-            continue
-        seen_map = msg.seen_at or {}
+    if prev_id is not None:
+        stmt = stmt.where(
+            Message.created_at >= prev_created_at,
+            or_(Message.created_at > prev_created_at, Message.id > prev_id),
+        )
 
-        if user_key not in seen_map:
-            seen_map[user_key] = now
-            msg.seen_at = seen_map
-            updated_message_ids.append(msg.id)
+    updated_message_ids = list((await db.execute(stmt)).scalars().all())
 
+    participant.last_read_message_id = message_id
+    await db.flush()
+    # Whatever is still unread lies after the new marker
+    set_committed_value(participant, "unread_count", await recompute_unread(db, conversation_id, user_id))
     await db.commit()
 
     return participant, updated_message_ids
@@ -1,138 +1,95 @@
+import hashlib
+import uuid
+from collections import defaultdict
+from typing import Iterable
 from sqlalchemy import select, delete, update
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import aliased
 from uuid import UUID
 
 from app.models.conversations import Conversations
 from app.models.conversation_participants import ConversationsParticipants
 from app.models.users import User
 from app.models.messages import Message
-from sqlalchemy import func
+
+
+def participant_set_key(participant_ids: Iterable[UUID]) -> str:
+    """
+    Canonical key of a participant set: sha256 of the distinct ids in uuid (byte) order.
+    Must stay in sync with the backfill in the add_participant_key_to_conversations migration.
+    """
+    ids = sorted({UUID(str(pid)) for pid in participant_ids})
+    return hashlib.sha256(",".join(str(pid) for pid in ids).encode()).hexdigest()
 
 
 class ConversationRepository:
     def __init__(self, db: AsyncSession):
         self.db = db
 
-    async def get_conversations_for_user(self, user_id: UUID):
+    async def get_conversation_summaries(self, user_id: UUID, conversation_id: UUID | None = None):
         """
-        Return all conversations where the user is a participant.
-        Ordered by last_message_created_at DESC.
+        Return (conversation, unread_count, participants) for every conversation of the user,
+        newest first, where participants is a list of (participant_id, User | None).
+        Runs two queries however many conversations there are: one for the conversations with
+        the user's materialized unread counter and one for all participants with their
+        profiles. Pass conversation_id to build a single summary.
         """
+        me = aliased(ConversationsParticipants)
         stmt = (
-            select(Conversations)
-            .join(ConversationsParticipants)
-            .where(ConversationsParticipants.user_id == user_id)
+            select(Conversations, me.unread_count)
+            .join(me, (me.conversation_id == Conversations.id) & (me.user_id == user_id))
             .order_by(Conversations.last_message_created_at.desc())
         )
-        return (await self.db.execute(stmt)).scalars().all()
-
-    async def get_last_read_message_id(self, conversation_id: UUID, user_id: UUID):
-        stmt = (
-            select(ConversationsParticipants.last_read_message_id)
-            .where(
-                ConversationsParticipants.conversation_id == conversation_id,
-                ConversationsParticipants.user_id == user_id,
-            )
-        )
-        return (await self.db.execute(stmt)).scalar()
-
-    async def count_unread_messages(self, conversation_id: UUID, user_id: UUID, last_read_message_id: UUID | None):
-        # Count messages after last_read that were sent by others and not deleted
-        # If last_read_message_id is None, count all messages from others
-        base = select(func.count()).select_from(Message).where(
-            Message.conversation_id == conversation_id,
-            Message.sender_id != user_id,
-            Message.deleted_for_everyone == False,  # noqa: E712
+        if conversation_id is not None:
+            stmt = stmt.where(Conversations.id == conversation_id)
+        rows = (await self.db.execute(stmt)).all()
+        if not rows:
+            return []
+
+        conv_ids = [conv.id for conv, _ in rows]
+        parts_stmt = (
+            select(ConversationsParticipants.conversation_id, ConversationsParticipants.user_id, User)
+            .outerjoin(User, User.id == ConversationsParticipants.user_id)
+            .where(ConversationsParticipants.conversation_id.in_(conv_ids))
         )
-        if last_read_message_id:
-            # Get timestamp of last read message and count those created after
-            ts_stmt = select(Message.created_at).where(Message.id == last_read_message_id)
-            ts = (await self.db.execute(ts_stmt)).scalar()
-            if ts:
-                base = base.where(Message.created_at > ts)
-        return (await self.db.execute(base)).scalar() or 0
-
-    async def get_other_participant(self, conversation_id: UUID, user_id: UUID):
-        """
-        Return the user_id of the other participant in a direct conversation.
-        """
-        stmt = (
-            select(ConversationsParticipants.user_id)
-            .where(
-                ConversationsParticipants.conversation_id == conversation_id,
-                ConversationsParticipants.user_id != user_id
-            )
-        )
-        return (await self.db.execute(stmt)).scalar()
-
-    async def get_user(self, user_id: UUID):
-        """
-        Load user info (display_name, avatar, etc.)
-        """
-        stmt = select(User).where(User.id == user_id)
-        return (await self.db.execute(stmt)).scalars().first()
-
-    async def create_conversation(self, conversation_type: str, participant_ids: list[UUID], title: str | None = None):
-        """
-        Create a new conversation with the given participants.
-        """
-        new_conversation = Conversations(type=conversation_type, title=title)
-        self.db.add(new_conversation)
-        await self.db.flush()  # to get the new conversation ID
-
-        for pid in participant_ids:
-            participant = ConversationsParticipants(
-                conversation_id=new_conversation.id,
-                user_id=pid
-            )
-            self.db.add(participant)
+        participants = defaultdict(list)
+        for conv_id, pid, user in (await self.db.execute(parts_stmt)).all():
+            participants[conv_id].append((pid, user))
 
-        await self.db.commit()
-        return new_conversation
+        return [(conv, unread_count, participants[conv.id]) for conv, unread_count in rows]
 
-    async def find_direct_conversation_by_participants(self, user_a: UUID, user_b: UUID):
+    async def find_or_create_conversation(self, conversation_type: str, participant_ids: list[UUID], title: str | None = None):
         """
-        Return an existing direct conversation that includes exactly the two participants provided,
-        or None if not found.
+        Return (conversation, created) for the conversation of exactly these participants.
+        The insert is ON CONFLICT DO NOTHING on the unique participant key, so concurrent
+        requests for the same set wait on each other and all end up with one conversation.
         """
-        # Find conversations where type is direct and that have both participants
-        stmt = (
-            select(Conversations)
-            .where(Conversations.type == "direct")
+        key = participant_set_key(participant_ids)
+        inserted = (await self.db.execute(
+            insert(Conversations)
+            .values(id=uuid.uuid4(), type=conversation_type, title=title, participant_key=key)
+            .on_conflict_do_nothing(index_elements=[Conversations.participant_key])
+            .returning(Conversations.id)
+        )).scalar()
+
+        if inserted is None:
+            return await self.get_conversation_by_participant_key(key), False
+
+        self.db.add_all(
+            ConversationsParticipants(conversation_id=inserted, user_id=pid) for pid in participant_ids
         )
-        conversations = (await self.db.execute(stmt)).scalars().all()
+        await self.db.commit()
+        return await self.get_conversation_by_id(inserted), True
 
-        # Filter in python: ensure the participants set matches exactly {user_a, user_b}
-        for conv in conversations:
-            parts_stmt = select(ConversationsParticipants.user_id).where(ConversationsParticipants.conversation_id == conv.id)
-            part_ids = set((await self.db.execute(parts_stmt)).scalars().all())
-            if part_ids == {user_a, user_b}:
-                return conv
-        return None
+    async def get_conversation_by_participant_key(self, key: str):
+        stmt = select(Conversations).where(Conversations.participant_key == key)
+        return (await self.db.execute(stmt)).scalar_one_or_none()
 
     async def get_participant_ids(self, conversation_id: UUID):
         stmt = select(ConversationsParticipants.user_id).where(ConversationsParticipants.conversation_id == conversation_id)
         return (await self.db.execute(stmt)).scalars().all()
 
-    async def find_conversation_by_participant_set(self, participant_ids: list[UUID]):
-        """
-        Find an existing conversation whose participant set exactly matches the provided participant_ids.
-        Returns the Conversations row or None.
-        """
-        # Normalize to set for comparison
-        target_set = set(participant_ids)
-
-        # Query all conversations that have same number of participants as target
-        stmt = select(Conversations).where(Conversations.type.in_(["group", "direct"]))
-        conversations = (await self.db.execute(stmt)).scalars().all()
-
-        for conv in conversations:
-            parts_stmt = select(ConversationsParticipants.user_id).where(ConversationsParticipants.conversation_id == conv.id)
-            part_ids = set((await self.db.execute(parts_stmt)).scalars().all())
-            if part_ids == target_set:
-                return conv
-        return None
-
     async def get_conversation_by_id(self, conversation_id: UUID):
         """Return the Conversations row for the given id, or None."""
         stmt = select(Conversations).where(Conversations.id == conversation_id)
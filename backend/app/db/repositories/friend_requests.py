@@ -1,11 +1,31 @@
 from typing import Optional, List
 from uuid import UUID
-from sqlalchemy import select, delete, or_
+from sqlalchemy import select, delete, union_all
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import aliased
 
 from app.models.friend_requests import FriendRequest
 
 
+# OR-ed conditions on the two user columns cannot use the pair indexes, so
+# both helpers UNION one lookup per direction and expose it as a FriendRequest.
+
+def friend_requests_between(a: UUID, b: UUID):
+    """Requests between two users in either direction."""
+    return aliased(FriendRequest, union_all(
+        select(FriendRequest).where(FriendRequest.from_user_id == a, FriendRequest.to_user_id == b),
+        select(FriendRequest).where(FriendRequest.from_user_id == b, FriendRequest.to_user_id == a),
+    ).subquery())
+
+
+def friend_requests_for_user(user_id: UUID):
+    """Requests sent or received by ``user_id``."""
+    return aliased(FriendRequest, union_all(
+        select(FriendRequest).where(FriendRequest.to_user_id == user_id),
+        select(FriendRequest).where(FriendRequest.from_user_id == user_id),
+    ).subquery())
+
+
 class FriendRequestRepository:
     def __init__(self, db: AsyncSession):
         self.db = db
@@ -26,9 +46,8 @@ class FriendRequestRepository:
         return result.scalars().first()
 
     async def list_for_user(self, user_id: UUID) -> List[FriendRequest]:
-        stmt = select(FriendRequest).where(
-            or_(FriendRequest.to_user_id == user_id, FriendRequest.from_user_id == user_id)
-        ).order_by(FriendRequest.created_at.desc())
+        requests = friend_requests_for_user(user_id)
+        stmt = select(requests).order_by(requests.created_at.desc())
         result = await self.db.execute(stmt)
         return result.scalars().all()
 
@@ -0,0 +1,21 @@
+import uuid
+from typing import Optional
+from sqlalchemy import select, union_all
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import aliased
+from app.models.friendships import Friendship
+
+
+def friendship_between(a: uuid.UUID, b: uuid.UUID):
+    """Friendship rows between two users in either orientation, as a UNION ALL of
+    one lookup on the pair index and one on the reverse pair index."""
+    pairs = union_all(
+        select(Friendship).where(Friendship.user_a_id == a, Friendship.user_b_id == b),
+        select(Friendship).where(Friendship.user_a_id == b, Friendship.user_b_id == a),
+    ).subquery()
+    return aliased(Friendship, pairs)
+
+
+async def get_friendship(db: AsyncSession, a: uuid.UUID, b: uuid.UUID) -> Optional[Friendship]:
+    result = await db.execute(select(friendship_between(a, b)).limit(1))
+    return result.scalars().first()
@@ -0,0 +1,136 @@
+import uuid
+from datetime import datetime
+from typing import List, NamedTuple, Optional
+
+from sqlalchemy import Boolean, Text, TIMESTAMP, func, insert, literal, select, update
+from sqlalchemy.dialects.postgresql import JSONB, UUID as PG_UUID
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.conversation_participants import ConversationsParticipants
+from app.models.conversations import Conversations
+from app.models.messages import Message
+from app.models.users import User
+
+
+class AppendedMessage(NamedTuple):
+    message: Message
+    participant_ids: List[uuid.UUID]
+    sender_name: str
+    # The conversation had no message before this one
+    first_message: bool
+
+
+async def append_message(
+    db: AsyncSession,
+    conversation_id: uuid.UUID,
+    sender_id: uuid.UUID,
+    body: str,
+) -> Optional[AppendedMessage]:
+    """Insert a message and everything that denormalizes it in one statement.
+
+    The INSERT takes its conversation and sender from the sender's participant
+    row, so nothing is written unless ``sender_id`` is a member. The same
+    statement moves the conversation's last-message preview, counts the
+    message as unread for the other participants and returns who they are,
+    the sender's display name and whether the conversation was empty before.
+    Returns None when the sender is not a participant. Not committed.
+    """
+    message_id = uuid.uuid4()
+    created_at = datetime.utcnow()
+
+    sender = (
+        select(
+            literal(message_id, PG_UUID(as_uuid=True)),
+            ConversationsParticipants.conversation_id,
+            ConversationsParticipants.user_id,
+            literal(body, Text),
+            literal(created_at, TIMESTAMP),
+            literal({}, JSONB),
+            literal({}, JSONB),
+            literal(False, Boolean),
+            literal({}, JSONB),
+        )
+        .where(
+            ConversationsParticipants.conversation_id == conversation_id,
+            ConversationsParticipants.user_id == sender_id,
+        )
+    )
+    inserted = (
+        insert(Message)
+        .from_select(
+            [
+                Message.id,
+                Message.conversation_id,
+                Message.sender_id,
+                Message.body,
+                Message.created_at,
+                Message.delivered_at,
+                Message.seen_at,
+                Message.deleted_for_everyone,
+                Message.reactions,
+            ],
+            sender,
+        )
+        .returning(Message.id, Message.conversation_id)
+        .cte("inserted")
+    )
+    # Sibling CTEs share one snapshot, so this still sees the pre-update row
+    previous = (
+        select(Conversations.last_message_created_at)
+        .where(Conversations.id == conversation_id)
+        .cte("previous")
+    )
+    preview = (
+        update(Conversations)
+        .where(Conversations.id == inserted.c.conversation_id)
+        .values(
+            last_message_id=inserted.c.id,
+            last_message_preview=body[:100],  # max 100 chars
+            last_message_created_at=created_at,
+        )
+        .returning(Conversations.id)
+        .cte("preview")
+    )
+    recipients = (
+        update(ConversationsParticipants)
+        .where(
+            ConversationsParticipants.conversation_id == inserted.c.conversation_id,
+            ConversationsParticipants.user_id != sender_id,
+        )
+        .values(unread_count=ConversationsParticipants.unread_count + 1)
+        .returning(ConversationsParticipants.user_id)
+        .cte("recipients")
+    )
+
+    stmt = (
+        select(
+            inserted.c.id,
+            select(func.array_agg(recipients.c.user_id)).scalar_subquery().label("recipient_ids"),
+            select(User.display_name).where(User.id == sender_id).scalar_subquery().label("sender_name"),
+            select(previous.c.last_message_created_at).scalar_subquery().label("previous_at"),
+        )
+        .select_from(inserted)
+        .add_cte(preview)
+    )
+    row = (await db.execute(stmt)).one_or_none()
+    if row is None:
+        return None
+
+    message = Message(
+        id=row.id,
+        conversation_id=conversation_id,
+        sender_id=sender_id,
+        body=body,
+        created_at=created_at,
+        delivered_at={},
+        seen_at={},
+        edited_at=None,
+        deleted_for_everyone=False,
+        reactions={},
+    )
+    return AppendedMessage(
+        message=message,
+        participant_ids=[sender_id, *(row.recipient_ids or ())],
+        sender_name=row.sender_name or "",
+        first_message=row.previous_at is None,
+    )
@@ -3,6 +3,7 @@ from datetime import datetime
 
 from sqlalchemy import update
 from sqlalchemy.ext.asyncio import AsyncSession
+from app.db.repositories.conversation_participants.unread_count import decrement_unread
 from app.models.message_deletions import MessageDeletion
 from app.models.messages import Message
 
@@ -18,13 +19,18 @@ async def delete_message(
         deleted_at=datetime.utcnow()
     )
     db.add(deletion)
-    await db.execute(
+    result = await db.execute(
         update(Message)
-        .where(Message.id == message_id)
+        .where(Message.id == message_id, Message.deleted_for_everyone == False)  # noqa: E712
         .values(
             deleted_for_everyone=True,
             edited_at=datetime.utcnow()
         )
+        .returning(Message.conversation_id, Message.sender_id, Message.created_at)
     )
+    deleted = result.first()
+    if deleted is not None:
+        # Deleted messages no longer count as unread
+        await decrement_unread(db, *deleted)
     await db.commit()
     return deletion
@@ -1,23 +1,47 @@
 import uuid
-from typing import Sequence
+from datetime import datetime
+from typing import Optional, Sequence, Tuple
 
-from sqlalchemy import select
+from sqlalchemy import or_, select
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.models.messages import Message
 
+# Position of a message in a conversation's history: (created_at, id)
+Cursor = Tuple[datetime, uuid.UUID]
+
 
 async def get_messages(
     db: AsyncSession,
     conversation_id: uuid.UUID,
     limit: int = 50,
-    offset: int = 0
+    before: Optional[Cursor] = None,
+    after: Optional[Cursor] = None,
 ) -> Sequence[Message]:
-    result = await db.execute(
-        select(Message)
-        .where(Message.conversation_id == conversation_id)
-        .order_by(Message.created_at.asc())
-        .limit(limit)
-        .offset(offset)
-    )
+    """Return up to ``limit`` messages in chronological order.
+
+    Without a cursor the newest messages are returned. ``before`` returns the
+    newest messages older than the cursor, ``after`` the oldest messages newer
+    than it. Both are keyset conditions on (created_at, id), so the lookup
+    walks idx_messages_conversation_created_at from the cursor instead of
+    skipping rows like OFFSET does.
+    """
+    stmt = select(Message).where(Message.conversation_id == conversation_id)
+
+    if after is not None:
+        created_at, message_id = after
+        stmt = stmt.where(
+            Message.created_at >= created_at,
+            or_(Message.created_at > created_at, Message.id > message_id),
+        ).order_by(Message.created_at.asc(), Message.id.asc())
+        result = await db.execute(stmt.limit(limit))
+        return result.scalars().all()
 
-    return result.scalars().all()
+    if before is not None:
+        created_at, message_id = before
+        stmt = stmt.where(
+            Message.created_at <= created_at,
+            or_(Message.created_at < created_at, Message.id < message_id),
+        )
+    stmt = stmt.order_by(Message.created_at.desc(), Message.id.desc())
+    result = await db.execute(stmt.limit(limit))
+    return list(reversed(result.scalars().all()))
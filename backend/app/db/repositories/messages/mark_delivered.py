@@ -0,0 +1,42 @@
+import uuid
+from typing import Dict
+
+from sqlalchemy import bindparam, cast, func, update
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.models.messages import Message
+
+
+async def mark_delivered(
+    db: AsyncSession,
+    receipts: Dict[uuid.UUID, Dict[str, str]]
+) -> None:
+    """Merge per-recipient delivery timestamps into ``messages.delivered_at``.
+
+    ``receipts`` maps a message id to ``{user_id: iso_timestamp}``. All messages
+    are written with a single executemany UPDATE; each row merges its receipt
+    object into the existing JSONB map instead of rewriting it from Python.
+    """
+    if not receipts:
+        return
+
+    # Core table UPDATE so the parameter list runs as executemany rather
+    # than an ORM bulk-by-primary-key update.
+    messages = Message.__table__
+    stmt = (
+        update(messages)
+        .where(messages.c.id == bindparam("b_message_id"))
+        .values(
+            delivered_at=func.coalesce(messages.c.delivered_at, cast({}, JSONB)).op("||")(
+                bindparam("b_receipts", type_=JSONB)
+            )
+        )
+    )
+    await db.execute(
+        stmt,
+        [
+            {"b_message_id": message_id, "b_receipts": per_user}
+            for message_id, per_user in receipts.items()
+        ],
+    )
+    await db.commit()
@@ -0,0 +1,21 @@
+import uuid
+from typing import Dict, Iterable, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.users import User
+
+
+async def get_user_profiles(
+    db: AsyncSession,
+    user_ids: Iterable[uuid.UUID],
+) -> Dict[uuid.UUID, Tuple[str | None, str | None]]:
+    """Return (display_name, avatar_url) for every existing user in ``user_ids``."""
+    ids = list(user_ids)
+    if not ids:
+        return {}
+    result = await db.execute(
+        select(User.id, User.display_name, User.avatar_url).where(User.id.in_(ids))
+    )
+    return {row.id: (row.display_name, row.avatar_url) for row in result}
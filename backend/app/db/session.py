@@ -1,12 +1,26 @@
-from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import sessionmaker, declarative_base
 
 from app.core.config import settings
+from app.db.pool_metrics import PoolMetrics, create_instrumented_engine
 
-engine = create_async_engine(
+pool_metrics = PoolMetrics()
+
+engine = create_instrumented_engine(
     settings.database_url,
+    pool_metrics,
     echo=settings.DEBUG,
     future=True,
+    pool_size=settings.DB_POOL_SIZE,
+    max_overflow=settings.DB_MAX_OVERFLOW,
+    pool_timeout=settings.DB_POOL_TIMEOUT_SECONDS,
+    pool_recycle=settings.DB_POOL_RECYCLE_SECONDS,
+    pool_pre_ping=settings.DB_POOL_PRE_PING,
+    connect_args={
+        # SQLAlchemy's prepared statement cache and asyncpg's own statement cache
+        "prepared_statement_cache_size": settings.DB_STATEMENT_CACHE_SIZE,
+        "statement_cache_size": settings.DB_STATEMENT_CACHE_SIZE,
+    },
 )
 
 AsyncSessionLocal = sessionmaker(
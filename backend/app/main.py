@@ -1,8 +1,11 @@
 # app/main.py
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
+from sqlalchemy import exc as sa_exc
 
 from app.db.init_db import init_db
+from app.db.session import pool_metrics
 from app.core.config import settings
 import app.models  # ensure all models are imported so SQLAlchemy can resolve relationships
 
@@ -32,7 +35,16 @@ from app.routes.auth.google_url import router as google_url_router
 # USER ROUTES
 from app.routes.users.update_avatar import router as update_avatar_router
 # WEBSOCKET ROUTES
-from app.websocket.router import router as websocket_router
+from app.websocket.router import router as websocket_router, heartbeat
+# METRICS
+from app.routes.metrics import router as metrics_router
+from app.websocket.delivery_receipts import delivery_receipts
+from app.websocket.manager import manager
+from app.services.conversation_participants.unread_reconciler import unread_reconciler
+from app.services.auth.password_hasher import password_hasher
+from app.services.ai.bot_replies import bot_replies
+from app.services.ai.context import conversation_context
+from app.services.ai.openai_client import openai_client
 
 
 app = FastAPI(title=settings.APP_NAME)
@@ -47,8 +59,16 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "X-Prev-Cursor"],
 )
 
+
+@app.exception_handler(sa_exc.TimeoutError)
+async def on_pool_timeout(request: Request, exc: sa_exc.TimeoutError) -> JSONResponse:
+    # No connection freed up within DB_POOL_TIMEOUT_SECONDS; the pool has no event for this
+    pool_metrics.timeouts += 1
+    return JSONResponse(status_code=503, content={"detail": "Database busy, try again"})
+
 app.include_router(send_message_router, tags=["messages"])
 app.include_router(edit_message_router, tags=["messages"])
 app.include_router(delete_message_router, tags=["messages"])
@@ -68,6 +88,9 @@ app.include_router(respond_request_router, tags=["friends"])
 # Websocket routes
 app.include_router(websocket_router, tags=["websocket"])
 
+if settings.METRICS_ENABLED:
+    app.include_router(metrics_router, tags=["metrics"])
+
 
 app.include_router(register_router, tags=["auth"])
 app.include_router(login_router, tags=["auth"])
@@ -86,4 +109,23 @@ async def on_startup():
     # In development we create tables for convenience. In production use Alembic migrations.
     if settings.DEBUG:
         await init_db(create_tables=True)
+    delivery_receipts.start()
+    await manager.start()
+    heartbeat.start()
+    unread_reconciler.start()
+    openai_client.start()
+    bot_replies.start()
+
+
+@app.on_event("shutdown")
+async def on_shutdown():
+    await bot_replies.stop()
+    await conversation_context.stop()
+    await openai_client.close()
+    await unread_reconciler.stop()
+    await heartbeat.stop()
+    await manager.stop()
+    # Drain queued delivery receipts so nothing is lost on a clean stop
+    await delivery_receipts.stop()
+    password_hasher.stop()
 
@@ -1,5 +1,5 @@
 import uuid
-from sqlalchemy import Column, TIMESTAMP, ForeignKey
+from sqlalchemy import Column, Integer, TIMESTAMP, ForeignKey, Index
 from sqlalchemy.dialects.postgresql import UUID as PG_UUID
 from sqlalchemy.orm import relationship
 from app.db.session import Base
@@ -8,8 +8,15 @@ from app.db.session import Base
 class ConversationsParticipants(Base):
     __tablename__ = "conversation_participants"
     id = Column(PG_UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)  # optional PK
-    conversation_id = Column(PG_UUID(as_uuid=True), ForeignKey("conversations.id"), nullable=False, index=True)
+    conversation_id = Column(PG_UUID(as_uuid=True), ForeignKey("conversations.id"), nullable=False)
     user_id = Column(PG_UUID(as_uuid=True), ForeignKey("users.id"), nullable=False)
     joined_at = Column(TIMESTAMP, nullable=True)
     last_read_message_id = Column(PG_UUID(as_uuid=True), ForeignKey("messages.id"), nullable=True)
-    conversation = relationship("Conversations", back_populates="participants")
\ No newline at end of file
+    # Messages from others after last_read_message_id; maintained on write, repaired by reconciliation
+    unread_count = Column(Integer, nullable=False, default=0, server_default="0")
+    conversation = relationship("Conversations", back_populates="participants")
+
+    __table_args__ = (
+        Index("uq_conversation_participants_conversation_user", "conversation_id", "user_id", unique=True),
+        Index("ix_conversation_participants_user_conversation", "user_id", "conversation_id"),
+    )
@@ -1,5 +1,5 @@
 import uuid
-from sqlalchemy import Column, String, TIMESTAMP
+from sqlalchemy import Column, Index, String, TIMESTAMP
 from sqlalchemy.dialects.postgresql import UUID as PG_UUID
 from sqlalchemy.orm import relationship
 from app.db.session import Base
@@ -16,4 +16,10 @@ class Conversations(Base):
     # Denormalized last message fields for fast UI
     last_message_id = Column(PG_UUID(as_uuid=True), ForeignKey("messages.id", ondelete="SET NULL"), nullable=True, index=True)
     last_message_preview = Column(Text, nullable=True)
-    last_message_created_at = Column(SQLTIMESTAMP, nullable=True)
\ No newline at end of file
+    last_message_created_at = Column(SQLTIMESTAMP, nullable=True)
+    # sha256 of the sorted participant ids; one conversation per participant set
+    participant_key = Column(String(64), nullable=True)
+
+    __table_args__ = (
+        Index("uq_conversations_participant_key", "participant_key", unique=True),
+    )
\ No newline at end of file
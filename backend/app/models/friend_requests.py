@@ -19,4 +19,5 @@ class FriendRequest(Base):
 
     __table_args__ = (
         Index("uq_friend_requests_pair", "from_user_id", "to_user_id", unique=True),
+        Index("ix_friend_requests_reverse_pair", "to_user_id", "from_user_id"),
     )
\ No newline at end of file
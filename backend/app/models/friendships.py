@@ -13,4 +13,5 @@ class Friendship(Base):
 
     __table_args__ = (
         Index("uq_friendships_pair", "user_a_id", "user_b_id", unique=True),
+        Index("ix_friendships_reverse_pair", "user_b_id", "user_a_id"),
     )
\ No newline at end of file
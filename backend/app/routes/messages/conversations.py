@@ -1,4 +1,4 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.ext.asyncio import AsyncSession
 from uuid import UUID
 from pydantic import BaseModel, Field
@@ -66,7 +66,10 @@ async def update_conversation(
     user_id: UUID = Depends(get_current_user_id),
 ):
     service = ConversationService(ConversationRepository(db))
-    return await service.update_group_conversation(conversation_id, user_id, payload.title)
+    try:
+        return await service.update_group_conversation(conversation_id, user_id, payload.title)
+    except PermissionError:
+        raise HTTPException(status_code=403, detail="Not a participant")
 
 
 
@@ -11,7 +11,7 @@ from app.schemas.message_deletions import MessageDeletionRead
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.services.conversation_participants.is_participant import is_conversation_participant_service
-from app.db.repositories.conversation_participants.get_all_participants import get_participants
+from app.services.conversation_participants.membership_cache import membership_cache
 from app.websocket.manager import manager
 from app.services.conversation_participants.get_participant_name import get_participant_name_service
 
@@ -42,8 +42,7 @@ async def delete_message(
         # Get name of the user who performed the deletion
         deletor_name = await get_participant_name_service(db, user_id)
 
-        participants = await get_participants(db, conversation_id)
-        participant_ids = [str(p.user_id) for p in participants]
+        participant_ids = await membership_cache.get_members(conversation_id, db)
 
         await manager.broadcast(
             participant_ids,
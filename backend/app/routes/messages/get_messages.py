@@ -1,6 +1,6 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
 import uuid
-from typing import Sequence
+from typing import Optional, Sequence
 
 from app.db.dependencies import (
     get_db,
@@ -10,7 +10,7 @@ from app.db.dependencies import (
 from app.services.conversation_participants.is_participant import (
     is_conversation_participant_service,
 )
-from app.services.messages.get_messages import get_messages_service
+from app.services.messages.get_messages import decode_cursor, get_messages_service
 from app.schemas.messages import MessageRead
 from sqlalchemy.ext.asyncio import AsyncSession
 
@@ -20,24 +20,49 @@ router = APIRouter()
 
 @router.get("/conversations/{conversation_id}/messages", response_model=Sequence[MessageRead])
 async def get_messages(
-    limit: int = 50,
-    offset: int = 0,
+    response: Response,
+    limit: int = Query(50, ge=1, le=200),
+    before: Optional[str] = Query(None, description="Cursor: return messages older than this position"),
+    after: Optional[str] = Query(None, description="Cursor: return messages newer than this position"),
+    around: Optional[uuid.UUID] = Query(None, description="Message id to center the page on"),
     db: AsyncSession = Depends(get_db),
     user_id: uuid.UUID = Depends(get_current_user_id),
     conversation_id: uuid.UUID = Depends(get_current_conversation_id),
 ):
+    """Page through history backward from the newest message.
+
+    Messages are returned oldest first. ``X-Next-Cursor`` (pass as ``before``)
+    continues to older messages and ``X-Prev-Cursor`` (pass as ``after``) to
+    newer ones; each header is omitted when there is nothing in that direction.
+    """
     try:
         if not await is_conversation_participant_service(db, conversation_id, user_id):
             raise HTTPException(status_code=403, detail="Not a participant")
 
-        msgs = await get_messages_service(
-            db=db,
-            conversation_id=conversation_id,
-            limit=limit,
-            offset=offset)
+        if sum(p is not None for p in (before, after, around)) > 1:
+            raise HTTPException(status_code=400, detail="Use only one of before, after and around")
+
+        try:
+            before_key = decode_cursor(before) if before else None
+            after_key = decode_cursor(after) if after else None
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+
+        try:
+            msgs, next_cursor, prev_cursor = await get_messages_service(
+                db=db,
+                conversation_id=conversation_id,
+                limit=limit,
+                before=before_key,
+                after=after_key,
+                around=around)
+        except LookupError:
+            raise HTTPException(status_code=404, detail="Message not found")
 
-        if msgs is None:
-            raise HTTPException(status_code=400, detail="Unable to get messages")
+        if next_cursor:
+            response.headers["X-Next-Cursor"] = next_cursor
+        if prev_cursor:
+            response.headers["X-Prev-Cursor"] = prev_cursor
 
         return msgs
 
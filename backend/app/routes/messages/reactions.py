@@ -5,13 +5,11 @@ from typing import Annotated
 
 from uuid import UUID
 
-from app.db.dependencies import get_db
+from app.db.dependencies import get_db, get_current_user_id
 from app.schemas.messages import MessageRead, MessageReactionUpdate
 from app.services.messages.add_reaction import add_reaction
 from app.services.messages.change_reaction import change_reaction
 from app.services.messages.remove_reaction import remove_reaction
-from app.models.users import User
-from app.services.auth.get_current_user import get_current_user
 from app.websocket.events.message_reaction import handle_reaction
 
 router = APIRouter()
@@ -28,23 +26,20 @@ async def add_message_reaction(
     credentials: Annotated[HTTPAuthorizationCredentials, Depends(security)],
     db: AsyncSession = Depends(get_db),
 ):
-    current_user: User = await get_current_user(
-        token=credentials.credentials,
-        db=db,
-    )
+    user_id = await get_current_user_id(credentials, db)
     
     try:
         message = await add_reaction(
             db=db,
             message_id=message_id,
-            user_id=current_user.id,  
+            user_id=user_id,  
             reaction_type=reaction.reaction_type
         )
         
         await handle_reaction(
             conversation_id=message.conversation_id,
             message_id=message.id,
-            user_id=current_user.id,
+            user_id=user_id,
             reactions=message.reactions,
             event_type="added"
         )
@@ -72,23 +67,20 @@ async def change_message_reaction(
     credentials: Annotated[HTTPAuthorizationCredentials, Depends(security)],
     db: AsyncSession = Depends(get_db),
 ):
-    current_user: User = await get_current_user(
-        token=credentials.credentials,
-        db=db,
-    )
+    user_id = await get_current_user_id(credentials, db)
     
     try:
         message = await change_reaction(
             db=db,
             message_id=message_id,
-            user_id=current_user.id,
+            user_id=user_id,
             new_reaction_type=reaction.reaction_type
         )
         
         await handle_reaction(
             conversation_id=message.conversation_id,
             message_id=message.id,
-            user_id=current_user.id,
+            user_id=user_id,
             reactions=message.reactions,
             event_type="changed"
         )
@@ -119,23 +111,20 @@ async def remove_message_reaction(
     credentials: Annotated[HTTPAuthorizationCredentials, Depends(security)],
     db: AsyncSession = Depends(get_db),
 ):
-    current_user: User = await get_current_user(
-        token=credentials.credentials,
-        db=db,
-    )
+    user_id = await get_current_user_id(credentials, db)
     
     try:
         message = await remove_reaction(
             db=db,
             message_id=message_id,
-            user_id=current_user.id,  
+            user_id=user_id,  
             reaction_type=reaction_type
         )
         
         await handle_reaction(
             conversation_id=message.conversation_id,
             message_id=message.id,
-            user_id=current_user.id,
+            user_id=user_id,
             reactions=message.reactions,
             event_type="removed"
         )
@@ -1,19 +1,16 @@
 from fastapi import APIRouter, Depends, HTTPException
 import uuid
 
-from app.services.conversation_participants.is_participant import is_conversation_participant_service
 from app.websocket.manager import manager
-from app.db.repositories.conversation_participants.get_all_participants import get_participants
 from app.db.dependencies import get_current_user_id, get_current_conversation_id, get_db
 from app.services.messages.send_message import send_message_service
 from app.schemas.messages import MessageRead
 from sqlalchemy.ext.asyncio import AsyncSession
-from app.services.ai.openai_bot import maybe_generate_openai_reply
+from app.services.ai.bot_replies import bot_replies
+from app.services.ai.openai_bot import wants_openai_reply
 from app.db.repositories.conversation_repo import ConversationRepository
 from app.services.conversation_service import ConversationService
 
-from app.services.conversation_participants.get_participant_name import get_participant_name_service
-
 router = APIRouter()
 
 
@@ -25,34 +22,27 @@ async def send_message(
     conversation_id: uuid.UUID = Depends(get_current_conversation_id)
 ):
     try:
-        if not await is_conversation_participant_service(db, conversation_id, user_id):
-            raise HTTPException(status_code=403, detail="Not a participant")
-
-        # Check whether this conversation previously had a last message
-        conv_repo = ConversationRepository(db)
-        conv = await conv_repo.get_conversation_by_id(conversation_id)
-        had_last_message = bool(getattr(conv, 'last_message_created_at', None))
-
-        message = await send_message_service(
+        # Membership check, insert, conversation preview and unread counters in one statement
+        appended = await send_message_service(
             db=db,
             conversation_id=conversation_id,
             user_id=user_id,
             body=body)
 
-        if not message:
-            raise HTTPException(status_code=500, detail="Unable to send message")
+        if not appended:
+            raise HTTPException(status_code=403, detail="Not a participant")
 
-        message.sender_name = await get_participant_name_service(db, message.sender_id)
+        message = appended.message
+        message.sender_name = appended.sender_name
 
-        participants = await get_participants(db, conversation_id)
-        participant_ids = [str(p.user_id) for p in participants]
-        participant_uuids = [p.user_id for p in participants]
+        participant_uuids = appended.participant_ids
+        participant_ids = [str(pid) for pid in participant_uuids]
 
         # If this was the first message in the conversation, notify participants that
         # a conversation has effectively been created/activated so it appears in their list.
-        if not had_last_message:
+        if appended.first_message:
             try:
-                summary = await ConversationService(conv_repo).create_conversation(user_id, participant_uuids)
+                summary = await ConversationService(ConversationRepository(db)).create_conversation(user_id, participant_uuids)
                 await manager.broadcast(
                     participant_ids,
                     {
@@ -78,30 +68,9 @@ async def send_message(
             }
         )
 
-        try:
-            bot_reply = await maybe_generate_openai_reply(
-                db=db,
-                conversation_id=conversation_id,
-                participant_ids=participant_uuids,
-                sender_id=message.sender_id,
-            )
-            if bot_reply:
-                bot_reply.sender_name = await get_participant_name_service(db, bot_reply.sender_id)
-                await manager.broadcast(
-                    participant_ids,
-                    {
-                        "event": "new_message",
-                        "conversation_id": str(conversation_id),
-                        "message": {
-                            "id": str(bot_reply.id),
-                            "body": bot_reply.body,
-                            "sender_id": str(bot_reply.sender_id),
-                            "sender_name": bot_reply.sender_name,
-                        },
-                    }
-                )
-        except Exception as exc:
-            print("OpenAI bot reply failed", exc)
+        # Answered in the background; the sender gets their message back right away
+        if wants_openai_reply(participant_uuids, message.sender_id):
+            bot_replies.submit(conversation_id, participant_ids)
 
         return message
 
@@ -13,7 +13,7 @@ from app.services.conversation_participants.update_last_read import update_last_
 from app.schemas.conversation_participants import ConversationParticipantRead
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.db.repositories.conversation_participants.get_all_participants import get_participants
+from app.services.conversation_participants.membership_cache import membership_cache
 from app.services.conversation_participants.get_participant_name import get_participant_name_service
 from app.websocket.manager import manager
 from app.db.repositories.messages.get_message import get_message
@@ -52,8 +52,7 @@ async def update_last_read(
         message_ids_payload = [str(mid) for mid in updated_message_ids] or [str(message_id)]
 
         participant_name = await get_participant_name_service(db, user_id)
-        participants = await get_participants(db, conversation_id)
-        participant_ids = [str(p.user_id) for p in participants]
+        participant_ids = await membership_cache.get_members(conversation_id, db)
 
         await manager.broadcast(
             participant_ids,
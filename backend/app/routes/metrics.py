@@ -0,0 +1,50 @@
+import secrets
+from typing import Any, Dict, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
+
+from app.core.config import settings
+from app.db.session import pool_metrics
+from app.services.ai.bot_replies import bot_replies
+from app.services.ai.context import conversation_context
+from app.services.ai.openai_client import openai_client
+from app.services.auth.password_hasher import password_hasher
+from app.services.auth.user_cache import auth_users
+from app.services.conversation_participants.membership_cache import membership_cache
+from app.services.conversation_participants.unread_reconciler import unread_reconciler
+from app.services.users.profile_cache import user_profiles
+from app.websocket.delivery_receipts import delivery_receipts
+from app.websocket.events.typing import typing_state
+from app.websocket.manager import manager
+from app.websocket.router import heartbeat
+
+router = APIRouter()
+_bearer = HTTPBearer(auto_error=False)
+
+
+def require_metrics_token(credentials: Optional[HTTPAuthorizationCredentials] = Depends(_bearer)) -> None:
+    if not settings.METRICS_TOKEN:
+        return
+    if credentials is None or not secrets.compare_digest(credentials.credentials, settings.METRICS_TOKEN):
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Not authenticated")
+
+
+@router.get("/metrics", dependencies=[Depends(require_metrics_token)])
+async def get_metrics() -> Dict[str, Any]:
+    """Process-local counters for capacity tuning (one worker's view)."""
+    return {
+        "db_pool": pool_metrics.stats(),
+        "websocket": manager.stats(),
+        "heartbeat": heartbeat.stats(),
+        "typing": typing_state.stats(),
+        "delivery_receipts": delivery_receipts.stats(),
+        "membership_cache": membership_cache.stats(),
+        "user_profiles": user_profiles.stats(),
+        "auth_users": auth_users.stats(),
+        "password_hasher": password_hasher.stats(),
+        "unread_reconciler": unread_reconciler.stats(),
+        "bot_replies": bot_replies.stats(),
+        "openai_client": openai_client.stats(),
+        "bot_context": conversation_context.stats(),
+    }
@@ -5,8 +5,11 @@ from pydantic import BaseModel, HttpUrl
 from typing import Annotated
 
 from app.db.dependencies import get_db
-from app.services.auth import get_current_user
+from app.models.users import User
+from app.services.auth import get_user_id_from_token
+from app.services.auth.user_cache import auth_users
 from app.schemas.auth import UserResponse
+from app.services.users.profile_cache import user_profiles
 
 router = APIRouter()
 
@@ -28,7 +31,10 @@ async def update_avatar(
     db: AsyncSession = Depends(get_db),
 ) -> UserResponse:
     token = credentials.credentials
-    user = await get_current_user(token=token, db=db)
+    # Loaded in this session (not from the auth cache) because it is modified below
+    user = await db.get(User, get_user_id_from_token(token))
+    if user is None:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="User not found")
 
     # Update avatar URL
     user.avatar_url = str(payload.avatar_url)
@@ -37,6 +43,8 @@ async def update_avatar(
         await db.commit()
         # Ensure refreshed attributes are loaded in async session
         await db.refresh(user)
+        user_profiles.invalidate(user.id)
+        auth_users.invalidate(user.id)
     except Exception as e:
         await db.rollback()
         raise HTTPException(status_code=500, detail="Failed to update avatar") from e
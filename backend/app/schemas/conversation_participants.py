@@ -12,6 +12,7 @@ class ConversationParticipantRead(ConversationParticipantBase):
     id: uuid.UUID
     joined_at: Optional[datetime] = None
     last_read_message_id: Optional[uuid.UUID] = None
+    unread_count: int = 0
 
     model_config = {
         "from_attributes": True
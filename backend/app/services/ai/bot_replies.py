@@ -0,0 +1,249 @@
+import asyncio
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from app.core.config import settings
+from app.models.messages import Message
+from app.services.ai.openai_bot import OPENAI_BOT_ID, DeltaCallback, draft_openai_reply, save_openai_reply
+from app.websocket.manager import manager
+
+
+class _Job:
+    __slots__ = ("conversation_id", "participant_ids", "enqueued_at", "committed", "cancelled")
+
+    def __init__(self, conversation_id: uuid.UUID, participant_ids: List[str]) -> None:
+        self.conversation_id = conversation_id
+        self.participant_ids = participant_ids
+        self.enqueued_at = time.monotonic()
+        # Set once users can see the reply (streamed text or being written); from then on it is not cancelled
+        self.committed = False
+        self.cancelled = False
+
+
+class BotReplyQueue:
+    """Generates bot replies in the background, off the send path.
+
+    ``submit`` returns at once; ``workers`` tasks draft and store the replies,
+    each on database sessions of its own. While a reply is drafted its text
+    is broadcast as ``message_delta`` events carrying the id the message
+    will be stored under; the stored message follows as ``new_message``.
+    A conversation has at most one job running and one waiting, so replies
+    within a conversation come out in order. A newer message supersedes the
+    waiting job and cancels the running one while it is still drafting: the
+    bot answers the latest state of the conversation rather than every
+    message. A reply whose text was already streamed is not cancelled, and
+    one that fails after streaming ends with an ``aborted`` delta. At most
+    ``max_pending`` conversations may be waiting.
+    """
+
+    def __init__(
+        self,
+        workers: int = settings.OPENAI_REPLY_WORKERS,
+        max_pending: int = settings.OPENAI_REPLY_MAX_PENDING,
+        draft: Callable[[uuid.UUID, DeltaCallback], Awaitable[Optional[str]]] = draft_openai_reply,
+        save: Callable[[uuid.UUID, str, uuid.UUID], Awaitable[Message]] = save_openai_reply,
+    ) -> None:
+        self.workers = workers
+        self.max_pending = max_pending
+        self._draft = draft
+        self._save = save
+        # conversation_id -> job waiting for a worker, in submission order
+        self._pending: "OrderedDict[uuid.UUID, _Job]" = OrderedDict()
+        self._running: Dict[uuid.UUID, Tuple[_Job, asyncio.Task]] = {}
+        self._ready: Optional[asyncio.Queue] = None
+        self._tasks: List[asyncio.Task] = []
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+        self.submitted = 0
+        self.completed = 0
+        self.empty = 0
+        self.superseded = 0
+        self.cancelled = 0
+        self.dropped = 0
+        self.failed = 0
+        self.peak_queue_depth = 0
+        self.last_job_ms = 0.0
+        self.max_job_ms = 0.0
+        self.max_wait_ms = 0.0
+        self.streamed = 0
+        self.aborted = 0
+        self.last_first_delta_ms = 0.0
+        self.max_first_delta_ms = 0.0
+
+    @property
+    def queue_depth(self) -> int:
+        return len(self._pending)
+
+    def submit(self, conversation_id: uuid.UUID, participant_ids: List[str]) -> bool:
+        """Schedule a reply for the conversation; False if the queue is full."""
+        self._ensure_started()
+        job = _Job(conversation_id, participant_ids)
+        self.submitted += 1
+
+        running = self._running.get(conversation_id)
+        if running is not None and not running[0].committed and not running[0].cancelled:
+            running[0].cancelled = True
+            self.cancelled += 1
+            running[1].cancel()
+
+        if conversation_id in self._pending:
+            self.superseded += 1
+            self._pending[conversation_id] = job
+            return True
+        if len(self._pending) >= self.max_pending:
+            self.dropped += 1
+            return False
+        self._pending[conversation_id] = job
+        self.peak_queue_depth = max(self.peak_queue_depth, len(self._pending))
+        # A busy conversation is picked up again when its running job ends
+        if running is None:
+            self._ready.put_nowait(conversation_id)
+        return True
+
+    def start(self) -> None:
+        self._ensure_started()
+
+    async def stop(self) -> None:
+        """Cancel the workers and running jobs; waiting jobs are dropped."""
+        tasks, self._tasks = self._tasks, []
+        for task in tasks:
+            task.cancel()
+        for task in tasks:
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        self._pending.clear()
+        self._ready = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "workers": self.workers,
+            "queue_depth": self.queue_depth,
+            "running": len(self._running),
+            "peak_queue_depth": self.peak_queue_depth,
+            "submitted": self.submitted,
+            "completed": self.completed,
+            "empty": self.empty,
+            "superseded": self.superseded,
+            "cancelled": self.cancelled,
+            "dropped": self.dropped,
+            "failed": self.failed,
+            "last_job_ms": round(self.last_job_ms, 3),
+            "max_job_ms": round(self.max_job_ms, 3),
+            "max_wait_ms": round(self.max_wait_ms, 3),
+            "streamed": self.streamed,
+            "aborted": self.aborted,
+            "last_first_delta_ms": round(self.last_first_delta_ms, 3),
+            "max_first_delta_ms": round(self.max_first_delta_ms, 3),
+        }
+
+    def _ensure_started(self) -> None:
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        if self._tasks and self._loop is loop:
+            return
+
+        # (Re)bind loop-affine primitives when running under a new event loop.
+        self._loop = loop
+        self._ready = asyncio.Queue()
+        self._running.clear()
+        for conversation_id in self._pending:
+            self._ready.put_nowait(conversation_id)
+        self._tasks = [loop.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def _worker(self) -> None:
+        ready = self._ready
+        while True:
+            conversation_id = await ready.get()
+            job = self._pending.pop(conversation_id, None)
+            if job is None:
+                continue
+            self.max_wait_ms = max(self.max_wait_ms, (time.monotonic() - job.enqueued_at) * 1000)
+            task = asyncio.create_task(self._run(job))
+            self._running[conversation_id] = (job, task)
+            try:
+                await asyncio.wait({task})
+            except asyncio.CancelledError:
+                task.cancel()
+                raise
+            finally:
+                self._running.pop(conversation_id, None)
+                # A newer message arrived meanwhile
+                if conversation_id in self._pending:
+                    ready.put_nowait(conversation_id)
+
+    async def _run(self, job: _Job) -> None:
+        started = time.perf_counter()
+        message_id = uuid.uuid4()
+
+        async def on_delta(text: str) -> None:
+            if not job.committed:
+                job.committed = True
+                self.streamed += 1
+                # Time to first token is what the user waits for
+                first_ms = (time.perf_counter() - started) * 1000
+                self.last_first_delta_ms = first_ms
+                self.max_first_delta_ms = max(self.max_first_delta_ms, first_ms)
+            await self._broadcast_delta(job, message_id, text)
+
+        try:
+            body = await self._draft(job.conversation_id, on_delta)
+            if not body or not body.strip():
+                self.empty += 1
+                await self._abort(job, message_id)
+                return
+            job.committed = True
+            reply = await self._save(job.conversation_id, body, message_id)
+            await manager.broadcast(
+                job.participant_ids,
+                {
+                    "event": "new_message",
+                    "conversation_id": str(job.conversation_id),
+                    "message": {
+                        "id": str(reply.id),
+                        "body": reply.body,
+                        "sender_id": str(reply.sender_id),
+                        "sender_name": getattr(reply, "sender_name", None),
+                    },
+                },
+            )
+            self.completed += 1
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            self.failed += 1
+            print(f"Error generating bot reply: {e}")
+            await self._abort(job, message_id)
+        finally:
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            self.last_job_ms = elapsed_ms
+            self.max_job_ms = max(self.max_job_ms, elapsed_ms)
+
+    async def _broadcast_delta(self, job: _Job, message_id: uuid.UUID, text: str, aborted: bool = False) -> None:
+        event = {
+            "event": "message_delta",
+            "conversation_id": str(job.conversation_id),
+            "message_id": str(message_id),
+            "sender_id": str(OPENAI_BOT_ID),
+            "delta": text,
+        }
+        if aborted:
+            event["aborted"] = True
+        await manager.broadcast(job.participant_ids, event)
+
+    async def _abort(self, job: _Job, message_id: uuid.UUID) -> None:
+        # Clients drop the partial text of a streamed reply that will not be stored
+        if not job.committed:
+            return
+        self.aborted += 1
+        try:
+            await self._broadcast_delta(job, message_id, "", aborted=True)
+        except Exception as e:
+            print(f"Error aborting streamed bot reply: {e}")
+
+bot_replies = BotReplyQueue()
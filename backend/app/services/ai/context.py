@@ -0,0 +1,215 @@
+import asyncio
+import uuid
+from collections import OrderedDict
+from typing import Any, Dict, List, NamedTuple, Optional, Set, Tuple
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.db.repositories.messages.get_messages import Cursor, get_messages
+from app.services.ai.openai_client import openai_client, output_text
+from app.websocket.manager import manager
+
+_INVALIDATE = "botctx_invalidate"
+
+_SUMMARY_INSTRUCTIONS = (
+    "You maintain the memory of a chat assistant. Merge the summary so far with the new "
+    "messages into one short summary in the conversation's language. Keep names, facts, "
+    "decisions and open questions; drop small talk. Reply with the summary only."
+)
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (about four characters per token plus per-message overhead)."""
+    return len(text) // 4 + 4
+
+
+class _Turn(NamedTuple):
+    cursor: Cursor
+    role: str
+    content: str
+
+
+class BotContext(NamedTuple):
+    instructions: Optional[str]
+    input: List[dict]
+    tokens: int
+
+
+class ConversationContext:
+    """Builds the bot's prompt within a token budget, with a rolling summary of older history.
+
+    Only the newest ``max_messages`` are read. From the newest backwards,
+    messages are kept while they fit in ``token_budget``; the older ones are
+    folded into a per-conversation summary that is sent in their place. The
+    summary is updated in the background while the reply is generated, so a
+    prompt never waits on summarization and its size stays bounded however long
+    the conversation gets. Summaries are cached per worker (LRU-bounded)
+    and dropped when a message is edited or deleted, or the conversation is.
+    """
+
+    def __init__(
+        self,
+        max_messages: int = settings.OPENAI_CONTEXT_MAX_MESSAGES,
+        token_budget: int = settings.OPENAI_CONTEXT_TOKEN_BUDGET,
+        summary_max_tokens: int = settings.OPENAI_SUMMARY_MAX_TOKENS,
+        max_conversations: int = settings.OPENAI_SUMMARY_CACHE_MAX_CONVERSATIONS,
+    ) -> None:
+        self.max_messages = max_messages
+        self.token_budget = token_budget
+        self.summary_max_tokens = summary_max_tokens
+        self.max_conversations = max_conversations
+        # conversation_id -> (summary, cursor of the newest message it covers)
+        self._summaries: "OrderedDict[uuid.UUID, Tuple[str, Cursor]]" = OrderedDict()
+        self._refreshing: Set[uuid.UUID] = set()
+        self._tasks: Set[asyncio.Task] = set()
+        # conversation_id -> drops seen while its refresh is in flight
+        self._generations: Dict[uuid.UUID, int] = {}
+        self.builds = 0
+        self.trimmed_messages = 0
+        self.summary_hits = 0
+        self.summary_refreshes = 0
+        self.summary_errors = 0
+        self.last_prompt_tokens = 0
+        self.max_prompt_tokens = 0
+
+    async def build(self, db: AsyncSession, conversation_id: uuid.UUID) -> BotContext:
+        history = await get_messages(db, conversation_id, limit=self.max_messages)
+        turns = [
+            _Turn(
+                (msg.created_at, msg.id),
+                "assistant" if msg.sender_id == settings.OPENAI_BOT_USER_ID else "user",
+                msg.body,
+            )
+            for msg in history
+            if msg.body and not msg.deleted_for_everyone
+        ]
+
+        # Newest first until the budget is spent; the newest message is always sent
+        kept: List[_Turn] = []
+        used = 0
+        for turn in reversed(turns):
+            cost = estimate_tokens(turn.content)
+            if kept and used + cost > self.token_budget:
+                break
+            kept.append(turn)
+            used += cost
+        kept.reverse()
+        older = turns[: len(turns) - len(kept)]
+        self.trimmed_messages += len(older)
+
+        instructions = settings.OPENAI_SYSTEM_PROMPT or None
+        cached = self._summaries.get(conversation_id)
+        if cached is not None:
+            self._summaries.move_to_end(conversation_id)
+            self.summary_hits += 1
+            summary, covered = cached
+            memory = f"Earlier in this conversation: {summary}"
+            instructions = f"{instructions}\n\n{memory}" if instructions else memory
+            used += estimate_tokens(summary)
+            older = [turn for turn in older if turn.cursor > covered]
+        if older:
+            self._refresh_later(conversation_id, cached[0] if cached else None, older)
+
+        self.builds += 1
+        self.last_prompt_tokens = used
+        self.max_prompt_tokens = max(self.max_prompt_tokens, used)
+        return BotContext(
+            instructions,
+            [{"role": turn.role, "content": turn.content} for turn in kept],
+            used,
+        )
+
+    def invalidate(self, conversation_id: uuid.UUID) -> None:
+        self._drop(uuid.UUID(str(conversation_id)))
+        try:
+            asyncio.get_running_loop().create_task(
+                manager.publish_control({"t": _INVALIDATE, "c": str(conversation_id)})
+            )
+        except RuntimeError:
+            pass
+
+    def on_control(self, origin: str, payload: Dict[str, Any]) -> None:
+        if payload.get("t") == _INVALIDATE:
+            self._drop(uuid.UUID(payload["c"]))
+
+    async def stop(self) -> None:
+        tasks = list(self._tasks)
+        for task in tasks:
+            task.cancel()
+        for task in tasks:
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "summaries": len(self._summaries),
+            "builds": self.builds,
+            "trimmed_messages": self.trimmed_messages,
+            "summary_hits": self.summary_hits,
+            "summary_refreshes": self.summary_refreshes,
+            "summary_errors": self.summary_errors,
+            "refreshing": len(self._refreshing),
+            "last_prompt_tokens": self.last_prompt_tokens,
+            "max_prompt_tokens": self.max_prompt_tokens,
+        }
+
+    def _drop(self, conversation_id: uuid.UUID) -> None:
+        if conversation_id in self._refreshing:
+            self._generations[conversation_id] = self._generations.get(conversation_id, 0) + 1
+        self._summaries.pop(conversation_id, None)
+
+    def _refresh_later(self, conversation_id: uuid.UUID, summary: Optional[str], turns: List[_Turn]) -> None:
+        if conversation_id in self._refreshing:
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        self._refreshing.add(conversation_id)
+        task = loop.create_task(self._refresh(conversation_id, summary, turns))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _refresh(self, conversation_id: uuid.UUID, summary: Optional[str], turns: List[_Turn]) -> None:
+        generation = self._generations.get(conversation_id, 0)
+        try:
+            updated = await self._summarize(summary, turns)
+            if updated and generation == self._generations.get(conversation_id, 0):
+                self._summaries[conversation_id] = (updated, turns[-1].cursor)
+                self._summaries.move_to_end(conversation_id)
+                while len(self._summaries) > self.max_conversations:
+                    self._summaries.popitem(last=False)
+                self.summary_refreshes += 1
+        except Exception as e:
+            self.summary_errors += 1
+            print(f"Error summarizing bot context: {e}")
+        finally:
+            self._refreshing.discard(conversation_id)
+            self._generations.pop(conversation_id, None)
+
+    async def _summarize(self, summary: Optional[str], turns: List[_Turn]) -> Optional[str]:
+        lines = "\n".join(f"{turn.role}: {turn.content}" for turn in turns)
+        response = await openai_client.post(
+            "/responses",
+            json={
+                "model": settings.OPENAI_MODEL,
+                "instructions": _SUMMARY_INSTRUCTIONS,
+                "input": [
+                    {
+                        "role": "user",
+                        "content": f"Summary so far:\n{summary or '(none)'}\n\nNew messages:\n{lines}",
+                    }
+                ],
+                "temperature": 0.2,
+                "max_output_tokens": self.summary_max_tokens,
+            },
+        )
+        response.raise_for_status()
+        return output_text(response.json())
+
+
+conversation_context = ConversationContext()
+manager.add_control_handler("botctx", conversation_context.on_control)
@@ -1,9 +1,11 @@
+import time
 import uuid
+from contextlib import aclosing
 from datetime import datetime
-from typing import List, Optional
+from typing import Awaitable, Callable, List, Optional
 
 import httpx
-from sqlalchemy import or_, select, update
+from sqlalchemy import select, update
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.config import settings
@@ -11,11 +13,19 @@ from app.models.conversations import Conversations
 from app.models.friendships import Friendship
 from app.models.messages import Message
 from app.models.users import User
-from app.db.repositories.messages.get_messages import get_messages
+from app.db.repositories.friendships.get_friendship import get_friendship
+from app.db.repositories.conversation_participants.unread_count import increment_unread
+from app.db.session import AsyncSessionLocal
+from app.services.ai.context import BotContext, conversation_context
+from app.services.ai.openai_client import OpenAIUnavailable, openai_client, output_text
+from app.services.users.profile_cache import user_profiles
 
 OPENAI_PROVIDER = "openai"
 OPENAI_BOT_ID = settings.OPENAI_BOT_USER_ID
 
+# Receives each piece of a streamed reply
+DeltaCallback = Callable[[str], Awaitable[None]]
+
 
 async def ensure_openai_bot_user(db: AsyncSession) -> User:
     stmt = select(User).where(User.id == OPENAI_BOT_ID)
@@ -31,6 +41,7 @@ async def ensure_openai_bot_user(db: AsyncSession) -> User:
         if updated:
             await db.commit()
             await db.refresh(bot)
+            user_profiles.invalidate(bot.id)
         return bot
 
     bot = User(
@@ -57,14 +68,7 @@ async def ensure_user_has_openai_friendship(db: AsyncSession, user_id: uuid.UUID
 
     await ensure_openai_bot_user(db)
 
-    stmt = select(Friendship).where(
-        or_(
-            (Friendship.user_a_id == user_id) & (Friendship.user_b_id == OPENAI_BOT_ID),
-            (Friendship.user_a_id == OPENAI_BOT_ID) & (Friendship.user_b_id == user_id),
-        )
-    )
-    res = await db.execute(stmt)
-    if res.scalars().first():
+    if await get_friendship(db, user_id, OPENAI_BOT_ID):
         return
 
     user_a, user_b = (user_id, OPENAI_BOT_ID) if str(user_id) < str(OPENAI_BOT_ID) else (OPENAI_BOT_ID, user_id)
@@ -73,68 +77,61 @@ async def ensure_user_has_openai_friendship(db: AsyncSession, user_id: uuid.UUID
     await db.commit()
 
 
-async def maybe_generate_openai_reply(
-    db: AsyncSession,
-    conversation_id: uuid.UUID,
-    participant_ids: List[uuid.UUID],
-    sender_id: uuid.UUID,
-) -> Optional[Message]:
+def wants_openai_reply(participant_ids: List[uuid.UUID], sender_id: uuid.UUID) -> bool:
+    """Whether a message from ``sender_id`` to these participants should get a bot reply."""
     if not settings.OPENAI_API_KEY:
-        return None
-    if OPENAI_BOT_ID not in participant_ids:
-        return None
-    if sender_id == OPENAI_BOT_ID:
-        return None
-
-    reply = await _call_openai_for_conversation(db, conversation_id)
-    if not reply:
-        return None
+        return False
+    return OPENAI_BOT_ID in participant_ids and sender_id != OPENAI_BOT_ID
 
-    return await _save_bot_message(db, conversation_id, reply)
-
-
-async def _call_openai_for_conversation(db: AsyncSession, conversation_id: uuid.UUID) -> Optional[str]:
-    history = await get_messages(db, conversation_id, limit=30)
-    if len(history) > 25:
-        history = history[-25:]
-
-    messages_payload = []
-    # We’ll put system prompt into `instructions` instead of as a system message
-    instructions = settings.OPENAI_SYSTEM_PROMPT or None
-
-    for msg in history:
-        if msg.deleted_for_everyone:
-            continue
-        if not msg.body:
-            continue
-        role = "assistant" if msg.sender_id == OPENAI_BOT_ID else "user"
-        messages_payload.append(
-            {
-                "role": role,
-                "content": msg.body,
-            }
-        )
 
-    headers = {
-        "Authorization": f"Bearer {settings.OPENAI_API_KEY}",
-        "Content-Type": "application/json",
+async def draft_openai_reply(
+    conversation_id: uuid.UUID,
+    on_delta: Optional[DeltaCallback] = None,
+) -> Optional[str]:
+    """Ask OpenAI for the bot's next message in the conversation.
+
+    The history is read on a session of its own that is returned to the pool
+    before the request goes out, so no connection is held while waiting.
+    With ``on_delta`` (and OPENAI_STREAM_REPLIES) the reply is streamed and
+    its text passed to ``on_delta`` as it arrives, at most once per
+    OPENAI_STREAM_FLUSH_SECONDS after the first piece. Returns the full text.
+    """
+    async with AsyncSessionLocal() as db:
+        context = await conversation_context.build(db, conversation_id)
+    if on_delta is not None and settings.OPENAI_STREAM_REPLIES:
+        return await _stream_openai(context, on_delta)
+    return await _call_openai(context)
+
+
+async def save_openai_reply(
+    conversation_id: uuid.UUID,
+    body: str,
+    message_id: Optional[uuid.UUID] = None,
+) -> Message:
+    async with AsyncSessionLocal() as db:
+        msg = await _save_bot_message(db, conversation_id, body, message_id)
+        msg.sender_name = await user_profiles.get_name(msg.sender_id, db)
+        return msg
+
+
+def _request_body(context: BotContext, stream: bool = False) -> dict:
+    body = {
+        "model": settings.OPENAI_MODEL,
+        "input": context.input,             # ✅ use `input`
+        "instructions": context.instructions,  # ✅ system prompt plus summary of older history
+        "temperature": 0.7,
+        "max_output_tokens": 512,           # ✅ correct field
     }
+    if stream:
+        body["stream"] = True
+    return body
+
 
+async def _call_openai(context: BotContext) -> Optional[str]:
     try:
-        async with httpx.AsyncClient(timeout=30) as client:
-            response = await client.post(
-                "https://api.openai.com/v1/responses",
-                headers=headers,
-                json={
-                    "model": settings.OPENAI_MODEL,
-                    "input": messages_payload,          # ✅ use `input`
-                    "instructions": instructions,       # ✅ system prompt
-                    "temperature": 0.7,
-                    "max_output_tokens": 512,           # ✅ correct field
-                },
-            )
-            response.raise_for_status()
-            data = response.json()
+        response = await openai_client.post("/responses", json=_request_body(context))
+        response.raise_for_status()
+        data = response.json()
     except httpx.HTTPStatusError as exc:
         # 👇 log the body so you can see exact errors in future
         print(
@@ -143,32 +140,69 @@ async def _call_openai_for_conversation(db: AsyncSession, conversation_id: uuid.
             exc.response.text,
         )
         return None
-    except httpx.HTTPError as exc:
+    except (httpx.HTTPError, OpenAIUnavailable) as exc:
         print("OpenAI request failed", exc)
         return None
 
-    outputs = data.get("output") or []
-    if not outputs:
-        return None
+    return output_text(data)
+
 
-    first_output = outputs[0]
-    contents = first_output.get("content") or []
-    fragments = [
-        item.get("text")
-        for item in contents
-        if isinstance(item, dict)
-        and item.get("type") == "output_text"
-        and item.get("text")
-    ]
-    if not fragments:
+async def _stream_openai(context: BotContext, on_delta: DeltaCallback) -> Optional[str]:
+    received: List[str] = []
+    pending: List[str] = []
+    flushed_at = 0.0
+    final: Optional[str] = None
+    completed = False
+    events = openai_client.stream_events("/responses", json=_request_body(context, stream=True))
+    try:
+        # Closing the generator on an early return releases the response at once
+        async with aclosing(events):
+            async for event in events:
+                kind = event.get("type")
+                if kind == "response.output_text.delta":
+                    delta = event.get("delta") or ""
+                    received.append(delta)
+                    pending.append(delta)
+                    # The first piece goes out at once; later ones are batched
+                    now = time.monotonic()
+                    if now - flushed_at >= settings.OPENAI_STREAM_FLUSH_SECONDS:
+                        await on_delta("".join(pending))
+                        pending = []
+                        flushed_at = now
+                elif kind in ("response.completed", "response.incomplete"):
+                    completed = True
+                    final = output_text(event.get("response") or {})
+                elif kind in ("response.failed", "error"):
+                    print("OpenAI stream failed", event)
+                    return None
+    except httpx.HTTPStatusError as exc:
+        print(
+            "OpenAI request failed",
+            exc.response.status_code,
+            exc.response.text,
+        )
+        return None
+    except (httpx.HTTPError, OpenAIUnavailable) as exc:
+        print("OpenAI request failed", exc)
         return None
 
-    return "\n".join(fragments)
+    if not completed:
+        # Ended cleanly but early: what arrived may be cut off, so it is not stored
+        print("OpenAI stream ended before the response completed")
+        return None
+    if pending:
+        await on_delta("".join(pending))
+    return final or "".join(received) or None
 
 
-async def _save_bot_message(db: AsyncSession, conversation_id: uuid.UUID, body: str) -> Message:
+async def _save_bot_message(
+    db: AsyncSession,
+    conversation_id: uuid.UUID,
+    body: str,
+    message_id: Optional[uuid.UUID] = None,
+) -> Message:
     msg = Message(
-        id=uuid.uuid4(),
+        id=message_id or uuid.uuid4(),
         conversation_id=conversation_id,
         sender_id=OPENAI_BOT_ID,
         body=body.strip(),
@@ -191,6 +225,7 @@ async def _save_bot_message(db: AsyncSession, conversation_id: uuid.UUID, body:
         )
     )
     await db.execute(stmt)
+    await increment_unread(db, conversation_id, OPENAI_BOT_ID)
     await db.commit()
     await db.refresh(msg)
     return msg
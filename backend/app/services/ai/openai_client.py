@@ -0,0 +1,280 @@
+import asyncio
+import json as json_module
+import random
+import time
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+import httpx
+
+from app.core.config import settings
+
+try:  # optional, enables HTTP/2 on the pooled client
+    import h2  # noqa: F401
+except ImportError:  # pragma: no cover - depends on the environment
+    h2 = None
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+def output_text(data: Dict[str, Any]) -> Optional[str]:
+    """The text of the first output item of a Responses API response."""
+    outputs = data.get("output") or []
+    if not outputs:
+        return None
+
+    first_output = outputs[0]
+    contents = first_output.get("content") or []
+    fragments = [
+        item.get("text")
+        for item in contents
+        if isinstance(item, dict)
+        and item.get("type") == "output_text"
+        and item.get("text")
+    ]
+    if not fragments:
+        return None
+
+    return "\n".join(fragments)
+
+
+class OpenAIUnavailable(Exception):
+    """The API is failing and the circuit breaker is not letting calls through."""
+
+
+class CircuitBreaker:
+    """Stops calling a failing dependency for a while.
+
+    After ``failure_threshold`` consecutive failed calls the breaker opens
+    and every call is refused for ``reset_timeout`` seconds. Then one trial
+    call is let through (half-open): success closes the breaker, failure
+    opens it for another ``reset_timeout``.
+    """
+
+    def __init__(
+        self,
+        failure_threshold: int = settings.OPENAI_BREAKER_FAILURE_THRESHOLD,
+        reset_timeout: float = settings.OPENAI_BREAKER_RESET_SECONDS,
+    ) -> None:
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self._opened_at: Optional[float] = None
+        self._trial_in_flight = False
+        self.opened = 0
+
+    @property
+    def state(self) -> str:
+        if self._opened_at is None:
+            return "closed"
+        if time.monotonic() - self._opened_at < self.reset_timeout:
+            return "open"
+        return "half_open"
+
+    def allow(self) -> bool:
+        state = self.state
+        if state == "closed":
+            return True
+        if state == "half_open" and not self._trial_in_flight:
+            self._trial_in_flight = True
+            return True
+        return False
+
+    def record_success(self) -> None:
+        self.failures = 0
+        self._opened_at = None
+        self._trial_in_flight = False
+
+    def abandon(self) -> None:
+        """The call ended without an outcome (e.g. cancelled); let another trial through."""
+        self._trial_in_flight = False
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        half_open = self._trial_in_flight
+        self._trial_in_flight = False
+        if half_open or self.failures >= self.failure_threshold:
+            if self._opened_at is None or half_open:
+                self.opened += 1
+            self._opened_at = time.monotonic()
+
+
+class OpenAIClient:
+    """One pooled HTTP client for every call to the OpenAI API in this process.
+
+    Connections are kept alive between bot replies (HTTP/2 when ``h2`` is
+    installed), so a reply no longer pays a TCP and TLS handshake. 429 and
+    5xx responses and transport errors are retried with exponential backoff
+    and jitter, honouring Retry-After. A call that still fails counts
+    against the circuit breaker; while it is open calls raise
+    ``OpenAIUnavailable`` without touching the network.
+    """
+
+    def __init__(
+        self,
+        base_url: str = settings.OPENAI_BASE_URL,
+        timeout: float = settings.OPENAI_TIMEOUT_SECONDS,
+        max_connections: int = settings.OPENAI_MAX_CONNECTIONS,
+        max_keepalive_connections: int = settings.OPENAI_MAX_KEEPALIVE_CONNECTIONS,
+        keepalive_expiry: float = settings.OPENAI_KEEPALIVE_EXPIRY_SECONDS,
+        http2: bool = settings.OPENAI_HTTP2,
+        max_retries: int = settings.OPENAI_MAX_RETRIES,
+        backoff: float = settings.OPENAI_RETRY_BACKOFF_SECONDS,
+        backoff_max: float = settings.OPENAI_RETRY_BACKOFF_MAX_SECONDS,
+        breaker: Optional[CircuitBreaker] = None,
+    ) -> None:
+        self.base_url = base_url
+        self.timeout = timeout
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry,
+        )
+        self.http2 = http2 and h2 is not None
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.backoff_max = backoff_max
+        self.breaker = breaker or CircuitBreaker()
+        self._client: Optional[httpx.AsyncClient] = None
+
+        self.requests = 0
+        self.attempts = 0
+        self.retries = 0
+        self.failures = 0
+        self.short_circuited = 0
+        self.last_request_ms = 0.0
+        self.max_request_ms = 0.0
+
+    def start(self) -> None:
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                base_url=self.base_url,
+                timeout=self.timeout,
+                limits=self.limits,
+                http2=self.http2,
+            )
+
+    async def close(self) -> None:
+        client, self._client = self._client, None
+        if client is not None:
+            await client.aclose()
+
+    async def post(self, path: str, json: Dict[str, Any], api_key: Optional[str] = None) -> httpx.Response:
+        """POST with retries; returns the final response, raising only when no response was usable.
+
+        Raises ``OpenAIUnavailable`` when the breaker is open and
+        ``httpx.HTTPError`` when every attempt failed.
+        """
+        return await self._send(path, json, api_key, stream=False)
+
+    async def stream_events(
+        self, path: str, json: Dict[str, Any], api_key: Optional[str] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """POST and yield the server-sent events of the response as parsed JSON.
+
+        Retries apply until a successful response starts; an error response
+        raises ``httpx.HTTPStatusError``. A stream that breaks halfway raises
+        and counts against the breaker, but is not retried: part of it may
+        already have been shown.
+        """
+        response = await self._send(path, json, api_key, stream=True)
+        try:
+            if response.is_error:
+                await response.aread()
+                response.raise_for_status()
+            data_lines: List[str] = []
+            async for line in response.aiter_lines():
+                if line.startswith("data:"):
+                    data_lines.append(line[5:].lstrip())
+                elif not line and data_lines:
+                    data = "\n".join(data_lines)
+                    data_lines = []
+                    if data == "[DONE]":
+                        break
+                    yield json_module.loads(data)
+        except httpx.TransportError:
+            self.failures += 1
+            self.breaker.record_failure()
+            raise
+        finally:
+            await response.aclose()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "http2": self.http2,
+            "max_connections": self.limits.max_connections,
+            "requests": self.requests,
+            "attempts": self.attempts,
+            "retries": self.retries,
+            "failures": self.failures,
+            "short_circuited": self.short_circuited,
+            "breaker_state": self.breaker.state,
+            "breaker_opened": self.breaker.opened,
+            "last_request_ms": round(self.last_request_ms, 3),
+            "max_request_ms": round(self.max_request_ms, 3),
+        }
+
+    async def _post_with_retries(
+        self, path: str, json: Dict[str, Any], headers: Dict[str, str], stream: bool
+    ) -> httpx.Response:
+        attempt = 0
+        while True:
+            self.attempts += 1
+            request = self._client.build_request("POST", path, json=json, headers=headers)
+            try:
+                response = await self._client.send(request, stream=stream)
+            except httpx.TransportError:
+                if attempt >= self.max_retries:
+                    raise
+                delay = self._delay(attempt, None)
+            else:
+                if response.status_code not in RETRY_STATUSES or attempt >= self.max_retries:
+                    return response
+                delay = self._delay(attempt, response.headers.get("retry-after"))
+                await response.aclose()
+            attempt += 1
+            self.retries += 1
+            await asyncio.sleep(delay)
+
+    async def _send(self, path: str, json: Dict[str, Any], api_key: Optional[str], stream: bool) -> httpx.Response:
+        if not self.breaker.allow():
+            self.short_circuited += 1
+            raise OpenAIUnavailable(f"OpenAI circuit open after {self.breaker.failures} failures")
+        self.start()
+        headers = {"Authorization": f"Bearer {api_key or settings.OPENAI_API_KEY}"}
+
+        self.requests += 1
+        started = time.perf_counter()
+        try:
+            response = await self._post_with_retries(path, json, headers, stream)
+        except httpx.HTTPError:
+            self.failures += 1
+            self.breaker.record_failure()
+            raise
+        except BaseException:
+            self.breaker.abandon()
+            raise
+        finally:
+            # For streams: time until the response started
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            self.last_request_ms = elapsed_ms
+            self.max_request_ms = max(self.max_request_ms, elapsed_ms)
+
+        if response.status_code in RETRY_STATUSES:
+            self.failures += 1
+            self.breaker.record_failure()
+        else:
+            # Other 4xx are our mistake, not an outage
+            self.breaker.record_success()
+        return response
+
+    def _delay(self, attempt: int, retry_after: Optional[str]) -> float:
+        if retry_after is not None:
+            try:
+                return min(self.backoff_max, max(0.0, float(retry_after)))
+            except ValueError:
+                pass
+        # Full jitter so callers that failed together do not retry together
+        return random.uniform(0, min(self.backoff_max, self.backoff * 2 ** attempt))
+
+
+openai_client = OpenAIClient()
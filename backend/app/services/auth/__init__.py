@@ -1,7 +1,7 @@
 from .register import register_user
 from .login import login_user
 from .refresh_token import refresh_access_token
-from .get_current_user import get_current_user
+from .get_current_user import get_current_user, get_user_id_from_token
 from .logout import logout_user
 from .helpers import create_refresh_token
 from .google_auth.authenticate_google_user import authenticate_google_user
@@ -12,6 +12,7 @@ __all__ = [
     "login_user",
     "refresh_access_token",
     "get_current_user",
+    "get_user_id_from_token",
     "logout_user",
     "create_refresh_token",
     "authenticate_google_user",
@@ -1,47 +1,63 @@
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
 from fastapi import HTTPException, status
 import uuid
 
 from app.models.users import User
 from app.core.security import decode_access_token
+from app.services.auth.user_cache import auth_users
+
+
+def get_user_id_from_token(token: str) -> uuid.UUID:
+    """Identify the caller from the signed token claims alone, without a DB lookup"""
 
-async def get_current_user(
-    token: str,
-    db: AsyncSession) -> User:
-    """Retrieve current user from access token"""
-    
     payload = decode_access_token(token)
-    
+
     if payload is None:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid or expired token"
         )
-            
+
     user_id: str = payload.get("id")
-        
+
     if user_id is None:
         raise HTTPException(
-        status_code=status.HTTP_401_UNAUTHORIZED,
-        detail="Invalid token payload"
-    )
-        
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid token payload"
+        )
+
     try:
-        result = await db.execute(
-            select(User).where(User.id == uuid.UUID(user_id))
-            )
-        user = result.scalar_one_or_none()
+        user_uuid = uuid.UUID(user_id)
     except ValueError:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid user ID in token"
         )
-    
+
+    if auth_users.is_revoked(user_uuid, payload.get("iat")):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Token has been revoked"
+        )
+
+    return user_uuid
+
+
+async def get_current_user(
+    token: str,
+    db: AsyncSession) -> User:
+    """Retrieve current user from access token.
+
+    The row comes from a short-lived cache and is detached from ``db``; load
+    it again in the session before changing it.
+    """
+
+    user = await auth_users.get(get_user_id_from_token(token), db)
+
     if user is None:
         raise HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="User not found"
     )
-    
-    return user
\ No newline at end of file
+
+    return user
@@ -11,6 +11,8 @@ from app.core.config import settings
 from app.core.security import create_access_token
 from app.services.ai.openai_bot import ensure_user_has_openai_friendship
 from app.services.auth.helpers import create_refresh_token
+from app.services.auth.user_cache import auth_users
+from app.services.users.profile_cache import user_profiles
 
 async def authenticate_google_user(
     code: str,
@@ -123,6 +125,8 @@ async def _find_or_create_user(
         user.updated_at = datetime.now(timezone.utc)
         await db.commit()
         await db.refresh(user)
+        user_profiles.invalidate(user.id)
+        auth_users.invalidate(user.id)
         await ensure_user_has_openai_friendship(db, user.id)
         return user
     
@@ -145,6 +149,9 @@ async def _find_or_create_user(
         existing_user.updated_at = datetime.now(timezone.utc)
         await db.commit()
         await db.refresh(existing_user)
+        user_profiles.invalidate(existing_user.id)
+        # The account now signs in through Google; tokens issued before that are rejected
+        auth_users.revoke(existing_user.id)
         await ensure_user_has_openai_friendship(db, existing_user.id)
         return existing_user
     
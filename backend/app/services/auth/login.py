@@ -3,8 +3,9 @@ from sqlalchemy import select
 from fastapi import HTTPException, status
 
 from app.models.users import User
-from app.core.security import verify_password, create_access_token
+from app.core.security import create_access_token
 from .helpers import create_refresh_token
+from .password_hasher import password_hasher
 from app.services.ai.openai_bot import ensure_user_has_openai_friendship
 
 async def login_user(
@@ -31,12 +32,17 @@ async def login_user(
                 detail=f"This account uses {user.provider} authentication. Please sign in with {user.provider}."
             )
         
-        if not verify_password(password, user.hashed_password):
+        verified, new_hash = await password_hasher.verify_and_update(password, user.hashed_password)
+        if not verified:
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="Invalid email or password"
             )
         
+        if new_hash is not None:
+            # Stored with an outdated cost factor; committed with the refresh token below
+            user.hashed_password = new_hash
+        
         access_token = create_access_token(data={"id": str(user.id), "email": user.email})
         
         refresh_token = await create_refresh_token(user.id, db)
@@ -5,6 +5,7 @@ from fastapi import HTTPException, status
 
 from app.models.refresh_tokens import RefreshToken
 from app.core.security import hash_refresh_token
+from app.services.auth.user_cache import auth_users
 
 async def logout_user(
     refresh_token: str,
@@ -24,4 +25,6 @@ async def logout_user(
         )
     
     stored_token.revoked_at = datetime.now(timezone.utc)
-    await db.commit()
\ No newline at end of file
+    await db.commit()
+    # Access tokens stay valid until they expire unless they are revoked as well
+    auth_users.revoke(stored_token.user_id)
\ No newline at end of file
@@ -6,9 +6,10 @@ from fastapi import HTTPException, status
 import uuid
 
 from app.models.users import User
-from app.core.security import hash_password, create_access_token
+from app.core.security import create_access_token
 from app.services.ai.openai_bot import ensure_user_has_openai_friendship
 from .helpers import create_refresh_token
+from .password_hasher import password_hasher
 
 async def register_user(
         email: str,
@@ -29,7 +30,7 @@ async def register_user(
                 detail="Email already registered."
             )
         
-        hashed_pw = hash_password(password)
+        hashed_pw = await password_hasher.hash(password)
         
         new_user = User(
             id=uuid.uuid4(),
@@ -0,0 +1,124 @@
+import asyncio
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.models.users import User
+from app.websocket.manager import manager
+
+_INVALIDATE = "authuser_invalidate"
+_REVOKE = "authuser_revoke"
+
+
+class AuthUserCache:
+    """Short-lived cache of the user rows behind access tokens, plus revocations.
+
+    Routes that need the full row get a detached snapshot that lives for
+    ``ttl`` seconds; code that changes a user calls ``invalidate``. ``revoke``
+    rejects every access token of a user issued up to now, which also covers
+    the stateless fast path that never loads the row. Both are published to
+    other workers over the WebSocket backplane. Revocations are kept only as
+    long as a token issued before them could still be valid.
+    """
+
+    def __init__(
+        self,
+        ttl: float = settings.AUTH_USER_CACHE_TTL_SECONDS,
+        max_users: int = settings.AUTH_USER_CACHE_MAX_USERS,
+        token_lifetime: float = settings.JWT_TOKEN_AVAILABILITY_MIN * 60,
+    ) -> None:
+        self.ttl = ttl
+        self.max_users = max_users
+        self.token_lifetime = token_lifetime
+        # user_id -> (monotonic expiry, detached User)
+        self._entries: "OrderedDict[uuid.UUID, Tuple[float, User]]" = OrderedDict()
+        # user_id -> unix time; tokens with an earlier iat are rejected
+        self._revoked: Dict[uuid.UUID, float] = {}
+        self._generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self.revocations = 0
+
+    async def get(self, user_id: uuid.UUID, db: AsyncSession) -> Optional[User]:
+        entry = self._entries.get(user_id)
+        if entry is not None and entry[0] > time.monotonic():
+            self._entries.move_to_end(user_id)
+            self.hits += 1
+            return entry[1]
+
+        self.misses += 1
+        generation = self._generation
+        user = (await db.execute(select(User).where(User.id == user_id))).scalar_one_or_none()
+        if user is None:
+            return None
+        # Shared between requests, so it must not stay bound to this one's session
+        db.expunge(user)
+        if generation == self._generation:
+            self._entries[user_id] = (time.monotonic() + self.ttl, user)
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self.max_users:
+                self._entries.popitem(last=False)
+        return user
+
+    def is_revoked(self, user_id: uuid.UUID, issued_at: Optional[float]) -> bool:
+        revoked_at = self._revoked.get(user_id)
+        if revoked_at is None:
+            return False
+        return issued_at is None or issued_at < revoked_at
+
+    def invalidate(self, user_id: uuid.UUID) -> None:
+        self._drop(uuid.UUID(str(user_id)))
+        self._publish({"t": _INVALIDATE, "u": str(user_id)})
+
+    def revoke(self, user_id: uuid.UUID) -> None:
+        """Reject every access token of ``user_id`` issued so far."""
+        revoked_at = time.time()
+        self._revoke(uuid.UUID(str(user_id)), revoked_at)
+        self._publish({"t": _REVOKE, "u": str(user_id), "at": revoked_at})
+
+    def on_control(self, origin: str, payload: Dict[str, Any]) -> None:
+        kind = payload.get("t")
+        if kind == _INVALIDATE:
+            self._drop(uuid.UUID(payload["u"]))
+        elif kind == _REVOKE:
+            self._revoke(uuid.UUID(payload["u"]), float(payload["at"]))
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "users": len(self._entries),
+            "revoked_users": len(self._revoked),
+            "hits": self.hits,
+            "misses": self.misses,
+            "invalidations": self.invalidations,
+            "revocations": self.revocations,
+        }
+
+    def _drop(self, user_id: uuid.UUID) -> None:
+        self._generation += 1
+        self.invalidations += 1
+        self._entries.pop(user_id, None)
+
+    def _revoke(self, user_id: uuid.UUID, revoked_at: float) -> None:
+        self.revocations += 1
+        self._revoked[user_id] = max(revoked_at, self._revoked.get(user_id, 0.0))
+        self._drop(user_id)
+        # Tokens issued before the horizon have expired anyway
+        horizon = time.time() - self.token_lifetime
+        self._revoked = {uid: at for uid, at in self._revoked.items() if at > horizon}
+
+    @staticmethod
+    def _publish(payload: Dict[str, Any]) -> None:
+        try:
+            asyncio.get_running_loop().create_task(manager.publish_control(payload))
+        except RuntimeError:
+            pass
+
+
+auth_users = AuthUserCache()
+manager.add_control_handler("authuser", auth_users.on_control)
@@ -1,7 +1,7 @@
-from app.db.repositories.conversation_participants.get_participant_name import get_participant_name
+from app.services.users.profile_cache import user_profiles
 
 async def get_participant_name_service(db, user_id) -> str:
     try:
-        return await get_participant_name(db, user_id)
+        return await user_profiles.get_name(user_id, db)
     except Exception:
-        return ""
\ No newline at end of file
+        return ""
@@ -1,9 +1,8 @@
-from app.db.repositories.conversation_participants.get_participant import get_participant
+from app.services.conversation_participants.membership_cache import membership_cache
 
 
 async def is_conversation_participant_service(db, conversation_id, user_id) -> bool:
     try:
-        await get_participant(db, conversation_id, user_id)
-        return True
+        return await membership_cache.is_member(conversation_id, user_id, db)
     except Exception:
-        return False
\ No newline at end of file
+        return False
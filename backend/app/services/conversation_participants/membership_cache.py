@@ -0,0 +1,167 @@
+import asyncio
+import uuid
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Optional
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.db.repositories.conversation_participants.get_participant_ids import get_participant_ids
+from app.db.repositories.conversation_participants.get_participant_ids_many import get_participant_ids_many
+from app.db.repositories.conversation_participants.get_user_conversation_ids import get_user_conversation_ids
+from app.db.session import AsyncSessionLocal
+from app.websocket.manager import manager
+
+_INVALIDATE = "membership_invalidate"
+
+
+class MembershipCache:
+    """In-memory index of who is in which conversation.
+
+    Two LRU-bounded maps are kept: conversation -> member user ids and
+    user -> conversation ids. Misses are loaded from the database and cached;
+    every code path that changes membership calls ``invalidate`` so entries
+    never go stale. Invalidations are also published over the WebSocket
+    backplane so other workers drop their copies.
+    """
+
+    def __init__(
+        self,
+        max_conversations: int = settings.MEMBERSHIP_CACHE_MAX_CONVERSATIONS,
+        max_users: int = settings.MEMBERSHIP_CACHE_MAX_USERS,
+    ) -> None:
+        self.max_conversations = max_conversations
+        self.max_users = max_users
+        self._members: "OrderedDict[uuid.UUID, tuple]" = OrderedDict()
+        self._conversations: "OrderedDict[uuid.UUID, tuple]" = OrderedDict()
+        # Bumped on every invalidation; a load that raced one is not cached
+        self._generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    async def get_members(self, conversation_id: uuid.UUID, db: Optional[AsyncSession] = None) -> List[str]:
+        """Return the user ids (as strings) participating in ``conversation_id``."""
+        members = self._lookup(self._members, conversation_id)
+        if members is None:
+            generation = self._generation
+            ids = await self._load(get_participant_ids, conversation_id, db)
+            members = tuple(str(uid) for uid in ids)
+            if generation == self._generation:
+                self._store(self._members, conversation_id, members, self.max_conversations)
+        return list(members)
+
+    async def get_members_many(
+        self,
+        conversation_ids: Iterable[uuid.UUID],
+        db: Optional[AsyncSession] = None,
+    ) -> Dict[uuid.UUID, List[str]]:
+        """Like ``get_members`` for several conversations; all misses load in one query."""
+        found: Dict[uuid.UUID, tuple] = {}
+        missing: List[uuid.UUID] = []
+        for conversation_id in conversation_ids:
+            members = self._lookup(self._members, conversation_id)
+            if members is None:
+                missing.append(conversation_id)
+            else:
+                found[conversation_id] = members
+        if missing:
+            generation = self._generation
+            loaded = await self._load(get_participant_ids_many, missing, db)
+            for conversation_id, ids in loaded.items():
+                found[conversation_id] = tuple(str(uid) for uid in ids)
+                if generation == self._generation:
+                    self._store(self._members, conversation_id, found[conversation_id], self.max_conversations)
+        return {conversation_id: list(members) for conversation_id, members in found.items()}
+
+    async def get_user_conversations(self, user_id: uuid.UUID, db: Optional[AsyncSession] = None) -> List[uuid.UUID]:
+        """Return the ids of the conversations ``user_id`` participates in."""
+        conversations = self._lookup(self._conversations, user_id)
+        if conversations is None:
+            generation = self._generation
+            conversations = tuple(await self._load(get_user_conversation_ids, user_id, db))
+            if generation == self._generation:
+                self._store(self._conversations, user_id, conversations, self.max_users)
+        return list(conversations)
+
+    async def is_member(self, conversation_id: uuid.UUID, user_id: uuid.UUID, db: Optional[AsyncSession] = None) -> bool:
+        return str(user_id) in await self.get_members(conversation_id, db)
+
+    def invalidate(
+        self,
+        conversation_id: Optional[uuid.UUID] = None,
+        user_ids: Iterable[uuid.UUID] = (),
+    ) -> None:
+        """Forget a conversation's members and the conversation lists of ``user_ids``.
+
+        Pass every user whose membership changed: on creation the new members,
+        on deletion the former ones.
+        """
+        user_ids = [uuid.UUID(str(uid)) for uid in user_ids]
+        self._drop(conversation_id, user_ids)
+        payload = {
+            "t": _INVALIDATE,
+            "c": str(conversation_id) if conversation_id else None,
+            "u": [str(uid) for uid in user_ids],
+        }
+        try:
+            asyncio.get_running_loop().create_task(manager.publish_control(payload))
+        except RuntimeError:
+            pass
+
+    def clear(self) -> None:
+        self._generation += 1
+        self._members.clear()
+        self._conversations.clear()
+
+    def on_control(self, origin: str, payload: Dict[str, Any]) -> None:
+        if payload.get("t") != _INVALIDATE:
+            return
+        conversation_id = uuid.UUID(payload["c"]) if payload.get("c") else None
+        self._drop(conversation_id, [uuid.UUID(uid) for uid in payload.get("u") or ()])
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "conversations": len(self._members),
+            "users": len(self._conversations),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+            "invalidations": self.invalidations,
+        }
+
+    def _drop(self, conversation_id: Optional[uuid.UUID], user_ids: List[uuid.UUID]) -> None:
+        self._generation += 1
+        self.invalidations += 1
+        if conversation_id is not None:
+            self._members.pop(conversation_id, None)
+        for uid in user_ids:
+            self._conversations.pop(uid, None)
+
+    def _lookup(self, cache: OrderedDict, key: uuid.UUID) -> Optional[tuple]:
+        value = cache.get(key)
+        if value is None:
+            self.misses += 1
+            return None
+        cache.move_to_end(key)
+        self.hits += 1
+        return value
+
+    @staticmethod
+    def _store(cache: OrderedDict, key: uuid.UUID, value: tuple, limit: int) -> None:
+        cache[key] = value
+        cache.move_to_end(key)
+        while len(cache) > limit:
+            cache.popitem(last=False)
+
+    @staticmethod
+    async def _load(query, key: Any, db: Optional[AsyncSession]) -> Any:
+        if db is not None:
+            return await query(db, key)
+        async with AsyncSessionLocal() as session:
+            return await query(session, key)
+
+
+membership_cache = MembershipCache()
+manager.add_control_handler("membership", membership_cache.on_control)
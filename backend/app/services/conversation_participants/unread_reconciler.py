@@ -0,0 +1,69 @@
+import asyncio
+from typing import Any, Dict
+
+from sqlalchemy import func, select
+
+from app.core.config import settings
+from app.db.repositories.conversation_participants.unread_count import reconcile_unread_counts
+from app.db.session import AsyncSessionLocal
+
+# pg advisory lock key so only one worker reconciles at a time
+_LOCK_KEY = 0x756E7264  # "unrd"
+
+
+async def reconcile_unread_counts_service() -> int:
+    """Repair drifted unread counters; returns -1 if another worker holds the lock."""
+    async with AsyncSessionLocal() as db:
+        locked = (await db.execute(select(func.pg_try_advisory_xact_lock(_LOCK_KEY)))).scalar()
+        if not locked:
+            await db.rollback()
+            return -1
+        return await reconcile_unread_counts(db)
+
+
+class UnreadReconciler:
+    """Periodically run ``reconcile_unread_counts_service`` in the background.
+
+    The counters are kept exact on every write; this only catches drift from
+    writes that bypass the service layer (scripts, manual fixes, crashes
+    between statements).
+    """
+
+    def __init__(self, interval: float = settings.UNREAD_RECONCILE_INTERVAL_SECONDS) -> None:
+        self.interval = interval
+        self._task: asyncio.Task | None = None
+        self.runs = 0
+        self.repaired_total = 0
+        self.errors = 0
+
+    def start(self) -> None:
+        if self.interval > 0 and self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        task, self._task = self._task, None
+        if task is not None:
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+
+    def stats(self) -> Dict[str, Any]:
+        return {"runs": self.runs, "repaired_total": self.repaired_total, "errors": self.errors}
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                repaired = await reconcile_unread_counts_service()
+                self.runs += 1
+                if repaired > 0:
+                    self.repaired_total += repaired
+                    print(f"Repaired {repaired} unread counters")
+            except Exception as e:
+                self.errors += 1
+                print(f"Error reconciling unread counters: {e}")
+
+
+unread_reconciler = UnreadReconciler()
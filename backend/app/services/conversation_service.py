@@ -1,6 +1,8 @@
 from uuid import UUID
 
 from app.db.repositories.conversation_repo import ConversationRepository
+from app.services.ai.context import conversation_context
+from app.services.conversation_participants.membership_cache import membership_cache
 from app.websocket.manager import manager
 
 
@@ -8,18 +10,14 @@ class ConversationService:
     def __init__(self, repo: ConversationRepository):
         self.repo = repo
 
-    async def _build_conversation_summary(self, conv, current_user_id: UUID):
-        # Determine unread count
-        last_read_id = await self.repo.get_last_read_message_id(conv.id, current_user_id)
-        unread_count = await self.repo.count_unread_messages(conv.id, current_user_id, last_read_id)
-
+    @staticmethod
+    def _summary_from_row(conv, unread_count: int, participants, current_user_id: UUID):
         # Participant IDs and names
-        part_ids = await self.repo.get_participant_ids(conv.id)
-        participantIds = [str(pid) for pid in part_ids]
-        participantNames = []
-        for pid in part_ids:
-            u = await self.repo.get_user(pid)
-            participantNames.append(u.display_name if u and getattr(u, "display_name", None) else "Unknown")
+        participantIds = [str(pid) for pid, _ in participants]
+        participantNames = [
+            u.display_name if u and getattr(u, "display_name", None) else "Unknown"
+            for _, u in participants
+        ]
 
         friendId = None
         friendName = None
@@ -29,18 +27,16 @@ class ConversationService:
         friendLastSeen = None
 
         if conv.type == "direct":
-            other_id = await self.repo.get_other_participant(conv.id, current_user_id)
+            other_id, other = next(((pid, u) for pid, u in participants if pid != current_user_id), (None, None))
             if other_id:
-                other = await self.repo.get_user(other_id)
                 friendId = str(other_id)
                 friendName = other.display_name if other and getattr(other, "display_name", None) else "Unknown"
                 friendAvatar = other.avatar_url if other and getattr(other, "avatar_url", None) else None
                 friendProvider = getattr(other, "provider", None)
-                friendIsOnline = manager.is_online(str(other_id))
                 friendLastSeen = getattr(other, "last_seen", None)
         else:
             # Group: title or joined names excluding current user
-            names_excl_me = [name for pid, name in zip(part_ids, participantNames) if str(pid) != str(current_user_id)]
+            names_excl_me = [name for (pid, _), name in zip(participants, participantNames) if pid != current_user_id]
             friendName = ", ".join(names_excl_me) if names_excl_me else ", ".join(participantNames)
 
         return {
@@ -58,12 +54,26 @@ class ConversationService:
             "participantNames": participantNames,
         }
 
+    async def _build_summaries(self, current_user_id: UUID, conversation_id: UUID | None = None):
+        rows = await self.repo.get_conversation_summaries(current_user_id, conversation_id)
+        summaries = [self._summary_from_row(conv, unread, parts, current_user_id) for conv, unread, parts in rows]
+
+        # One cluster-wide presence lookup for every direct-chat friend
+        online = manager.are_online(s["friendId"] for s in summaries if s["friendId"])
+        for summary in summaries:
+            summary["friendIsOnline"] = summary["friendId"] in online
+        return summaries
+
+    async def _build_conversation_summary(self, conv, current_user_id: UUID):
+        summaries = await self._build_summaries(current_user_id, conv.id)
+        return summaries[0] if summaries else None
+
     async def list_conversations(self, current_user_id: UUID):
-        conversations = await self.repo.get_conversations_for_user(current_user_id)
-        return [await self._build_conversation_summary(conv, current_user_id) for conv in conversations]
+        return await self._build_summaries(current_user_id)
 
     async def create_conversation(self, current_user_id: UUID, participant_ids: list[UUID]):
-        participants = list(participant_ids) if participant_ids is not None else []
+        # Distinct ids: a user is in a conversation at most once
+        participants = list(dict.fromkeys(participant_ids or []))
         if current_user_id not in participants:
             participants.append(current_user_id)
 
@@ -73,18 +83,18 @@ class ConversationService:
 
         conversation_type = "direct" if len(participants) == 2 else "group"
 
-        if conversation_type == "direct":
-            other = others[0]
-            user_a, user_b = sorted([current_user_id, other], key=lambda x: str(x))
-            existing = await self.repo.find_direct_conversation_by_participants(user_a, user_b)
-            conversation = existing or await self.repo.create_conversation(conversation_type, participants)
-        else:
-            existing_group = await self.repo.find_conversation_by_participant_set(participants)
-            conversation = existing_group or await self.repo.create_conversation(conversation_type, participants)
+        # One indexed lookup on the participant-set key, safe under concurrent creates
+        conversation, created = await self.repo.find_or_create_conversation(conversation_type, participants)
+        if created:
+            membership_cache.invalidate(conversation.id, participants)
 
         return await self._build_conversation_summary(conversation, current_user_id)
 
     async def update_group_conversation(self, conversation_id: UUID, current_user_id: UUID, title: str):
+        # Summaries are built from the caller's membership, like delete below
+        if not await membership_cache.is_member(conversation_id, current_user_id, self.repo.db):
+            raise PermissionError("User is not a participant of the conversation")
+
         # Update the conversation title and return updated summary
         updated = await self.repo.update_conversation_title(conversation_id, title)
         if not updated:
@@ -101,3 +111,5 @@ class ConversationService:
             raise PermissionError("User is not a participant of the conversation")
 
         await self.repo.delete_conversation(conversation_id)
+        membership_cache.invalidate(conversation_id, part_ids)
+        conversation_context.invalidate(conversation_id)
@@ -1,7 +1,7 @@
 from typing import Optional
 from uuid import UUID
 
-from sqlalchemy import select, or_
+from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 from fastapi import HTTPException
 
@@ -10,6 +10,9 @@ from typing import List
 from sqlalchemy import delete
 from sqlalchemy.orm import selectinload
 
+from app.db.repositories.friend_requests import friend_requests_between, friend_requests_for_user
+from app.db.repositories.friendships.get_friendship import friendship_between, get_friendship
+from app.db.repositories.friendships.list_friends import list_friends_repo
 from app.models.users import User
 from app.models.friend_requests import FriendRequest
 from app.models.friendships import Friendship
@@ -23,22 +26,10 @@ class FriendRequestService:
         return res.scalars().first()
 
     async def _existing_friendship(db: AsyncSession, a: UUID, b: UUID) -> Optional[Friendship]:
-        stmt = select(Friendship).where(
-            or_(
-                (Friendship.user_a_id == a) & (Friendship.user_b_id == b),
-                (Friendship.user_a_id == b) & (Friendship.user_b_id == a),
-            )
-        )
-        res = await db.execute(stmt)
-        return res.scalars().first()
+        return await get_friendship(db, a, b)
 
     async def _existing_friend_request(db: AsyncSession, a: UUID, b: UUID) -> Optional[FriendRequest]:
-        stmt = select(FriendRequest).where(
-            or_(
-                (FriendRequest.from_user_id == a) & (FriendRequest.to_user_id == b),
-                (FriendRequest.from_user_id == b) & (FriendRequest.to_user_id == a),
-            )
-        )
+        stmt = select(friend_requests_between(a, b)).limit(1)
         res = await db.execute(stmt)
         return res.scalars().first()
 
@@ -70,18 +61,20 @@ class FriendRequestService:
         return fr
 
     async def list_requests(db: AsyncSession, user_id: UUID, direction: Optional[str] = None) -> List[FriendRequest]:
-        stmt = select(FriendRequest).options(
-            selectinload(FriendRequest.from_user),
-            selectinload(FriendRequest.to_user),
-        )
         if direction == "in":
-            stmt = stmt.where(FriendRequest.to_user_id == user_id)
+            requests = FriendRequest
+            stmt = select(FriendRequest).where(FriendRequest.to_user_id == user_id)
         elif direction == "out":
-            stmt = stmt.where(FriendRequest.from_user_id == user_id)
+            requests = FriendRequest
+            stmt = select(FriendRequest).where(FriendRequest.from_user_id == user_id)
         else:
-            stmt = stmt.where(or_(FriendRequest.to_user_id == user_id, FriendRequest.from_user_id == user_id))
+            requests = friend_requests_for_user(user_id)
+            stmt = select(requests)
 
-        stmt = stmt.order_by(FriendRequest.created_at.desc())
+        stmt = stmt.options(
+            selectinload(requests.from_user),
+            selectinload(requests.to_user),
+        ).order_by(requests.created_at.desc())
         res = await db.execute(stmt)
         return res.scalars().all()
 
@@ -102,30 +95,13 @@ class FriendRequestService:
         await db.commit()
 
     async def list_friends(db: AsyncSession, user_id: UUID) -> List[User]:
-        # find friendships where user is user_a or user_b and return the other user's info
-        stmt = select(Friendship).where(or_(Friendship.user_a_id == user_id, Friendship.user_b_id == user_id))
-        res = await db.execute(stmt)
-        frs = res.scalars().all()
-        other_ids = []
-        for f in frs:
-            other_ids.append(f.user_b_id if f.user_a_id == user_id else f.user_a_id)
-
-        if not other_ids:
-            return []
-
-        # load users
-        stmt2 = select(User).where(User.id.in_(other_ids))
-        res2 = await db.execute(stmt2)
-        return res2.scalars().all()
+        # users on the other side of the user's friendships
+        return await list_friends_repo(db, user_id)
 
     async def remove_friend(db: AsyncSession, user_id: UUID, friend_id: UUID) -> None:
         # delete friendship in either direction
-        stmt = delete(Friendship).where(
-            or_(
-                (Friendship.user_a_id == user_id) & (Friendship.user_b_id == friend_id),
-                (Friendship.user_a_id == friend_id) & (Friendship.user_b_id == user_id),
-            )
-        )
+        pair = friendship_between(user_id, friend_id)
+        stmt = delete(Friendship).where(Friendship.id.in_(select(pair.id)))
         await db.execute(stmt)
         await db.commit()
 
@@ -1,7 +1,8 @@
 import uuid
 from app.db.repositories.messages.delete_message import delete_message
-from app.services.messages.get_messages import get_messages_service
+from app.db.repositories.messages.get_message import get_message
 from app.models.message_deletions import MessageDeletion
+from app.services.ai.context import conversation_context
 
 
 async def delete_message_service(
@@ -11,16 +12,17 @@ async def delete_message_service(
     user_id: uuid.UUID
 ) -> MessageDeletion | None:
     try:
-        msgs = await get_messages_service(db, conversation_id)
-        msg = next((m for m in msgs if m.id == message_id), None)
+        msg = await get_message(db, message_id)
 
-        if msg is None:
+        if msg is None or msg.conversation_id != conversation_id:
             raise ValueError("Message not found")
 
         if msg.sender_id != user_id:
             raise PermissionError("Cannot delete message sent by another user")
 
         deletion = await delete_message(db, message_id, user_id)
+        # The bot's summary may quote the deleted message
+        conversation_context.invalidate(conversation_id)
         return deletion
 
     except Exception:
@@ -1,7 +1,8 @@
 import uuid
 from app.db.repositories.messages.edit_message import edit_message
-from app.services.messages.get_messages import get_messages_service
+from app.db.repositories.messages.get_message import get_message
 from app.models.messages import Message
+from app.services.ai.context import conversation_context
 
 
 async def edit_message_service(
@@ -12,16 +13,16 @@ async def edit_message_service(
     new_body: str
 ) -> Message | None:
     try:
-        msgs = await get_messages_service(db, conversation_id)
-        msg = next((m for m in msgs if m.id == message_id), None)
+        msg = await get_message(db, message_id)
 
-        if msg is None:
+        if msg is None or msg.conversation_id != conversation_id:
             raise ValueError("Message not found")
 
         if msg.sender_id != user_id:
             raise PermissionError("Cannot edit message sent by another user")
 
         updated = await edit_message(db, message_id, new_body)
+        conversation_context.invalidate(conversation_id)
         return updated
 
     except Exception:
@@ -1,18 +1,73 @@
+import base64
 import uuid
-from typing import Sequence
+from datetime import datetime
+from typing import List, Optional, Sequence, Tuple
 
 from app.models.messages import Message
-from app.db.repositories.messages.get_messages import get_messages
-from app.services.conversation_participants.get_participant_name import get_participant_name_service
+from app.db.repositories.messages.get_message import get_message
+from app.db.repositories.messages.get_messages import Cursor, get_messages
+from app.services.users.profile_cache import user_profiles
 
+# (messages oldest first, cursor to older messages, cursor to newer messages)
+MessagePage = Tuple[Sequence[Message], Optional[str], Optional[str]]
 
-async def get_messages_service(db, conversation_id: uuid.UUID, limit: int = 50, offset: int = 0) -> Sequence[Message] | None:
+
+def encode_cursor(message: Message) -> str:
+    raw = f"{message.created_at.isoformat()}|{message.id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(token: str) -> Cursor:
+    """Parse a token produced by ``encode_cursor``; raises ValueError if malformed."""
     try:
-        msgs = await get_messages(db, conversation_id, limit, offset)
-        for m in msgs:
-            m.sender_name = await get_participant_name_service(db, m.sender_id)
+        raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4)).decode()
+        created_at, message_id = raw.split("|")
+        return datetime.fromisoformat(created_at), uuid.UUID(message_id)
+    except Exception as e:
+        raise ValueError("Invalid cursor") from e
+
+
+async def get_messages_service(
+    db,
+    conversation_id: uuid.UUID,
+    limit: int = 50,
+    before: Optional[Cursor] = None,
+    after: Optional[Cursor] = None,
+    around: Optional[uuid.UUID] = None,
+) -> MessagePage:
+    """Fetch one page of history plus the cursors to continue in either direction.
+
+    Each query asks for one extra row to learn whether more messages exist
+    beyond the page without counting them.
+    """
+    older_cursor = newer_cursor = None
+
+    if around is not None:
+        anchor = await get_message(db, around)
+        if anchor is None or anchor.conversation_id != conversation_id:
+            raise LookupError("Message not found")
+        key = (anchor.created_at, anchor.id)
+        half = (limit - 1) // 2
+        older = await get_messages(db, conversation_id, half + 1, before=key)
+        newer = await get_messages(db, conversation_id, limit - half, after=key)
+        has_older, has_newer = len(older) > half, len(newer) > limit - half - 1
+        msgs: List[Message] = list(older[1:] if has_older else older) + [anchor] + list(newer[:limit - half - 1])
+    elif after is not None:
+        rows = await get_messages(db, conversation_id, limit + 1, after=after)
+        has_older, has_newer = True, len(rows) > limit
+        msgs = list(rows[:limit])
+    else:
+        rows = await get_messages(db, conversation_id, limit + 1, before=before)
+        has_older, has_newer = len(rows) > limit, before is not None
+        msgs = list(rows[1:] if has_older else rows)
+
+    if msgs:
+        older_cursor = encode_cursor(msgs[0]) if has_older else None
+        newer_cursor = encode_cursor(msgs[-1]) if has_newer else None
 
-        return msgs
+    # One batched lookup for every sender on the page
+    names = await user_profiles.get_names({m.sender_id for m in msgs}, db)
+    for m in msgs:
+        m.sender_name = names.get(m.sender_id, "")
 
-    except Exception:
-        return None
\ No newline at end of file
+    return msgs, older_cursor, newer_cursor
@@ -0,0 +1,115 @@
+import asyncio
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.db.repositories.users.get_user_profiles import get_user_profiles
+from app.db.session import AsyncSessionLocal
+from app.websocket.manager import manager
+
+_INVALIDATE = "profile_invalidate"
+
+# (display_name, avatar_url)
+Profile = Tuple[Optional[str], Optional[str]]
+
+
+class UserProfileCache:
+    """Shared cache of user display names and avatars.
+
+    Entries live for ``ttl`` seconds and the cache holds at most ``max_users``
+    of them (least recently used are evicted first). Misses are loaded with a
+    single ``IN`` query however many users are requested. Code that changes
+    a display name or avatar calls ``invalidate``; the invalidation is also
+    published to other workers over the WebSocket backplane.
+    """
+
+    def __init__(
+        self,
+        ttl: float = settings.USER_PROFILE_CACHE_TTL_SECONDS,
+        max_users: int = settings.USER_PROFILE_CACHE_MAX_USERS,
+    ) -> None:
+        self.ttl = ttl
+        self.max_users = max_users
+        # user_id -> (monotonic expiry, profile)
+        self._entries: "OrderedDict[uuid.UUID, Tuple[float, Profile]]" = OrderedDict()
+        self._generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    async def get_many(self, user_ids: Iterable[uuid.UUID], db: Optional[AsyncSession] = None) -> Dict[uuid.UUID, Profile]:
+        """Return the profiles of the existing users among ``user_ids``."""
+        now = time.monotonic()
+        found: Dict[uuid.UUID, Profile] = {}
+        missing = []
+        for uid in {uuid.UUID(str(u)) for u in user_ids}:
+            entry = self._entries.get(uid)
+            if entry is not None and entry[0] > now:
+                self._entries.move_to_end(uid)
+                found[uid] = entry[1]
+                self.hits += 1
+            else:
+                missing.append(uid)
+                self.misses += 1
+
+        if missing:
+            generation = self._generation
+            loaded = await self._load(missing, db)
+            found.update(loaded)
+            if generation == self._generation:
+                expires = time.monotonic() + self.ttl
+                for uid, profile in loaded.items():
+                    self._entries[uid] = (expires, profile)
+                    self._entries.move_to_end(uid)
+                while len(self._entries) > self.max_users:
+                    self._entries.popitem(last=False)
+        return found
+
+    async def get_names(self, user_ids: Iterable[uuid.UUID], db: Optional[AsyncSession] = None) -> Dict[uuid.UUID, str]:
+        profiles = await self.get_many(user_ids, db)
+        return {uid: profile[0] or "" for uid, profile in profiles.items()}
+
+    async def get_name(self, user_id: uuid.UUID, db: Optional[AsyncSession] = None) -> str:
+        names = await self.get_names([user_id], db)
+        return next(iter(names.values()), "")
+
+    def invalidate(self, user_id: uuid.UUID) -> None:
+        self._drop(uuid.UUID(str(user_id)))
+        try:
+            asyncio.get_running_loop().create_task(
+                manager.publish_control({"t": _INVALIDATE, "u": str(user_id)})
+            )
+        except RuntimeError:
+            pass
+
+    def on_control(self, origin: str, payload: Dict[str, Any]) -> None:
+        if payload.get("t") == _INVALIDATE:
+            self._drop(uuid.UUID(payload["u"]))
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "users": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "invalidations": self.invalidations,
+        }
+
+    def _drop(self, user_id: uuid.UUID) -> None:
+        self._generation += 1
+        self.invalidations += 1
+        self._entries.pop(user_id, None)
+
+    @staticmethod
+    async def _load(user_ids, db: Optional[AsyncSession]) -> Dict[uuid.UUID, Profile]:
+        if db is not None:
+            return await get_user_profiles(db, user_ids)
+        async with AsyncSessionLocal() as session:
+            return await get_user_profiles(session, user_ids)
+
+
+user_profiles = UserProfileCache()
+manager.add_control_handler("profile", user_profiles.on_control)
@@ -0,0 +1,274 @@
+import abc
+import asyncio
+import json
+import time
+import uuid
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+import asyncpg
+
+from app.core.config import settings
+
+# Handler invoked for events published by other workers:
+# (user_ids, frame_text, message_id, coalesce_key, replayable)
+RemoteHandler = Callable[[List[str], str, Optional[str], Optional[tuple], bool], None]
+# Handler for control messages (presence gossip etc.): (origin_worker_id, payload)
+ControlHandler = Callable[[str, Dict[str, Any]], None]
+
+# Postgres rejects NOTIFY payloads of 8000 bytes or more; stay well below it.
+_MAX_NOTIFY_BYTES = 7800
+# Characters per chunk; 4 bytes per char worst case keeps each chunk under the limit.
+_CHUNK_CHARS = 1800
+_PARTIAL_TTL_SECONDS = 30.0
+
+
+class Backplane(abc.ABC):
+    """Fan events out to the other workers serving WebSocket clients.
+
+    Each worker delivers an event to its own sockets directly and publishes it
+    once here; the backplane hands it to every *other* worker, which delivers it
+    to the sockets it holds. ``distributed`` tells the manager whether any other
+    worker can exist, so single-process setups can skip encoding unused events.
+    """
+
+    distributed = False
+
+    def __init__(self) -> None:
+        self.worker_id = uuid.uuid4().hex
+        self.published = 0
+        self.received = 0
+        self.publish_errors = 0
+
+    @abc.abstractmethod
+    async def start(self, handler: RemoteHandler, control_handler: Optional[ControlHandler] = None) -> None:
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    async def stop(self) -> None:
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    async def publish_control(self, payload: Dict[str, Any]) -> None:
+        """Send a small JSON control message to every other worker."""
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    async def publish(
+        self,
+        user_ids: Sequence[str],
+        frame_text: str,
+        message_id: Optional[str] = None,
+        key: Optional[tuple] = None,
+        replayable: bool = True,
+    ) -> None:
+        raise NotImplementedError
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "backend": type(self).__name__,
+            "worker_id": self.worker_id,
+            "published": self.published,
+            "received": self.received,
+            "publish_errors": self.publish_errors,
+        }
+
+
+class InProcessBackplane(Backplane):
+    """Backplane between managers living in the same process.
+
+    With a single manager (the default, single-worker deployment) publishing is
+    a no-op. Several managers sharing one ``hub`` behave like separate workers,
+    which is how the multi-worker paths are exercised in tests.
+    """
+
+    def __init__(self, hub: Optional[List["InProcessBackplane"]] = None) -> None:
+        super().__init__()
+        self.hub = hub if hub is not None else []
+        self._handler: Optional[RemoteHandler] = None
+        self._control_handler: Optional[ControlHandler] = None
+
+    @property
+    def distributed(self) -> bool:
+        return len(self.hub) > 1
+
+    async def start(self, handler: RemoteHandler, control_handler: Optional[ControlHandler] = None) -> None:
+        self._handler = handler
+        self._control_handler = control_handler
+        if self not in self.hub:
+            self.hub.append(self)
+
+    async def stop(self) -> None:
+        if self in self.hub:
+            self.hub.remove(self)
+        self._handler = None
+        self._control_handler = None
+
+    async def publish_control(self, payload: Dict[str, Any]) -> None:
+        for peer in list(self.hub):
+            if peer is not self and peer._control_handler is not None:
+                peer._control_handler(self.worker_id, payload)
+
+    async def publish(self, user_ids, frame_text, message_id=None, key=None, replayable=True) -> None:
+        self.published += 1
+        for peer in list(self.hub):
+            if peer is self or peer._handler is None:
+                continue
+            peer.received += 1
+            peer._handler(list(user_ids), frame_text, message_id, key, replayable)
+
+
+class PostgresBackplane(Backplane):
+    """Backplane over Postgres LISTEN/NOTIFY on the database we already run.
+
+    One dedicated connection LISTENs on ``channel`` and reconnects if it drops;
+    publishing goes through a small separate pool. Envelopes larger than the
+    NOTIFY payload limit are split into chunks sent in one transaction and
+    reassembled by the receivers.
+    """
+
+    distributed = True
+
+    def __init__(self, dsn: str, channel: str = settings.WS_BACKPLANE_CHANNEL) -> None:
+        super().__init__()
+        self.dsn = dsn
+        self.channel = channel
+        self._handler: Optional[RemoteHandler] = None
+        self._control_handler: Optional[ControlHandler] = None
+        self._pool = None
+        self._listen_task: Optional[asyncio.Task] = None
+        self._partials: Dict[str, Dict[str, Any]] = {}
+        self.reconnects = 0
+
+    async def start(self, handler: RemoteHandler, control_handler: Optional[ControlHandler] = None) -> None:
+        self._handler = handler
+        self._control_handler = control_handler
+        self._pool = await asyncpg.create_pool(self.dsn, min_size=1, max_size=2)
+        connected = asyncio.get_running_loop().create_future()
+        self._listen_task = asyncio.create_task(self._listen_forever(connected))
+        await connected
+
+    async def stop(self) -> None:
+        if self._listen_task is not None:
+            self._listen_task.cancel()
+            try:
+                await self._listen_task
+            except asyncio.CancelledError:
+                pass
+            self._listen_task = None
+        if self._pool is not None:
+            await self._pool.close()
+            self._pool = None
+        self._handler = None
+        self._control_handler = None
+
+    async def publish(self, user_ids, frame_text, message_id=None, key=None, replayable=True) -> None:
+        data = {"o": self.worker_id, "u": list(user_ids), "f": frame_text, "m": message_id, "k": key}
+        if not replayable:
+            data["r"] = 0
+        await self._notify(data)
+
+    async def publish_control(self, payload: Dict[str, Any]) -> None:
+        await self._notify({"o": self.worker_id, "x": payload})
+
+    async def _notify(self, data: Dict[str, Any]) -> None:
+        if self._pool is None:
+            return
+        envelope = json.dumps(data, separators=(",", ":"))
+        try:
+            async with self._pool.acquire() as conn:
+                if len(envelope.encode()) <= _MAX_NOTIFY_BYTES:
+                    await conn.execute("SELECT pg_notify($1, $2)", self.channel, envelope)
+                else:
+                    async with conn.transaction():
+                        for chunk in self._chunks(envelope):
+                            await conn.execute("SELECT pg_notify($1, $2)", self.channel, chunk)
+            self.published += 1
+        except Exception as e:
+            self.publish_errors += 1
+            print(f"Error publishing to backplane: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        return {**super().stats(), "reconnects": self.reconnects, "partial_events": len(self._partials)}
+
+    def _chunks(self, envelope: str) -> List[str]:
+        chunk_id = uuid.uuid4().hex
+        parts = [envelope[i:i + _CHUNK_CHARS] for i in range(0, len(envelope), _CHUNK_CHARS)]
+        return [
+            json.dumps(
+                {"o": self.worker_id, "c": chunk_id, "n": n, "t": len(parts), "d": part},
+                separators=(",", ":"),
+            )
+            for n, part in enumerate(parts)
+        ]
+
+    async def _listen_forever(self, connected: asyncio.Future) -> None:
+        backoff = 0.5
+        while True:
+            conn = None
+            try:
+                conn = await asyncpg.connect(self.dsn)
+                lost = asyncio.Event()
+                conn.add_termination_listener(lambda _conn: lost.set())
+                await conn.add_listener(self.channel, self._on_notify)
+                if not connected.done():
+                    connected.set_result(None)
+                backoff = 0.5
+                await lost.wait()
+            except asyncio.CancelledError:
+                if conn is not None and not conn.is_closed():
+                    await conn.close()
+                raise
+            except Exception as e:
+                if not connected.done():
+                    connected.set_exception(e)
+                    return
+                print(f"Backplane listener error: {e}")
+            self.reconnects += 1
+            await asyncio.sleep(backoff)
+            backoff = min(backoff * 2, 10.0)
+
+    def _on_notify(self, _conn, _pid, _channel, payload: str) -> None:
+        try:
+            data = json.loads(payload)
+        except ValueError:
+            return
+        if data.get("o") == self.worker_id:
+            return
+
+        if "c" in data:
+            data = self._reassemble(data)
+            if data is None:
+                return
+
+        if "x" in data:
+            if self._control_handler is not None:
+                self._control_handler(data["o"], data["x"])
+            return
+
+        if self._handler is None:
+            return
+        self.received += 1
+        key = tuple(data["k"]) if data.get("k") is not None else None
+        self._handler(data["u"], data["f"], data.get("m"), key, bool(data.get("r", 1)))
+
+    def _reassemble(self, chunk: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        now = time.monotonic()
+        for stale in [cid for cid, p in self._partials.items() if now - p["at"] > _PARTIAL_TTL_SECONDS]:
+            del self._partials[stale]
+
+        partial = self._partials.setdefault(chunk["c"], {"at": now, "parts": {}})
+        partial["parts"][chunk["n"]] = chunk["d"]
+        if len(partial["parts"]) < chunk["t"]:
+            return None
+
+        del self._partials[chunk["c"]]
+        envelope = "".join(partial["parts"][n] for n in range(chunk["t"]))
+        return json.loads(envelope)
+
+
+def create_backplane() -> Backplane:
+    if settings.WS_BACKPLANE == "postgres":
+        # asyncpg takes a plain libpq-style DSN
+        return PostgresBackplane(settings.database_url.replace("+asyncpg", ""))
+    return InProcessBackplane()
+
@@ -0,0 +1,199 @@
+import asyncio
+import logging
+import time
+import uuid
+from datetime import datetime
+from typing import Any, Dict
+
+from app.core.config import settings
+from app.db.repositories.messages.mark_delivered import mark_delivered
+from app.db.session import AsyncSessionLocal
+
+logger = logging.getLogger(__name__)
+
+
+class DeliveryReceiptWriter:
+    """Queue delivery receipts in memory and write them to the DB in batches.
+
+    ``enqueue`` is called on the send path and never touches the database.
+    A background task flushes the pending receipts, grouped by message, once
+    ``batch_size`` receipts are waiting or ``flush_interval`` seconds have
+    passed, whichever comes first. A failed flush is retried, but at most
+    ``max_pending`` receipts are held; past that the oldest are dropped.
+    """
+
+    def __init__(
+        self,
+        batch_size: int = settings.DELIVERY_RECEIPT_BATCH_SIZE,
+        flush_interval: float = settings.DELIVERY_RECEIPT_FLUSH_INTERVAL_SECONDS,
+        max_pending: int = settings.DELIVERY_RECEIPT_MAX_PENDING,
+    ) -> None:
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self._pending: Dict[uuid.UUID, Dict[str, str]] = {}
+        self._pending_count = 0
+        self._wakeup: asyncio.Event | None = None
+        self._task: asyncio.Task | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._flush_lock: asyncio.Lock | None = None
+
+        # Counters
+        self.enqueued_total = 0
+        self.written_total = 0
+        self.flush_count = 0
+        self.flush_errors = 0
+        self.dropped = 0
+        self.last_flush_ms = 0.0
+        self.max_flush_ms = 0.0
+
+    @property
+    def queue_depth(self) -> int:
+        return self._pending_count
+
+    def enqueue(self, message_id: uuid.UUID | str, user_id: str) -> None:
+        try:
+            msg_uuid = message_id if isinstance(message_id, uuid.UUID) else uuid.UUID(str(message_id))
+        except ValueError:
+            return
+
+        per_message = self._pending.setdefault(msg_uuid, {})
+        if user_id not in per_message:
+            self._pending_count += 1
+        per_message[user_id] = datetime.utcnow().isoformat()
+        self.enqueued_total += 1
+        if self._pending_count > self.max_pending:
+            self._trim()
+
+        self._ensure_started()
+        # Wake the flusher when a new batch opens (starts the time window) and
+        # again when the batch is full (cuts the window short).
+        if self._wakeup is not None and (
+            self._pending_count == 1 or self._pending_count >= self.batch_size
+        ):
+            self._wakeup.set()
+
+    def start(self) -> None:
+        self._ensure_started()
+
+    async def stop(self) -> None:
+        """Stop the background task and drain everything still queued."""
+        task = self._task
+        self._task = None
+        if task is not None and not task.done():
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        await self.flush()
+
+    async def flush(self) -> int:
+        """Write all pending receipts now. Returns the number of receipts written."""
+        if self._flush_lock is None:
+            self._flush_lock = asyncio.Lock()
+
+        async with self._flush_lock:
+            if not self._pending:
+                return 0
+
+            batch, count = self._pending, self._pending_count
+            self._pending, self._pending_count = {}, 0
+
+            started = time.perf_counter()
+            try:
+                async with AsyncSessionLocal() as db:
+                    await mark_delivered(db, batch)
+            except Exception:
+                self.flush_errors += 1
+                logger.exception("Error flushing %d delivery receipts; keeping them for retry", count)
+                self._requeue(batch)
+                return 0
+            finally:
+                elapsed_ms = (time.perf_counter() - started) * 1000
+                self.last_flush_ms = elapsed_ms
+                self.max_flush_ms = max(self.max_flush_ms, elapsed_ms)
+
+            self.flush_count += 1
+            self.written_total += count
+            return count
+
+    def _requeue(self, batch: Dict[uuid.UUID, Dict[str, str]]) -> None:
+        """Put a failed batch back ahead of newer receipts, keeping the newer timestamp."""
+        newer, self._pending = self._pending, batch
+        self._pending_count = sum(len(receipts) for receipts in batch.values())
+        for msg_uuid, receipts in newer.items():
+            per_message = self._pending.setdefault(msg_uuid, {})
+            for user_id, delivered_at in receipts.items():
+                current = per_message.get(user_id)
+                if current is None:
+                    self._pending_count += 1
+                    per_message[user_id] = delivered_at
+                elif delivered_at > current:
+                    per_message[user_id] = delivered_at
+        if self._pending_count > self.max_pending:
+            self._trim()
+
+    def _trim(self) -> None:
+        """Drop the oldest receipts until at most ``max_pending`` are held."""
+        excess = self._pending_count - self.max_pending
+        self._pending_count -= excess
+        self.dropped += excess
+        while excess > 0:
+            msg_uuid = next(iter(self._pending))
+            per_message = self._pending[msg_uuid]
+            while per_message and excess > 0:
+                del per_message[next(iter(per_message))]
+                excess -= 1
+            if not per_message:
+                del self._pending[msg_uuid]
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "queue_depth": self.queue_depth,
+            "enqueued_total": self.enqueued_total,
+            "written_total": self.written_total,
+            "flush_count": self.flush_count,
+            "flush_errors": self.flush_errors,
+            "dropped": self.dropped,
+            "last_flush_ms": round(self.last_flush_ms, 3),
+            "max_flush_ms": round(self.max_flush_ms, 3),
+        }
+
+    def _ensure_started(self) -> None:
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+
+        if self._task is not None and not self._task.done() and self._loop is loop:
+            return
+
+        # (Re)bind loop-affine primitives when running under a new event loop.
+        self._loop = loop
+        self._wakeup = asyncio.Event()
+        self._flush_lock = asyncio.Lock()
+        self._task = loop.create_task(self._run())
+        if self._pending_count:
+            self._wakeup.set()
+
+    async def _run(self) -> None:
+        wakeup = self._wakeup
+        while True:
+            await wakeup.wait()
+            wakeup.clear()
+            if self._pending_count < self.batch_size:
+                try:
+                    await asyncio.wait_for(wakeup.wait(), timeout=self.flush_interval)
+                except asyncio.TimeoutError:
+                    pass
+                wakeup.clear()
+            errors = self.flush_errors
+            await self.flush()
+            if self.flush_errors > errors:
+                # The batch was put back; wait out an interval before retrying it
+                await asyncio.sleep(self.flush_interval)
+                wakeup.set()
+
+
+delivery_receipts = DeliveryReceiptWriter()
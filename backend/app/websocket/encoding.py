@@ -0,0 +1,41 @@
+import json
+from typing import Any, Optional
+
+try:  # optional, faster encoder
+    import orjson
+except ImportError:  # pragma: no cover - depends on the environment
+    orjson = None
+
+
+def _default(obj: Any) -> Any:
+    if hasattr(obj, "isoformat"):
+        return obj.isoformat()
+    return str(obj)
+
+
+def encode_event(message: dict) -> str:
+    """Encode an outbound event to the JSON text sent on the wire.
+
+    Uses orjson when it is installed, otherwise the stdlib encoder with the same
+    compact separators Starlette's ``send_json`` uses.
+    """
+    if orjson is not None:
+        return orjson.dumps(message, default=_default).decode()
+    return json.dumps(message, separators=(",", ":"), ensure_ascii=False, default=_default)
+
+
+class OutboundFrame:
+    """An event encoded once and shared by every socket it is sent to."""
+
+    __slots__ = ("text", "message_id")
+
+    def __init__(self, text: str, message_id: Optional[str] = None) -> None:
+        self.text = text
+        # Id of the chat message carried by the event, for delivery receipts
+        self.message_id = message_id
+
+    @classmethod
+    def from_event(cls, message: dict) -> "OutboundFrame":
+        msg_data = message.get("message")
+        message_id = msg_data.get("id") if isinstance(msg_data, dict) else None
+        return cls(encode_event(message), message_id)
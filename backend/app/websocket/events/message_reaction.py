@@ -2,8 +2,7 @@ import uuid
 from typing import Dict, List
 
 from app.websocket.manager import manager
-from app.db.session import AsyncSessionLocal
-from app.db.repositories.conversation_participants.get_all_participants import get_participants
+from app.services.conversation_participants.membership_cache import membership_cache
 
 async def handle_reaction(
         conversation_id: uuid.UUID,
@@ -13,22 +12,19 @@ async def handle_reaction(
         event_type: str) -> None:
         
         try:
-            async with AsyncSessionLocal() as db:
-                
-                participants = await get_participants(db, conversation_id)
-                participant_ids: List[str] = [str(p.user_id) for p in participants]
-                
-                await manager.broadcast(
-                    participant_ids,
-                    {
-                        "event": "message_reaction_updated",
-                        "conversation_id": str(conversation_id),
-                        "message_id": str(message_id),
-                        "user_id": str(user_id),
-                        "reactions": reactions, 
-                        "action": event_type
-                 },
-                )
+            participant_ids: List[str] = await membership_cache.get_members(conversation_id)
+
+            await manager.broadcast(
+                participant_ids,
+                {
+                    "event": "message_reaction_updated",
+                    "conversation_id": str(conversation_id),
+                    "message_id": str(message_id),
+                    "user_id": str(user_id),
+                    "reactions": reactions, 
+                    "action": event_type
+                },
+            )
         except Exception as e:
             print(f"Error broadcasting reaction update: {e}")
             return
@@ -2,29 +2,21 @@ import uuid
 from datetime import datetime, timezone
 from typing import List
 
-from sqlalchemy import select, update
+from sqlalchemy import update
 
 from app.db.session import AsyncSessionLocal
-from app.models.conversation_participants import ConversationsParticipants
 from app.models.users import User
+from app.services.conversation_participants.membership_cache import membership_cache
 from app.websocket.manager import manager
 
 
 async def _get_related_user_ids(user_uuid: uuid.UUID) -> List[str]:
-    async with AsyncSessionLocal() as db:
-        conv_stmt = select(ConversationsParticipants.conversation_id).where(
-            ConversationsParticipants.user_id == user_uuid
-        )
-        conv_ids = [row for row in (await db.execute(conv_stmt)).scalars().all()]
-        if not conv_ids:
-            return []
-
-        participants_stmt = select(ConversationsParticipants.user_id).where(
-            ConversationsParticipants.conversation_id.in_(conv_ids)
-        )
-        participant_ids = set((await db.execute(participants_stmt)).scalars().all())
-        participant_ids.discard(user_uuid)
-        return [str(pid) for pid in participant_ids]
+    participant_ids = set()
+    conversation_ids = await membership_cache.get_user_conversations(user_uuid)
+    for members in (await membership_cache.get_members_many(conversation_ids)).values():
+        participant_ids.update(members)
+    participant_ids.discard(str(user_uuid))
+    return list(participant_ids)
 
 
 async def handle_presence_change(user_id: str, is_online: bool) -> None:
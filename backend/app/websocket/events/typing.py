@@ -2,31 +2,59 @@ import uuid
 from typing import Dict, Any, List
 
 from app.websocket.manager import manager
-from app.db.session import AsyncSessionLocal
-from app.db.repositories.conversation_participants.get_all_participants import get_participants
-from app.services.conversation_participants.get_participant_name import get_participant_name_service
+from app.websocket.typing_state import TypingStateEngine
+from app.services.conversation_participants.membership_cache import membership_cache
+from app.services.users.profile_cache import user_profiles
+
+
+async def _broadcast_typing(conversation_id_str: str, user_id: str, event_type: str) -> None:
+    participant_ids: List[str] = await membership_cache.get_members(uuid.UUID(conversation_id_str))
+    if user_id not in participant_ids:
+        return
+
+    sender_name = await user_profiles.get_name(uuid.UUID(user_id))
+
+    await manager.broadcast(
+        participant_ids,
+        {
+            "event": event_type,
+            "conversation_id": conversation_id_str,
+            "user_id": user_id,
+            "sender_name": sender_name,
+        },
+    )
+
+
+async def _on_typing_expired(conversation_id_str: str, user_id: str) -> None:
+    await _broadcast_typing(conversation_id_str, user_id, "typing_stop")
+
+
+typing_state = TypingStateEngine(on_expire=_on_typing_expired)
+
 
 async def handle_typing(user_id: str, data: Dict[str, Any], event_type: str) -> None:
     try:
         conversation_id_str = data.get("conversation_id")
         if not conversation_id_str:
             return
+        uuid.UUID(conversation_id_str)
+
+        # Only transitions are broadcast; repeated starts just keep the state alive
+        if event_type == "typing_start":
+            changed = typing_state.start(conversation_id_str, user_id)
+        else:
+            changed = typing_state.stop(conversation_id_str, user_id)
 
-        async with AsyncSessionLocal() as db:
-            participants = await get_participants(db, uuid.UUID(conversation_id_str))
-            sender_name = await get_participant_name_service(db, uuid.UUID(user_id))
-
-        participant_ids: List[str] = [str(p.user_id) for p in participants]
-
-        await manager.broadcast(
-            participant_ids,
-            {
-                "event": event_type,
-                "conversation_id": conversation_id_str,
-                "user_id": user_id,
-                "sender_name": sender_name,
-            },
-        )
+        if changed:
+            await _broadcast_typing(conversation_id_str, user_id, event_type)
     except Exception:
         return
 
+
+async def clear_typing(user_id: str) -> None:
+    """Broadcast typing_stop for every conversation ``user_id`` was typing in."""
+    for conversation_id_str in typing_state.clear_user(user_id):
+        try:
+            await _broadcast_typing(conversation_id_str, user_id, "typing_stop")
+        except Exception:
+            continue
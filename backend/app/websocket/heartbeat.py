@@ -0,0 +1,104 @@
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from fastapi import WebSocket
+
+from app.core.config import settings
+from app.websocket.encoding import OutboundFrame
+from app.websocket.manager import ConnectionManager
+
+# Called when reaping a socket took its user offline: (user_id)
+OfflineHandler = Callable[[str], Awaitable[None]]
+
+
+class HeartbeatMonitor:
+    """Application-level ping/pong that finds and drops dead sockets.
+
+    Every ``interval`` seconds each local socket is sent a ``ping`` event;
+    clients answer with ``pong``, and any inbound frame counts as a sign of
+    life (``touch``). A socket silent for longer than ``timeout`` is treated
+    as a half-open connection: it is unregistered from the manager and
+    closed, and ``on_offline`` runs if that was the user's last socket.
+    """
+
+    def __init__(
+        self,
+        manager: ConnectionManager,
+        on_offline: Optional[OfflineHandler] = None,
+        interval: float = settings.WS_HEARTBEAT_INTERVAL_SECONDS,
+        timeout: float = settings.WS_HEARTBEAT_TIMEOUT_SECONDS,
+    ) -> None:
+        self.manager = manager
+        self.on_offline = on_offline
+        self.interval = interval
+        self.timeout = timeout
+        # socket -> (user_id, monotonic time of the last inbound frame)
+        self._last_seen: Dict[WebSocket, Tuple[str, float]] = {}
+        self._task: Optional[asyncio.Task] = None
+        self.pings = 0
+        self.reaped = 0
+
+    def start(self) -> None:
+        if self.interval > 0 and self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def register(self, user_id: str, websocket: WebSocket) -> None:
+        self._last_seen[websocket] = (user_id, time.monotonic())
+
+    def touch(self, websocket: WebSocket) -> None:
+        entry = self._last_seen.get(websocket)
+        if entry is not None:
+            self._last_seen[websocket] = (entry[0], time.monotonic())
+
+    def unregister(self, websocket: WebSocket) -> None:
+        self._last_seen.pop(websocket, None)
+
+    def stats(self) -> Dict[str, Any]:
+        return {"tracked": len(self._last_seen), "pings": self.pings, "reaped": self.reaped}
+
+    async def sweep(self) -> None:
+        """Reap silent sockets and ping the rest."""
+        deadline = time.monotonic() - self.timeout
+        ping = OutboundFrame.from_event({"event": "ping"})
+        for websocket, (user_id, last_seen) in list(self._last_seen.items()):
+            if last_seen < deadline:
+                await self._reap(user_id, websocket)
+            elif self.manager.send_frame(websocket, ping):
+                self.pings += 1
+
+    async def _reap(self, user_id: str, websocket: WebSocket) -> None:
+        self.unregister(websocket)
+        self.reaped += 1
+        went_offline = self.manager.disconnect(user_id, websocket)
+        # A half-open peer never completes the close handshake; don't wait on it
+        asyncio.get_running_loop().create_task(self._close(websocket))
+        if went_offline and self.on_offline is not None:
+            try:
+                await self.on_offline(user_id)
+            except Exception as e:
+                print(f"Error handling reaped connection: {e}")
+
+    @staticmethod
+    async def _close(websocket: WebSocket) -> None:
+        try:
+            await asyncio.wait_for(websocket.close(code=1001), timeout=5.0)
+        except Exception:
+            pass
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.sweep()
+            except Exception as e:
+                print(f"Heartbeat sweep failed: {e}")
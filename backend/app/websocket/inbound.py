@@ -0,0 +1,52 @@
+import json
+import time
+from typing import Any, Dict, Optional
+
+from app.core.config import settings
+
+
+class InboundLimiter:
+    """Token bucket over the frames one socket sends us.
+
+    Frames beyond ``rate`` per second (after a ``burst``) are dropped. A
+    client that keeps sending into an empty bucket for more than ``burst``
+    frames in a row is abusive and ``should_close`` turns True.
+    """
+
+    def __init__(
+        self,
+        rate: float = settings.WS_INBOUND_RATE_PER_SECOND,
+        burst: int = settings.WS_INBOUND_RATE_BURST,
+    ) -> None:
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._last = time.monotonic()
+        self._dropped_in_a_row = 0
+
+    def allow(self) -> bool:
+        now = time.monotonic()
+        self._tokens = min(float(self.burst), self._tokens + (now - self._last) * self.rate)
+        self._last = now
+        if self._tokens < 1.0:
+            self._dropped_in_a_row += 1
+            return False
+        self._tokens -= 1.0
+        self._dropped_in_a_row = 0
+        return True
+
+    @property
+    def should_close(self) -> bool:
+        return self._dropped_in_a_row > self.burst
+
+
+def parse_frame(raw: str, max_bytes: int = settings.WS_MAX_INBOUND_FRAME_BYTES) -> Optional[Dict[str, Any]]:
+    """Decode an inbound event, or None if it is oversized or not a JSON object."""
+    # Length in characters bounds the UTF-8 size from below, so nothing valid is rejected
+    if len(raw) > max_bytes:
+        return None
+    try:
+        data = json.loads(raw)
+    except ValueError:
+        return None
+    return data if isinstance(data, dict) else None
@@ -1,61 +1,222 @@
-from datetime import datetime
-from typing import Dict, List
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
 from fastapi import WebSocket
-from sqlalchemy import select
 
-from app.db.session import AsyncSessionLocal
-from app.models.messages import Message
+from app.core.config import settings
+from app.websocket.backplane import Backplane, ControlHandler, create_backplane
+from app.websocket.delivery_receipts import delivery_receipts
+from app.websocket.encoding import OutboundFrame
+from app.websocket.outbound import SocketSender, coalesce_key, is_replayable
+from app.websocket.presence_registry import PresenceRegistry
+from app.websocket.replay import ReplayBuffer
 
 
 class ConnectionManager:
-    def __init__(self) -> None:
+    def __init__(
+        self,
+        send_queue_size: int = settings.WS_SEND_QUEUE_SIZE,
+        overflow_policy: str = settings.WS_SEND_OVERFLOW_POLICY,
+        backplane: Optional[Backplane] = None,
+        max_connections_per_user: int = settings.WS_MAX_CONNECTIONS_PER_USER,
+        max_connections: int = settings.WS_MAX_CONNECTIONS,
+    ) -> None:
         self.active_connections: Dict[str, List[WebSocket]] = {}
+        self.send_queue_size = send_queue_size
+        self.overflow_policy = overflow_policy
+        self.max_connections_per_user = max_connections_per_user
+        self.max_connections = max_connections
+        self.backplane = backplane or create_backplane()
+        self.presence = PresenceRegistry(self.backplane)
+        self.replay = ReplayBuffer()
+        self._senders: Dict[WebSocket, SocketSender] = {}
+        # Slots taken by admitted handshakes that are not registered yet
+        self._reserved: Dict[str, int] = {}
+        self._reserved_total = 0
+        # Control messages from other workers, routed by the prefix of their "t" field
+        self._control_handlers: Dict[str, ControlHandler] = {"presence": self.presence.on_control}
+        # Counters of senders that have already been disconnected
+        self._retired = {"sent": 0, "dropped": 0, "coalesced": 0, "send_errors": 0}
+        # Handshakes refused and inbound frames discarded, by reason
+        self.rejected: Dict[str, int] = {"auth": 0, "user_limit": 0, "global_limit": 0}
+        self.inbound: Dict[str, int] = {"rate_limited": 0, "invalid": 0, "abusive_closed": 0}
+
+    async def start(self) -> None:
+        """Subscribe to events published by other workers."""
+        await self.backplane.start(self._on_remote_event, self._on_control)
+        await self.presence.start()
+
+    async def stop(self) -> None:
+        await self.presence.stop()
+        await self.backplane.stop()
+
+    def admit(self, user_id: str) -> bool:
+        """Check the connection caps and reserve a slot for another socket of ``user_id``.
+
+        The slot is held until ``connect`` returns, so handshakes running
+        concurrently cannot all pass the caps before any of them registers.
+        """
+        if len(self._senders) + self._reserved_total >= self.max_connections:
+            self.rejected["global_limit"] += 1
+            return False
+        reserved = self._reserved.get(user_id, 0)
+        if self.presence.connection_count(user_id) + reserved >= self.max_connections_per_user:
+            self.rejected["user_limit"] += 1
+            return False
+        self._reserved[user_id] = reserved + 1
+        self._reserved_total += 1
+        return True
 
     async def connect(self, user_id: str, websocket: WebSocket) -> bool:
-        await websocket.accept()
+        """Register a socket. Returns True if the user just came online cluster-wide."""
+        try:
+            await websocket.accept()
+        finally:
+            # Registered below or failed; either way the admitted slot is released
+            self._release(user_id)
 
-        first_connection = user_id not in self.active_connections or not self.active_connections[user_id]
+        first_connection = self.presence.add(user_id) == 1
         if user_id not in self.active_connections:
             self.active_connections[user_id] = []
 
         self.active_connections[user_id].append(websocket)
+
+        sender = SocketSender(
+            websocket,
+            max_queue=self.send_queue_size,
+            overflow_policy=self.overflow_policy,
+            on_sent=lambda frame: self._record_delivery(user_id, frame),
+        )
+        self._senders[websocket] = sender
+        sender.start()
         return first_connection
 
+    def start_session(self, user_id: str, websocket: WebSocket, resume: Optional[Tuple[str, int]] = None) -> None:
+        """Sequence the user's events and queue the session greeting on ``websocket``.
+
+        ``resume`` is the (epoch, seq) of the last event the client saw; the
+        events it missed are queued too. Call it right after ``connect``
+        returns, before awaiting anything, so live events can only follow.
+        """
+        sender = self._senders.get(websocket)
+        for frame in self.replay.attach(user_id, resume):
+            if sender is not None:
+                sender.enqueue(frame)
+
     def disconnect(self, user_id: str, websocket: WebSocket) -> bool:
-        if user_id in self.active_connections:
-            if websocket in self.active_connections[user_id]:
-                self.active_connections[user_id].remove(websocket)
-            if not self.active_connections[user_id]:
-                del self.active_connections[user_id]
-                return True
-        return False
+        """Unregister a socket. Returns True if the user just went offline cluster-wide."""
+        sender = self._senders.pop(websocket, None)
+        if sender is not None:
+            sender.close()
+            for name in self._retired:
+                self._retired[name] += getattr(sender, name)
+
+        if websocket not in self.active_connections.get(user_id, ()):
+            return False
+
+        self.active_connections[user_id].remove(websocket)
+        if not self.active_connections[user_id]:
+            del self.active_connections[user_id]
+            self.replay.detach(user_id)
+        return self.presence.remove(user_id) == 0
+
+    def _release(self, user_id: str) -> None:
+        reserved = self._reserved.get(user_id, 0)
+        if not reserved:
+            return
+        self._reserved_total -= 1
+        if reserved == 1:
+            del self._reserved[user_id]
+        else:
+            self._reserved[user_id] = reserved - 1
 
     def is_online(self, user_id: str) -> bool:
-        return user_id in self.active_connections and bool(self.active_connections[user_id])
+        return self.presence.is_online(user_id)
+
+    def are_online(self, user_ids: Iterable[str]) -> Set[str]:
+        return self.presence.are_online(user_ids)
 
     def connection_count(self, user_id: str) -> int:
-        return len(self.active_connections.get(user_id, []))
+        return self.presence.connection_count(user_id)
 
-    async def send_personal_message(self, user_id: str, message: dict) -> None:
-        if user_id in self.active_connections:
-            for conn in self.active_connections[user_id]:
-                await conn.send_json(message)
-            msg_data = message.get("message")
-            if msg_data and "id" in msg_data:
-                msg_id = msg_data["id"]
-
-                async with AsyncSessionLocal() as db:
-                    result = await db.execute(select(Message).where(Message.id == msg_id))
-                    msg = result.scalar_one_or_none()
-                    if msg:
-                        delivered_map = msg.delivered_at or {}
-                        delivered_map[user_id] = datetime.utcnow().isoformat()
-                        msg.delivered_at = delivered_map
-                        await db.commit()
+    def add_control_handler(self, prefix: str, handler: ControlHandler) -> None:
+        """Receive control messages whose type starts with ``prefix + "_"``."""
+        self._control_handlers[prefix] = handler
+
+    async def publish_control(self, payload: Dict[str, Any]) -> None:
+        if self.backplane.distributed:
+            await self.backplane.publish_control(payload)
 
+    def send_frame(self, websocket: WebSocket, frame: OutboundFrame) -> bool:
+        """Queue ``frame`` on one local socket only."""
+        sender = self._senders.get(websocket)
+        return sender is not None and sender.enqueue(frame)
+
+    async def send_personal_message(self, user_id: str, message: dict) -> None:
+        """Queue ``message`` on every socket of ``user_id``; never waits on the network."""
+        await self.broadcast([user_id], message)
 
     async def broadcast(self, user_ids: list[str], message: dict) -> None:
-        for uid in set(user_ids):
-            await self.send_personal_message(uid, message)
+        recipients = set(user_ids)
+        # Users who just disconnected still collect events for their resume buffer
+        targets = [uid for uid in recipients if uid in self.active_connections or self.replay.tracks(uid)]
+        if not targets and not self.backplane.distributed:
+            return
+        # Encode once; every recipient socket gets the same prepared text frame.
+        frame = OutboundFrame.from_event(message)
+        key = coalesce_key(message)
+        replayable = is_replayable(message.get("event"), key)
+        for uid in targets:
+            self._enqueue(uid, frame, key, replayable)
+        # Sockets held by other workers are reached through the backplane.
+        if self.backplane.distributed:
+            await self.backplane.publish(list(recipients), frame.text, frame.message_id, key, replayable)
+
+    def _on_remote_event(
+        self,
+        user_ids: List[str],
+        text: str,
+        message_id: Optional[str],
+        key,
+        replayable: bool = True,
+    ) -> None:
+        frame = OutboundFrame(text, message_id)
+        for uid in user_ids:
+            self._enqueue(uid, frame, key, replayable)
+
+    def _on_control(self, origin: str, payload: Dict[str, Any]) -> None:
+        prefix = str(payload.get("t", "")).split("_", 1)[0]
+        handler = self._control_handlers.get(prefix)
+        if handler is not None:
+            handler(origin, payload)
+
+    def _enqueue(self, user_id: str, frame: OutboundFrame, key, replayable: bool) -> None:
+        if replayable and self.replay.tracks(user_id):
+            frame = self.replay.record(user_id, frame)
+        for conn in self.active_connections.get(user_id, ()):
+            sender = self._senders.get(conn)
+            if sender is not None:
+                sender.enqueue(frame, key)
+
+    def stats(self) -> Dict[str, Any]:
+        senders = list(self._senders.values())
+        return {
+            "backplane": self.backplane.stats(),
+            "presence": self.presence.stats(),
+            "replay": self.replay.stats(),
+            "connections": len(senders),
+            "users": len(self.active_connections),
+            "queued_frames": sum(s.queue_depth for s in senders),
+            "rejected": dict(self.rejected),
+            "inbound": dict(self.inbound),
+            **{
+                f"{name}_total": self._retired[name] + sum(getattr(s, name) for s in senders)
+                for name in self._retired
+            },
+        }
+
+    @staticmethod
+    def _record_delivery(user_id: str, frame: OutboundFrame) -> None:
+        if frame.message_id:
+            # Persisted in bulk by the background receipt writer
+            delivery_receipts.enqueue(frame.message_id, user_id)
 
 manager = ConnectionManager()
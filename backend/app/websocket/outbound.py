@@ -0,0 +1,154 @@
+import asyncio
+from collections import deque
+from typing import Callable, Deque, Hashable, Optional, Tuple
+
+from fastapi import WebSocket
+
+from app.websocket.encoding import OutboundFrame
+
+DROP_OLDEST = "drop_oldest"
+DISCONNECT = "disconnect"
+COALESCE = "coalesce"
+OVERFLOW_POLICIES = (DROP_OLDEST, DISCONNECT, COALESCE)
+
+# Close code sent to a consumer that cannot keep up ("Try Again Later")
+SLOW_CONSUMER_CLOSE_CODE = 1013
+
+# Ephemeral events where only the latest frame matters; used by the coalesce policy.
+# Read receipts are not here: each one carries its own batch of message ids.
+_COALESCE_FIELDS = {
+    "typing_start": ("typing", "conversation_id", "user_id"),
+    "typing_stop": ("typing", "conversation_id", "user_id"),
+    "presence_update": ("presence", "user_id"),
+    "message_reaction_updated": ("reaction", "message_id"),
+}
+
+
+# Kinds that describe transient state; they are not sequenced or replayed on resume.
+_EPHEMERAL_KINDS = {"typing", "presence"}
+# Events that are never replayed but must not be coalesced either: streamed reply
+# pieces are appended by the client, and the stored reply follows as new_message.
+_UNSEQUENCED_EVENTS = {"message_delta"}
+
+
+def coalesce_key(message: dict) -> Optional[Hashable]:
+    fields = _COALESCE_FIELDS.get(message.get("event"))
+    if not fields:
+        return None
+    kind, *names = fields
+    return (kind, *(message.get(name) for name in names))
+
+
+def is_replayable(event: Optional[str], key: Optional[Hashable]) -> bool:
+    """Whether an event with this name and coalesce key belongs in the resume buffer."""
+    if event in _UNSEQUENCED_EVENTS:
+        return False
+    return key is None or key[0] not in _EPHEMERAL_KINDS
+
+
+class SocketSender:
+    """Bounded outbound queue plus a writer task for a single WebSocket.
+
+    ``enqueue`` never awaits the network, so a slow client only ever delays its
+    own frames. When the queue is full the configured overflow policy decides
+    whether to drop the oldest frame, replace an older frame for the same
+    ephemeral state (coalesce), or close the slow consumer.
+    """
+
+    def __init__(
+        self,
+        websocket: WebSocket,
+        max_queue: int,
+        overflow_policy: str = DROP_OLDEST,
+        on_sent: Callable[[OutboundFrame], None] | None = None,
+    ) -> None:
+        if overflow_policy not in OVERFLOW_POLICIES:
+            raise ValueError(f"Unknown overflow policy: {overflow_policy}")
+        self.websocket = websocket
+        self.max_queue = max_queue
+        self.overflow_policy = overflow_policy
+        self.on_sent = on_sent
+        self._queue: Deque[Tuple[Optional[Hashable], OutboundFrame]] = deque()
+        self._ready = asyncio.Event()
+        self._task: asyncio.Task | None = None
+        self.closed = False
+
+        self.sent = 0
+        self.dropped = 0
+        self.coalesced = 0
+        self.send_errors = 0
+
+    @property
+    def queue_depth(self) -> int:
+        return len(self._queue)
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    def close(self) -> None:
+        self.closed = True
+        self._queue.clear()
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+        self._task = None
+
+    def enqueue(self, frame: OutboundFrame, key: Optional[Hashable] = None) -> bool:
+        """Queue a frame for this socket. Returns False if it was not queued."""
+        if self.closed:
+            return False
+
+        if len(self._queue) >= self.max_queue:
+            if not self._handle_overflow(key):
+                return False
+
+        self._queue.append((key, frame))
+        self._ready.set()
+        return True
+
+    def _handle_overflow(self, key: Optional[Hashable]) -> bool:
+        if self.overflow_policy == DISCONNECT:
+            self.dropped += 1
+            self.closed = True
+            self._queue.clear()
+            asyncio.get_running_loop().create_task(self._close_slow_consumer())
+            return False
+
+        if self.overflow_policy == COALESCE:
+            victim = None
+            if key is not None:
+                victim = next((item for item in self._queue if item[0] == key), None)
+            if victim is None:
+                victim = next((item for item in self._queue if item[0] is not None), None)
+            if victim is not None:
+                self._queue.remove(victim)
+                self.coalesced += 1
+                return True
+
+        self._queue.popleft()
+        self.dropped += 1
+        return True
+
+    async def _close_slow_consumer(self) -> None:
+        try:
+            await self.websocket.close(code=SLOW_CONSUMER_CLOSE_CODE)
+        except Exception:
+            pass
+
+    async def _run(self) -> None:
+        while not self.closed:
+            await self._ready.wait()
+            while self._queue and not self.closed:
+                _, frame = self._queue.popleft()
+                try:
+                    await self.websocket.send_text(frame.text)
+                except Exception:
+                    # The receive loop sees the broken socket and disconnects it.
+                    self.send_errors += 1
+                    self.closed = True
+                    self._queue.clear()
+                    return
+                self.sent += 1
+                if self.on_sent is not None:
+                    self.on_sent(frame)
+            self._ready.clear()
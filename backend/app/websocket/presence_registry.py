@@ -0,0 +1,179 @@
+import asyncio
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, Iterable, List, Optional, Set
+
+from app.core.config import settings
+from app.websocket.backplane import Backplane
+
+_DELTA = "presence_delta"
+_SNAPSHOT = "presence_snapshot"
+_SYNC = "presence_sync"
+_BYE = "presence_bye"
+
+# Called for a user left with no connections when a dead worker expires: (user_id)
+OfflineHandler = Callable[[str], Awaitable[None]]
+
+
+class PresenceRegistry:
+    """Cluster-wide WebSocket connection counts per user.
+
+    Each worker tracks its own sockets and gossips them over the backplane:
+    a delta whenever a user's local count changes, plus a full snapshot every
+    ``heartbeat_interval`` seconds that doubles as the worker's heartbeat.
+    Workers that stay silent for ``ttl`` seconds are treated as dead and their
+    connections no longer count; ``on_offline`` then runs, on one worker only,
+    for each of their users not connected anywhere else. Gossip is published
+    in order by a single task, so a remote worker never applies a stale count
+    after a newer one. All lookups are answered from memory.
+    """
+
+    def __init__(
+        self,
+        backplane: Backplane,
+        heartbeat_interval: float = settings.WS_PRESENCE_HEARTBEAT_SECONDS,
+        ttl: float = settings.WS_PRESENCE_TTL_SECONDS,
+        on_offline: Optional[OfflineHandler] = None,
+    ) -> None:
+        self.backplane = backplane
+        self.on_offline = on_offline
+        self.heartbeat_interval = heartbeat_interval
+        self.ttl = ttl
+        self.local: Dict[str, int] = {}
+        # worker_id -> {"seen": monotonic timestamp, "counts": {user_id: connections}}
+        self.remote: Dict[str, Dict[str, Any]] = {}
+        self._task: Optional[asyncio.Task] = None
+        # User ids whose count is due to be published; None stands for a full snapshot
+        self._outbox: Deque[Optional[str]] = deque()
+        self._sender: Optional[asyncio.Task] = None
+        self.expired_workers = 0
+
+    async def start(self) -> None:
+        if self.backplane.distributed:
+            await self.backplane.publish_control({"t": _SYNC})
+            self._enqueue(None)
+        self._task = asyncio.create_task(self._heartbeat())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._sender is not None:
+            self._sender.cancel()
+            self._sender = None
+        self._outbox.clear()
+        if self.backplane.distributed:
+            await self.backplane.publish_control({"t": _BYE})
+
+    def add(self, user_id: str) -> int:
+        self.local[user_id] = self.local.get(user_id, 0) + 1
+        self._publish_delta(user_id)
+        return self.connection_count(user_id)
+
+    def remove(self, user_id: str) -> int:
+        count = self.local.get(user_id, 0) - 1
+        if count > 0:
+            self.local[user_id] = count
+        else:
+            self.local.pop(user_id, None)
+        self._publish_delta(user_id)
+        return self.connection_count(user_id)
+
+    def connection_count(self, user_id: str) -> int:
+        total = self.local.get(user_id, 0)
+        for worker in self._live_workers():
+            total += worker["counts"].get(user_id, 0)
+        return total
+
+    def is_online(self, user_id: str) -> bool:
+        return self.connection_count(user_id) > 0
+
+    def are_online(self, user_ids: Iterable[str]) -> Set[str]:
+        """Return the subset of ``user_ids`` connected to any live worker."""
+        wanted = set(user_ids)
+        online = {uid for uid in wanted if self.local.get(uid)}
+        for worker in self._live_workers():
+            counts = worker["counts"]
+            online.update(uid for uid in wanted - online if counts.get(uid))
+        return online
+
+    def on_control(self, origin: str, payload: Dict[str, Any]) -> None:
+        kind = payload.get("t")
+        if kind == _SYNC:
+            self._enqueue(None)
+        elif kind == _BYE:
+            self.remote.pop(origin, None)
+        elif kind == _SNAPSHOT:
+            self.remote[origin] = {"seen": time.monotonic(), "counts": dict(payload.get("c") or {})}
+        elif kind == _DELTA:
+            worker = self.remote.setdefault(origin, {"seen": time.monotonic(), "counts": {}})
+            worker["seen"] = time.monotonic()
+            if payload.get("n"):
+                worker["counts"][payload["u"]] = payload["n"]
+            else:
+                worker["counts"].pop(payload["u"], None)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "local_users": len(self.local),
+            "live_workers": len(self._live_workers()),
+            "expired_workers": self.expired_workers,
+        }
+
+    def _live_workers(self):
+        cutoff = time.monotonic() - self.ttl
+        return [w for w in self.remote.values() if w["seen"] >= cutoff]
+
+    def _expire_dead_workers(self) -> List[str]:
+        """Forget silent workers; return their users that are now offline everywhere."""
+        cutoff = time.monotonic() - self.ttl
+        orphaned: Set[str] = set()
+        for worker_id in [wid for wid, w in self.remote.items() if w["seen"] < cutoff]:
+            orphaned.update(self.remote.pop(worker_id)["counts"])
+            self.expired_workers += 1
+        return [uid for uid in orphaned if not self.is_online(uid)]
+
+    def _publish_delta(self, user_id: str) -> None:
+        self._enqueue(user_id)
+
+    def _enqueue(self, user_id: Optional[str]) -> None:
+        if not self.backplane.distributed:
+            return
+        self._outbox.append(user_id)
+        if self._sender is None or self._sender.done():
+            try:
+                self._sender = asyncio.get_running_loop().create_task(self._drain_outbox())
+            except RuntimeError:
+                self._outbox.clear()
+
+    async def _drain_outbox(self) -> None:
+        while self._outbox:
+            user_id = self._outbox.popleft()
+            # Counts are read when sent, so a late message still carries the current value
+            if user_id is None:
+                payload = {"t": _SNAPSHOT, "c": dict(self.local)}
+            else:
+                payload = {"t": _DELTA, "u": user_id, "n": self.local.get(user_id, 0)}
+            try:
+                await self.backplane.publish_control(payload)
+            except Exception as e:
+                print(f"Error publishing presence: {e}")
+
+    async def _heartbeat(self) -> None:
+        while True:
+            await asyncio.sleep(self.heartbeat_interval)
+            offline = self._expire_dead_workers()
+            # Every worker sees the expiry; the one with the lowest id announces it
+            if offline and self.on_offline is not None and self.backplane.worker_id == min(
+                [self.backplane.worker_id, *self.remote]
+            ):
+                for user_id in offline:
+                    try:
+                        await self.on_offline(user_id)
+                    except Exception as e:
+                        print(f"Error announcing {user_id} offline: {e}")
+            self._enqueue(None)
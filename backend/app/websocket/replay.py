@@ -0,0 +1,111 @@
+import time
+import uuid
+from collections import OrderedDict, deque
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+from app.core.config import settings
+from app.websocket.encoding import OutboundFrame
+
+
+class _UserLog:
+    __slots__ = ("seq", "frames")
+
+    def __init__(self, size: int) -> None:
+        self.seq = 0
+        # (seq, stamped frame), oldest first
+        self.frames: Deque[Tuple[int, OutboundFrame]] = deque(maxlen=size)
+
+
+class ReplayBuffer:
+    """Per-user event sequence numbers and a ring buffer of recent events.
+
+    Every replayable event sent to a user is stamped with the next ``seq``
+    for that user and kept in a ring of the last ``size`` events. The log
+    outlives the user's last socket by ``retention`` seconds so a client
+    that reconnects with its last seen ``seq`` gets exactly the gap.
+
+    Sequences are per worker; ``epoch`` identifies this process so a client
+    that lands on another worker (or a restarted one) is told to resync
+    instead of being handed a gap from a different sequence.
+    """
+
+    def __init__(
+        self,
+        size: int = settings.WS_RESUME_BUFFER_SIZE,
+        retention: float = settings.WS_RESUME_RETENTION_SECONDS,
+    ) -> None:
+        self.size = size
+        self.retention = retention
+        self.epoch = uuid.uuid4().hex
+        self._logs: Dict[str, _UserLog] = {}
+        # Users without sockets on this worker -> monotonic time their last socket left
+        self._detached: "OrderedDict[str, float]" = OrderedDict()
+        self.resumed = 0
+        self.replayed = 0
+        self.resyncs = 0
+
+    def tracks(self, user_id: str) -> bool:
+        return user_id in self._logs
+
+    def record(self, user_id: str, frame: OutboundFrame) -> OutboundFrame:
+        """Stamp ``frame`` with the user's next sequence number and keep it."""
+        log = self._logs[user_id]
+        log.seq += 1
+        # Frames are JSON objects: splice the field in instead of re-encoding per user
+        stamped = OutboundFrame(f'{{"seq":{log.seq},{frame.text[1:]}', frame.message_id)
+        log.frames.append((log.seq, stamped))
+        return stamped
+
+    def attach(self, user_id: str, resume: Optional[Tuple[str, int]] = None) -> List[OutboundFrame]:
+        """Start (or keep) the user's log; returns the frames to send first on the new socket.
+
+        That is a ``session`` event with the epoch and current sequence, then
+        either the events after ``resume``'s sequence or ``resync_required``
+        when they are no longer available.
+        """
+        self._purge()
+        self._detached.pop(user_id, None)
+        log = self._logs.get(user_id)
+        if log is None:
+            log = self._logs[user_id] = _UserLog(self.size)
+
+        frames = [OutboundFrame.from_event({"event": "session", "epoch": self.epoch, "seq": log.seq})]
+        if resume is None:
+            return frames
+
+        epoch, last_seq = resume
+        oldest = log.frames[0][0] if log.frames else log.seq + 1
+        if epoch != self.epoch or last_seq > log.seq or last_seq < oldest - 1:
+            self.resyncs += 1
+            frames.append(OutboundFrame.from_event({"event": "resync_required", "seq": log.seq}))
+            return frames
+
+        gap = [frame for seq, frame in log.frames if seq > last_seq]
+        self.resumed += 1
+        self.replayed += len(gap)
+        return frames + gap
+
+    def detach(self, user_id: str) -> None:
+        """The user's last local socket closed; keep the log for ``retention`` seconds."""
+        if user_id in self._logs:
+            self._detached[user_id] = time.monotonic()
+            self._detached.move_to_end(user_id)
+        self._purge()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "users": len(self._logs),
+            "detached_users": len(self._detached),
+            "resumed": self.resumed,
+            "replayed": self.replayed,
+            "resyncs": self.resyncs,
+        }
+
+    def _purge(self) -> None:
+        cutoff = time.monotonic() - self.retention
+        while self._detached:
+            user_id, detached_at = next(iter(self._detached.items()))
+            if detached_at > cutoff:
+                break
+            del self._detached[user_id]
+            self._logs.pop(user_id, None)
@@ -1,38 +1,106 @@
-import json
+from typing import Optional, Tuple
 
-from fastapi import WebSocket, WebSocketDisconnect, APIRouter
+from fastapi import WebSocket, WebSocketDisconnect, APIRouter, HTTPException, status
+from app.services.auth.get_current_user import get_user_id_from_token
+from app.websocket.heartbeat import HeartbeatMonitor
+from app.websocket.inbound import InboundLimiter, parse_frame
 from app.websocket.manager import manager
-from app.websocket.events.typing import handle_typing
+from app.websocket.events.typing import clear_typing, handle_typing
 from app.websocket.events.presence import handle_presence_change
 
 router = APIRouter()
 
+
+async def _went_offline(user_id: str) -> None:
+    await clear_typing(user_id)
+    await handle_presence_change(user_id, False)
+
+
+heartbeat = HeartbeatMonitor(manager, on_offline=_went_offline)
+# Users whose only sockets were on a worker that died without disconnecting them
+manager.presence.on_offline = _went_offline
+
+
+def _token(websocket: WebSocket) -> Optional[str]:
+    # Browsers cannot set headers on a WebSocket, so the token may come in the query string
+    auth = websocket.headers.get("authorization", "")
+    if auth.lower().startswith("bearer "):
+        return auth[7:].strip()
+    return websocket.query_params.get("token")
+
+
+def _resume_point(websocket: WebSocket) -> Optional[Tuple[str, int]]:
+    epoch = websocket.query_params.get("resume_epoch")
+    last_seq = websocket.query_params.get("last_seq")
+    if not epoch or last_seq is None:
+        return None
+    try:
+        return epoch, int(last_seq)
+    except ValueError:
+        return None
+
+
+def _authenticated_user_id(websocket: WebSocket) -> Optional[str]:
+    token = _token(websocket)
+    if not token:
+        return None
+    try:
+        return str(get_user_id_from_token(token))
+    except HTTPException:
+        return None
+
+
 @router.websocket("/ws/{user_id}")
 async def websocket_endpoint(websocket: WebSocket, user_id: str) -> None:
+    # Identity comes from the access token; the path must name the same user.
+    # Refusals happen before accept(), so they cost no more than the handshake.
+    if _authenticated_user_id(websocket) != user_id:
+        manager.rejected["auth"] += 1
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+    if not manager.admit(user_id):
+        await websocket.close(code=status.WS_1013_TRY_AGAIN_LATER)
+        return
+
     became_online = await manager.connect(user_id, websocket)
+    manager.start_session(user_id, websocket, _resume_point(websocket))
+    heartbeat.register(user_id, websocket)
     if became_online:
         await handle_presence_change(user_id, True)
 
+    limiter = InboundLimiter()
     try:
         while True:
             raw = await websocket.receive_text()
-            data = json.loads(raw)
+            heartbeat.touch(websocket)
+            if not limiter.allow():
+                manager.inbound["rate_limited"] += 1
+                if limiter.should_close:
+                    manager.inbound["abusive_closed"] += 1
+                    await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+                    break
+                continue
+
+            data = parse_frame(raw)
+            if data is None:
+                manager.inbound["invalid"] += 1
+                continue
 
             event = data.get("event")
 
+            if event == "pong":
+                continue
+
             if event == "typing_start":
                 await handle_typing(user_id, data, event)
 
             elif event == "typing_stop":
                 await handle_typing(user_id, data, event)
-            
 
     except WebSocketDisconnect:
-        went_offline = manager.disconnect(user_id, websocket)
-        if went_offline:
-            await handle_presence_change(user_id, False)
-    except Exception:
-        went_offline = manager.disconnect(user_id, websocket)
-        if went_offline:
-            await handle_presence_change(user_id, False)
-        raise
\ No newline at end of file
+        pass
+    finally:
+        heartbeat.unregister(websocket)
+        # False if the heartbeat already reaped this socket and ran the offline transition
+        if manager.disconnect(user_id, websocket):
+            await _went_offline(user_id)
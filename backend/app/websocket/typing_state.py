@@ -0,0 +1,123 @@
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from app.core.config import settings
+
+# Called when a typing state lapses without an explicit stop: (conversation_id, user_id)
+ExpiryHandler = Callable[[str, str], Awaitable[None]]
+
+
+class TypingStateEngine:
+    """Per-(conversation, user) typing state with expiry and rate limiting.
+
+    ``start`` and ``stop`` return True only when the state actually changes,
+    so callers broadcast transitions rather than every inbound frame. A start
+    for a user who is already typing just extends the expiry. States that are
+    not refreshed within ``ttl`` seconds lapse and ``on_expire`` is called.
+
+    Each user has a token bucket for idle -> typing transitions; starts beyond
+    it are ignored. Stops are never limited since each one follows an accepted
+    start.
+    """
+
+    def __init__(
+        self,
+        on_expire: Optional[ExpiryHandler] = None,
+        ttl: float = settings.WS_TYPING_TTL_SECONDS,
+        rate: float = settings.WS_TYPING_RATE_PER_SECOND,
+        burst: int = settings.WS_TYPING_RATE_BURST,
+    ) -> None:
+        self.on_expire = on_expire
+        self.ttl = ttl
+        self.rate = rate
+        self.burst = burst
+        # (conversation_id, user_id) -> monotonic expiry time
+        self._typing: Dict[Tuple[str, str], float] = {}
+        # user_id -> (tokens, last refill time)
+        self._buckets: Dict[str, Tuple[float, float]] = {}
+        self._sweeper: Optional[asyncio.Task] = None
+        self.transitions = 0
+        self.refreshes = 0
+        self.rate_limited = 0
+        self.expired = 0
+
+    def start(self, conversation_id: str, user_id: str) -> bool:
+        key = (conversation_id, user_id)
+        now = time.monotonic()
+        if key in self._typing:
+            self._typing[key] = now + self.ttl
+            self.refreshes += 1
+            return False
+        if not self._take_token(user_id, now):
+            self.rate_limited += 1
+            return False
+        self._typing[key] = now + self.ttl
+        self.transitions += 1
+        self._ensure_sweeper()
+        return True
+
+    def stop(self, conversation_id: str, user_id: str) -> bool:
+        if self._typing.pop((conversation_id, user_id), None) is None:
+            return False
+        self.transitions += 1
+        return True
+
+    def clear_user(self, user_id: str) -> List[str]:
+        """Drop every typing state of ``user_id``; returns the affected conversations."""
+        conversations = [conv for conv, uid in self._typing if uid == user_id]
+        for conv in conversations:
+            del self._typing[(conv, user_id)]
+        self._buckets.pop(user_id, None)
+        return conversations
+
+    def is_typing(self, conversation_id: str, user_id: str) -> bool:
+        expires = self._typing.get((conversation_id, user_id))
+        return expires is not None and expires > time.monotonic()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "typing": len(self._typing),
+            "transitions": self.transitions,
+            "refreshes": self.refreshes,
+            "rate_limited": self.rate_limited,
+            "expired": self.expired,
+        }
+
+    def _take_token(self, user_id: str, now: float) -> bool:
+        tokens, last = self._buckets.get(user_id, (float(self.burst), now))
+        tokens = min(float(self.burst), tokens + (now - last) * self.rate)
+        if tokens < 1.0:
+            self._buckets[user_id] = (tokens, now)
+            return False
+        self._buckets[user_id] = (tokens - 1.0, now)
+        return True
+
+    def _ensure_sweeper(self) -> None:
+        loop = asyncio.get_running_loop()
+        if self._sweeper is None or self._sweeper.done() or self._sweeper.get_loop() is not loop:
+            self._sweeper = loop.create_task(self._sweep())
+
+    async def _sweep(self) -> None:
+        # Runs only while someone is typing
+        while self._typing:
+            await asyncio.sleep(max(0.0, min(self._typing.values()) - time.monotonic()))
+            now = time.monotonic()
+            for key in [k for k, expires in self._typing.items() if expires <= now]:
+                # May have been refreshed or stopped while an earlier expiry was broadcast
+                expires = self._typing.get(key)
+                if expires is None or expires > time.monotonic():
+                    continue
+                del self._typing[key]
+                self.expired += 1
+                self.transitions += 1
+                if self.on_expire is not None:
+                    try:
+                        await self.on_expire(*key)
+                    except Exception as e:
+                        print(f"Error expiring typing state: {e}")
+        # Buckets that have refilled completely are recreated on demand
+        if self.rate > 0:
+            now = time.monotonic()
+            full_after = self.burst / self.rate
+            self._buckets = {uid: b for uid, b in self._buckets.items() if now - b[1] < full_after}
@@ -0,0 +1,81 @@
+"""Micro-benchmark: JSON encoding cost per recipient of a group broadcast.
+
+"before" re-encodes the event for every socket, like ``send_json`` per
+connection did. "after" encodes it once with ``encode_event`` and shares the
+text frame. Install orjson to benchmark the fast path. Run from the repo root:
+
+    python backend/scripts/bench_broadcast_encoding.py
+"""
+import json
+import sys
+import timeit
+import uuid
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+if str(BACKEND_DIR) not in sys.path:
+    sys.path.insert(0, str(BACKEND_DIR))
+
+from app.websocket import encoding  # noqa: E402
+
+SOCKETS_PER_USER = 2
+GROUP_SIZES = (2, 10, 50, 200)
+
+
+def _events() -> dict:
+    conv_id = str(uuid.uuid4())
+    user_id = str(uuid.uuid4())
+    return {
+        "new_message": {
+            "event": "new_message",
+            "conversation_id": conv_id,
+            "message": {
+                "id": str(uuid.uuid4()),
+                "body": "Lorem ipsum dolor sit amet, consectetur adipiscing elit. " * 4,
+                "sender_id": user_id,
+                "sender_name": "Bench User",
+            },
+        },
+        "message_read": {
+            "event": "message_read",
+            "conversation_id": conv_id,
+            "message_id": str(uuid.uuid4()),
+            "message_ids": [str(uuid.uuid4()) for _ in range(20)],
+            "user_id": user_id,
+            "user_name": "Bench User",
+        },
+        "presence_update": {
+            "event": "presence_update",
+            "user_id": user_id,
+            "is_online": True,
+            "last_seen": None,
+        },
+    }
+
+
+def _before(event: dict, sockets: int) -> None:
+    for _ in range(sockets):
+        json.dumps(event, separators=(",", ":"), ensure_ascii=False)
+
+
+def _after(event: dict, sockets: int) -> None:
+    encoding.encode_event(event)
+
+
+def main() -> None:
+    encoder = "orjson" if encoding.orjson is not None else "json"
+    print(f"encoder after: {encoder}, sockets per user: {SOCKETS_PER_USER}")
+    print(f"{'event':<16}{'group':>6}{'before us/rcpt':>16}{'after us/rcpt':>15}{'speedup':>9}")
+    for name, event in _events().items():
+        for group in GROUP_SIZES:
+            sockets = group * SOCKETS_PER_USER
+            number = max(1, 20000 // sockets)
+            before = min(timeit.repeat(lambda: _before(event, sockets), number=number, repeat=5))
+            after = min(timeit.repeat(lambda: _after(event, sockets), number=number, repeat=5))
+            before_us = before / number / group * 1e6
+            after_us = after / number / group * 1e6
+            print(f"{name:<16}{group:>6}{before_us:>16.3f}{after_us:>15.3f}{before_us / after_us:>8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
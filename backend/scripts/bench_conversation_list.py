@@ -0,0 +1,224 @@
+"""Benchmark: query count and latency of the conversation list.
+
+Seeds one user with ``--conversations`` conversations (a mix of direct chats
+and groups, ``--messages`` messages each, half of them read), then builds the
+list two ways:
+
+- "before": one summary per conversation with the per-row lookups
+  ``list_conversations`` used to make (last read id, unread count,
+  participant ids, one user per participant, other participant), kept
+  here since the repository no longer has them;
+- "after": ``ConversationService.list_conversations``.
+
+Run from the repo root against a migrated database (DATABASE_URL):
+
+    python backend/scripts/bench_conversation_list.py --conversations 200
+"""
+import argparse
+import asyncio
+import statistics
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+if str(BACKEND_DIR) not in sys.path:
+    sys.path.insert(0, str(BACKEND_DIR))
+
+from sqlalchemy import delete, event, func, insert, select, update  # noqa: E402
+
+from app.db.repositories.conversation_participants.unread_count import reconcile_unread_counts  # noqa: E402
+from app.db.repositories.conversation_repo import ConversationRepository  # noqa: E402
+from app.db.session import AsyncSessionLocal, engine  # noqa: E402
+from app.models.conversation_participants import ConversationsParticipants  # noqa: E402
+from app.models.conversations import Conversations  # noqa: E402
+from app.models.messages import Message  # noqa: E402
+from app.models.users import User  # noqa: E402
+from app.services.conversation_service import ConversationService  # noqa: E402
+
+BENCH_DOMAIN = "bench-conversations.local"
+
+
+async def seed(conversations: int, messages: int) -> uuid.UUID:
+    me = uuid.uuid4()
+    friends = [uuid.uuid4() for _ in range(20)]
+    users = [{"id": uid, "email": f"{uid}@{BENCH_DOMAIN}", "display_name": f"Bench {str(uid)[:6]}"} for uid in [me, *friends]]
+
+    conv_rows, part_rows, msg_rows, last_reads = [], [], [], []
+    start = datetime.utcnow() - timedelta(days=1)
+    for i in range(conversations):
+        conv_id = uuid.uuid4()
+        members = [me, friends[i % len(friends)]]
+        if i % 4 == 0:
+            members += [friends[(i + k) % len(friends)] for k in (1, 2)]
+        conv_msgs = []
+        for n in range(messages):
+            created = start + timedelta(seconds=i * messages + n)
+            conv_msgs.append({
+                "id": uuid.uuid4(),
+                "conversation_id": conv_id,
+                "sender_id": members[n % len(members)],
+                "body": f"bench message {n}",
+                "created_at": created,
+            })
+        conv_rows.append({
+            "id": conv_id,
+            "type": "group" if len(members) > 2 else "direct",
+            "created_at": start,
+            "last_message_preview": conv_msgs[-1]["body"] if conv_msgs else None,
+            "last_message_created_at": conv_msgs[-1]["created_at"] if conv_msgs else None,
+        })
+        part_rows += [{"id": uuid.uuid4(), "conversation_id": conv_id, "user_id": uid} for uid in members]
+        msg_rows += conv_msgs
+        if conv_msgs:
+            last_reads.append((conv_id, conv_msgs[len(conv_msgs) // 2]["id"]))
+
+    async with AsyncSessionLocal() as db:
+        await db.execute(insert(User), users)
+        await db.execute(insert(Conversations), conv_rows)
+        await db.execute(insert(ConversationsParticipants), part_rows)
+        if msg_rows:
+            await db.execute(insert(Message), msg_rows)
+        for conv_id, message_id in last_reads:
+            await db.execute(
+                update(ConversationsParticipants)
+                .where(ConversationsParticipants.conversation_id == conv_id, ConversationsParticipants.user_id == me)
+                .values(last_read_message_id=message_id)
+            )
+        await db.commit()
+        # Rows were inserted directly, so fill in the materialized counters
+        await reconcile_unread_counts(db)
+    return me
+
+
+async def cleanup() -> None:
+    async with AsyncSessionLocal() as db:
+        users = User.__table__
+        bench_users = users.select().with_only_columns(users.c.id).where(users.c.email.like(f"%@{BENCH_DOMAIN}"))
+        convs = (
+            ConversationsParticipants.__table__.select()
+            .with_only_columns(ConversationsParticipants.conversation_id)
+            .where(ConversationsParticipants.user_id.in_(bench_users))
+        )
+        await db.execute(update(ConversationsParticipants).where(ConversationsParticipants.conversation_id.in_(convs)).values(last_read_message_id=None))
+        await db.execute(delete(Message).where(Message.conversation_id.in_(convs)))
+        conv_ids = list((await db.execute(convs)).scalars().all())
+        await db.execute(delete(ConversationsParticipants).where(ConversationsParticipants.conversation_id.in_(conv_ids)))
+        await db.execute(delete(Conversations).where(Conversations.id.in_(conv_ids)))
+        await db.execute(delete(User).where(User.email.like(f"%@{BENCH_DOMAIN}")))
+        await db.commit()
+
+
+async def _conversations_for_user(db, user_id: uuid.UUID) -> list:
+    stmt = (
+        select(Conversations)
+        .join(ConversationsParticipants)
+        .where(ConversationsParticipants.user_id == user_id)
+        .order_by(Conversations.last_message_created_at.desc())
+    )
+    return (await db.execute(stmt)).scalars().all()
+
+
+async def _last_read_message_id(db, conversation_id: uuid.UUID, user_id: uuid.UUID):
+    stmt = select(ConversationsParticipants.last_read_message_id).where(
+        ConversationsParticipants.conversation_id == conversation_id,
+        ConversationsParticipants.user_id == user_id,
+    )
+    return (await db.execute(stmt)).scalar()
+
+
+async def _count_unread(db, conversation_id: uuid.UUID, user_id: uuid.UUID, last_read_message_id) -> int:
+    base = select(func.count()).select_from(Message).where(
+        Message.conversation_id == conversation_id,
+        Message.sender_id != user_id,
+        Message.deleted_for_everyone == False,  # noqa: E712
+    )
+    if last_read_message_id:
+        ts = (await db.execute(select(Message.created_at).where(Message.id == last_read_message_id))).scalar()
+        if ts:
+            base = base.where(Message.created_at > ts)
+    return (await db.execute(base)).scalar() or 0
+
+
+async def _other_participant(db, conversation_id: uuid.UUID, user_id: uuid.UUID):
+    stmt = select(ConversationsParticipants.user_id).where(
+        ConversationsParticipants.conversation_id == conversation_id,
+        ConversationsParticipants.user_id != user_id,
+    )
+    return (await db.execute(stmt)).scalar()
+
+
+async def _user(db, user_id: uuid.UUID):
+    return (await db.execute(select(User).where(User.id == user_id))).scalars().first()
+
+
+async def list_before(repo: ConversationRepository, user_id: uuid.UUID) -> list:
+    db = repo.db
+    summaries = []
+    for conv in await _conversations_for_user(db, user_id):
+        last_read_id = await _last_read_message_id(db, conv.id, user_id)
+        unread = await _count_unread(db, conv.id, user_id, last_read_id)
+        names = []
+        for pid in await repo.get_participant_ids(conv.id):
+            u = await _user(db, pid)
+            names.append(u.display_name if u else "Unknown")
+        if conv.type == "direct":
+            other_id = await _other_participant(db, conv.id, user_id)
+            await _user(db, other_id)
+        summaries.append((conv.id, unread, names))
+    return summaries
+
+
+async def list_after(repo: ConversationRepository, user_id: uuid.UUID) -> list:
+    return await ConversationService(repo).list_conversations(user_id)
+
+
+async def measure(name: str, fn, user_id: uuid.UUID, repeat: int) -> None:
+    statements = []
+
+    def _count(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    timings = []
+    for _ in range(repeat):
+        statements.clear()
+        async with AsyncSessionLocal() as db:
+            event.listen(engine.sync_engine, "before_cursor_execute", _count)
+            try:
+                started = time.perf_counter()
+                result = await fn(ConversationRepository(db), user_id)
+                timings.append((time.perf_counter() - started) * 1000)
+            finally:
+                event.remove(engine.sync_engine, "before_cursor_execute", _count)
+    timings.sort()
+    p95 = timings[max(0, int(len(timings) * 0.95) - 1)]
+    print(
+        f"{name:<8}{len(result):>8}{len(statements):>10}"
+        f"{statistics.median(timings):>12.1f}{p95:>12.1f}"
+    )
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--conversations", type=int, default=200)
+    parser.add_argument("--messages", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=10)
+    parser.add_argument("--keep", action="store_true", help="Leave the seeded rows in the database")
+    args = parser.parse_args()
+
+    await cleanup()
+    user_id = await seed(args.conversations, args.messages)
+    try:
+        print(f"{'path':<8}{'convs':>8}{'queries':>10}{'p50 ms':>12}{'p95 ms':>12}")
+        await measure("before", list_before, user_id, args.repeat)
+        await measure("after", list_after, user_id, args.repeat)
+    finally:
+        if not args.keep:
+            await cleanup()
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -5,6 +5,7 @@ import asyncio
 from app.db.session import AsyncSessionLocal
 from app.db.repositories.conversation_repo import ConversationRepository
 from app.models.conversations import Conversations
+from app.models.users import User
 from sqlalchemy import select
 
 ROOT = Path(__file__).resolve().parents[2]
@@ -26,7 +27,7 @@ async def list_group_conversations():
             if len(pids) > 2:
                 names = []
                 for pid in pids:
-                    user = await repo.get_user(pid)
+                    user = await db.get(User, pid)
                     names.append(user.display_name if user else "Unknown")
                 groups.append({
                     "id": str(conv.id),
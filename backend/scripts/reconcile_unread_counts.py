@@ -0,0 +1,28 @@
+"""Recompute drifted conversation_participants.unread_count values.
+
+The API keeps the counters up to date and also reconciles them every
+UNREAD_RECONCILE_INTERVAL_SECONDS. Run this after bulk data fixes:
+
+    python backend/scripts/reconcile_unread_counts.py
+"""
+import asyncio
+import sys
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+if str(BACKEND_DIR) not in sys.path:
+    sys.path.insert(0, str(BACKEND_DIR))
+
+from app.services.conversation_participants.unread_reconciler import reconcile_unread_counts_service  # noqa: E402
+
+
+async def main() -> None:
+    repaired = await reconcile_unread_counts_service()
+    if repaired < 0:
+        print("Another worker is reconciling right now; try again later")
+    else:
+        print(f"Repaired {repaired} unread counters")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
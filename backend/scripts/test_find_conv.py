@@ -1,6 +1,6 @@
 import asyncio
 from app.db.session import AsyncSessionLocal
-from app.db.repositories.conversation_repo import ConversationRepository
+from app.db.repositories.conversation_repo import ConversationRepository, participant_set_key
 import uuid
 
 
@@ -12,7 +12,7 @@ async def run():
     ]
     async with AsyncSessionLocal() as db:
         repo = ConversationRepository(db)
-        conv = await repo.find_conversation_by_participant_set(ids)
+        conv = await repo.get_conversation_by_participant_key(participant_set_key(ids))
         print('found:', bool(conv))
         if conv:
             print('conv id:', conv.id)
@@ -13,12 +13,16 @@ import {
   deleteConversation as apiDeleteConversation,
 } from "../lib/api";
 import { mapBackendToMessage, deriveReactionState } from "@/lib/chat/mapBackendToMessage";
+import { formatTime } from "@/lib/chat/formatTime";
 import { useAuthUserId } from "@/features/auth/useAuthSession";
 import { useChatWebSocket } from "./useChatWebSocket";
 import type { ChatInboundEvent, ChatInboundMessage } from "@/lib/chat/realtime";
 
 type TypingEntry = { userId: string; userName?: string };
 
+// Must stay below the server's WS_TYPING_TTL_SECONDS
+const TYPING_KEEPALIVE_MS = 2000;
+
 function sortChatsByTimestamp(chats: Chat[]) {
   return [...chats].sort((a, b) => new Date(b.timestamp).getTime() - new Date(a.timestamp).getTime());
 }
@@ -34,6 +38,8 @@ export function useChatMessages(initialChats: Chat[]) {
   const typingStateRef = useRef<"idle" | "typing">("idle");
   const typingConversationRef = useRef<string | null>(null);
   const typingTimeoutRef = useRef<ReturnType<typeof setTimeout> | null>(null);
+  // When typing_start was last sent; re-sent periodically so the server-side state does not expire
+  const typingSentAtRef = useRef(0);
 
   const selectedChat = useMemo(() => chatsState.find((c) => c.id === selectedChatId) || null, [chatsState, selectedChatId]);
   const typingParticipants = selectedChatId ? typingMap[selectedChatId] ?? [] : [];
@@ -286,6 +292,43 @@ export function useChatMessages(initialChats: Chat[]) {
         );
         break;
       }
+      case "message_delta": {
+        if (typeof conversationId !== "string" || typeof payload.message_id !== "string") return;
+        const messageId = payload.message_id;
+        const delta = typeof payload.delta === "string" ? payload.delta : "";
+        const aborted = payload.aborted === true;
+        // A bot reply being streamed; the stored message replaces it when new_message arrives
+        setChatsState((prev) => {
+          let touched = false;
+          const next = prev.map((chat) => {
+            if (chat.id !== conversationId) return chat;
+            const existing = chat.messages.find((msg) => msg.id === messageId);
+            if (aborted) {
+              if (!existing) return chat;
+              touched = true;
+              return { ...chat, messages: chat.messages.filter((msg) => msg.id !== messageId) };
+            }
+            touched = true;
+            if (existing) {
+              return {
+                ...chat,
+                messages: chat.messages.map((msg) => (msg.id === messageId ? { ...msg, text: msg.text + delta } : msg)),
+              };
+            }
+            const draft: Message = { id: messageId, text: delta, sender: chat.name, time: formatTime(new Date().toISOString()) };
+            return { ...chat, messages: [...chat.messages, draft] };
+          });
+          return touched ? next : prev;
+        });
+        break;
+      }
+      case "resync_required": {
+        // Missed events could not be replayed after a reconnect; reload what is on screen
+        if (selectedChatId) {
+          synchronizeConversationMessages(selectedChatId);
+        }
+        break;
+      }
       default:
         break;
     }
@@ -350,8 +393,9 @@ export function useChatMessages(initialChats: Chat[]) {
     }
 
     const hasContent = messageInput.trim().length > 0;
-    if (hasContent && typingStateRef.current === "idle") {
+    if (hasContent && (typingStateRef.current === "idle" || Date.now() - typingSentAtRef.current > TYPING_KEEPALIVE_MS)) {
       sendRealtimeEvent({ event: "typing_start", conversation_id: selectedChatId });
+      typingSentAtRef.current = Date.now();
       typingStateRef.current = "typing";
       typingConversationRef.current = selectedChatId;
     } else if (!hasContent) {
@@ -1,5 +1,6 @@
 import { useCallback, useEffect, useRef, useState } from 'react';
-import { getChatWebSocketUrl, type ChatInboundEvent, type ChatOutboundEvent } from '@/lib/chat/realtime';
+import { getStoredAccessToken } from '@/features/auth/storage';
+import { getChatWebSocketUrl, type ChatInboundEvent, type ChatOutboundEvent, type ResumePoint } from '@/lib/chat/realtime';
 
 type Status = 'idle' | 'connecting' | 'open' | 'error';
 
@@ -30,9 +31,13 @@ export function useChatWebSocket(userId: string | null | undefined, options: Opt
 
     let stopped = false;
     let reconnectTimer: ReturnType<typeof setTimeout> | null = null;
+    // Last sequenced event seen, so a reconnect only receives what was missed
+    let resume: ResumePoint | null = null;
 
     const connect = () => {
-      const url = getChatWebSocketUrl(userId);
+      // Read on every attempt so reconnects pick up a refreshed token
+      const url = getChatWebSocketUrl(userId, getStoredAccessToken(), resume);
+      const resuming = resume !== null;
       if (!url || stopped) {
         return;
       }
@@ -48,6 +53,21 @@ export function useChatWebSocket(userId: string | null | undefined, options: Opt
       ws.onmessage = (event) => {
         try {
           const data = JSON.parse(event.data) as ChatInboundEvent;
+          if (data.event === 'ping') {
+            // Server heartbeat: sockets that stop answering are reaped
+            ws.send(JSON.stringify({ event: 'pong' }));
+            return;
+          }
+          if (data.event === 'session') {
+            const session = data as Extract<ChatInboundEvent, { event: 'session' }>;
+            // When resuming, the replayed events that follow advance the sequence
+            resume = { epoch: session.epoch, seq: resuming && resume ? resume.seq : session.seq };
+            return;
+          }
+          const seq = (data as { seq?: unknown }).seq;
+          if (resume && typeof seq === 'number') {
+            resume = { ...resume, seq };
+          }
           handlerRef.current?.(data);
         } catch (error) {
           console.warn('[ws] failed to parse event', error);
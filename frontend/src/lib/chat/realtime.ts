@@ -25,13 +25,26 @@ function normalizeBaseUrl(raw?: string | null) {
 
 const derivedWsBase = normalizeBaseUrl(envWsBase ?? envApiBase);
 
-export function getChatWebSocketUrl(userId: string): string | null {
-  if (!userId) return null;
+export type ResumePoint = { epoch: string; seq: number };
+
+export function getChatWebSocketUrl(
+  userId: string,
+  accessToken: string | null | undefined,
+  resume?: ResumePoint | null,
+): string | null {
+  if (!userId || !accessToken) return null;
   if (!derivedWsBase) {
     console.warn('Missing VITE_WS_URL or VITE_API_URL. Cannot open chat websocket.');
     return null;
   }
-  return `${derivedWsBase}/ws/${userId}`;
+  // Browsers cannot send headers with a WebSocket handshake, so the token goes in the query
+  const params = new URLSearchParams({ token: accessToken });
+  if (resume) {
+    // The server replays what was missed since this event, or answers resync_required
+    params.set('resume_epoch', resume.epoch);
+    params.set('last_seq', String(resume.seq));
+  }
+  return `${derivedWsBase}/ws/${userId}?${params.toString()}`;
 }
 
 export type TypingEvent = 'typing_start' | 'typing_stop';
@@ -52,11 +65,14 @@ export type ChatInboundMessage = {
 export type ChatInboundEvent =
   | { event: 'new_message'; conversation_id: string; message: ChatInboundMessage }
   | { event: 'message_edited'; conversation_id: string; message: ChatInboundMessage }
+  | { event: 'message_delta'; conversation_id: string; message_id: string; sender_id: string; delta: string; aborted?: boolean }
   | { event: 'message_deleted'; conversation_id: string; message_id: string; deleted_by?: string; deletor_name?: string }
   | { event: 'message_read'; conversation_id: string; message_id: string; user_id: string; user_name?: string; message_ids?: string[] }
   | { event: 'message_reaction_updated'; conversation_id: string; message_id: string; user_id: string; reactions: Record<string, string[]>; action?: string }
   | { event: 'presence_update'; user_id: string; is_online: boolean; last_seen?: string | null }
   | { event: TypingEvent; conversation_id: string; user_id: string; sender_name?: string }
+  | { event: 'session'; epoch: string; seq: number }
+  | { event: 'resync_required'; seq: number }
   | { event: string; [key: string]: unknown };
 
 export type ChatOutboundEvent = { event: TypingEvent; conversation_id: string };
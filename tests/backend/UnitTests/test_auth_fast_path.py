@@ -0,0 +1,87 @@
+
+import pytest
+from fastapi import HTTPException
+from fastapi.security import HTTPAuthorizationCredentials
+from sqlalchemy import event
+
+from app.core.security import create_access_token
+from app.db.dependencies import get_current_user_id
+from app.db.session import AsyncSessionLocal, engine
+from app.services.auth import get_current_user
+from app.services.auth.user_cache import auth_users
+
+
+def _auth(token):
+    return {"Authorization": f"Bearer {token}"}
+
+
+@pytest.mark.anyio
+async def test_token_claims_and_cached_user_skip_the_users_query(client, ensure_test_users):
+    token = ensure_test_users[0]["token"]
+    user_id = (await client.get("/auth/me", headers=_auth(token))).json()["id"]
+    statements = []
+
+    def _count(conn, cursor, statement, *args):
+        if "FROM users" in statement:
+            statements.append(statement)
+
+    credentials = HTTPAuthorizationCredentials(scheme="Bearer", credentials=token)
+    async with AsyncSessionLocal() as db:
+        event.listen(engine.sync_engine, "before_cursor_execute", _count)
+        try:
+            assert str(await get_current_user_id(credentials, db)) == user_id
+            assert statements == []
+
+            # /auth/me was just served, so the full row comes from the cache
+            assert str((await get_current_user(token, db)).id) == user_id
+            assert statements == []
+
+            auth_users.invalidate(user_id)
+            await get_current_user(token, db)
+            assert len(statements) == 1
+        finally:
+            event.remove(engine.sync_engine, "before_cursor_execute", _count)
+
+
+@pytest.mark.anyio
+async def test_revoked_tokens_are_rejected_on_the_fast_path(client, ensure_test_users):
+    token = ensure_test_users[1]["token"]
+    me = (await client.get("/auth/me", headers=_auth(token))).json()
+    user_id = me["id"]
+    credentials = HTTPAuthorizationCredentials(scheme="Bearer", credentials=token)
+
+    auth_users.revoke(user_id)
+    try:
+        async with AsyncSessionLocal() as db:
+            with pytest.raises(HTTPException) as err:
+                await get_current_user_id(credentials, db)
+            assert err.value.status_code == 401
+        assert (await client.get("/messages/conversations", headers=_auth(token))).status_code == 401
+
+        # Tokens issued after the revocation are accepted, even within the same second
+        fresh = create_access_token(data={"id": user_id, "email": me["email"]})
+        assert (await client.get("/messages/conversations", headers=_auth(fresh))).status_code == 200
+    finally:
+        auth_users._revoked.clear()
+
+
+@pytest.mark.anyio
+async def test_access_token_is_rejected_after_logout(client, ensure_test_users, test_users):
+    user = test_users[3]
+    resp = await client.post("/auth/login", json={"email": user["email"], "password": user["password"]})
+    assert resp.status_code == 200, resp.text
+    tokens = resp.json()
+    assert (await client.get("/auth/me", headers=_auth(tokens["access_token"]))).status_code == 200
+
+    try:
+        resp = await client.post("/auth/logout", json={"refresh_token": tokens["refresh_token"]})
+        assert resp.status_code == 200, resp.text
+        assert (await client.get("/auth/me", headers=_auth(tokens["access_token"]))).status_code == 401
+        assert (await client.get("/messages/conversations", headers=_auth(tokens["access_token"]))).status_code == 401
+
+        # Logging straight back in gives a token that works
+        resp = await client.post("/auth/login", json={"email": user["email"], "password": user["password"]})
+        assert resp.status_code == 200, resp.text
+        assert (await client.get("/auth/me", headers=_auth(resp.json()["access_token"]))).status_code == 200
+    finally:
+        auth_users._revoked.clear()
@@ -0,0 +1,131 @@
+import asyncio
+import json
+import threading
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from app.db.session import AsyncSessionLocal
+from app.services.ai import context as context_module
+from app.services.ai.context import ConversationContext, estimate_tokens
+from app.services.ai.openai_client import OpenAIClient
+
+
+def _auth(token):
+    return {"Authorization": f"Bearer {token}"}
+
+
+class _StubSummarizer(ThreadingHTTPServer):
+    """Local stand-in for the Responses API that answers every request with a summary."""
+
+    daemon_threads = True
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), _SummaryHandler)
+        self.requests = []
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+
+
+class _SummaryHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self):
+        self.server.requests.append(json.loads(self.rfile.read(int(self.headers["Content-Length"]))))
+        body = json.dumps({"output": [{"content": [{"type": "output_text", "text": "They counted sheep."}]}]}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.mark.anyio
+async def test_prompt_stays_in_budget_and_older_history_is_summarized(client, ensure_test_users, monkeypatch):
+    server = _StubSummarizer()
+    monkeypatch.setattr(context_module, "openai_client", OpenAIClient(base_url=f"http://127.0.0.1:{server.server_address[1]}/v1"))
+
+    tokens = {u["email"]: u["token"] for u in ensure_test_users}
+    emails = ["ttt@test.com", "uuu@test.com", "iii@test.com"]
+    ids = []
+    for e in emails:
+        r = await client.get("/auth/me", headers=_auth(tokens[e]))
+        ids.append(r.json()["id"])
+    sender = _auth(tokens[emails[0]])
+    for _ in range(2):
+        rc = await client.post("/messages/new_conversation", headers=sender, json={"participant_ids": ids[1:]})
+        assert rc.status_code == 200, rc.text
+        rlist = await client.get("/messages/conversations", headers=sender)
+        conv_id = next(c["id"] for c in rlist.json() if set(c["participantIds"]) == set(ids))
+        if not next(c for c in rlist.json() if c["id"] == conv_id)["lastMessage"]:
+            break
+        await client.delete(f"/messages/conversations/{conv_id}", headers=sender)
+    conversation_id = uuid.UUID(conv_id)
+
+    async def _send(count, start):
+        for i in range(start, start + count):
+            rm = await client.post(f"/conversations/{conv_id}/messages", headers=sender, params={"body": f"sheep {i} " + "z" * 400})
+            assert rm.status_code == 200, rm.text
+
+    builder = ConversationContext(max_messages=20, token_budget=500)
+    try:
+        await _send(30, 0)
+        async with AsyncSessionLocal() as db:
+            first = await builder.build(db, conversation_id)
+        # Newest messages that fit, oldest first, and nothing about older history yet
+        assert first.tokens <= 500
+        assert first.input[-1]["content"].startswith("sheep 29 ")
+        assert len(first.input) == 500 // estimate_tokens("sheep 29 " + "z" * 400)
+        assert "Earlier in this conversation" not in (first.instructions or "")
+
+        await asyncio.gather(*builder._tasks)
+        # Only the trimmed part of the newest 20 is summarized
+        summarized = server.requests[0]["input"][0]["content"]
+        assert "sheep 10 " in summarized and "sheep 9 " not in summarized
+        assert f"sheep {30 - len(first.input)} " not in summarized
+
+        await _send(20, 30)
+        async with AsyncSessionLocal() as db:
+            second = await builder.build(db, conversation_id)
+        assert "They counted sheep." in second.instructions
+        assert second.tokens <= 500 + estimate_tokens("They counted sheep.")
+        assert builder.stats()["summary_hits"] == 1
+
+        builder.invalidate(conversation_id)
+        assert builder.stats()["summaries"] == 0
+    finally:
+        await builder.stop()
+        server.shutdown()
+        server.server_close()
+        rd = await client.delete(f"/messages/conversations/{conv_id}", headers=sender)
+        assert rd.status_code == 200, rd.text
+
+
+@pytest.mark.anyio
+async def test_invalidating_one_conversation_keeps_other_refreshes():
+    builder = ConversationContext(max_messages=20, token_budget=500)
+    release = asyncio.Event()
+
+    async def _summarize(summary, turns):
+        await release.wait()
+        return f"summary of {turns[0].content}"
+
+    builder._summarize = _summarize
+    kept, dropped = uuid.uuid4(), uuid.uuid4()
+    for conversation_id in (kept, dropped):
+        turn = context_module._Turn((None, conversation_id), "user", str(conversation_id))
+        builder._refresh_later(conversation_id, None, [turn])
+    try:
+        await asyncio.sleep(0)
+        builder.invalidate(dropped)
+        release.set()
+        await asyncio.gather(*builder._tasks)
+        # Only the invalidated conversation discards its in-flight summary
+        assert builder._summaries[kept][0] == f"summary of {kept}"
+        assert dropped not in builder._summaries
+        assert builder._generations == {}
+    finally:
+        await builder.stop()
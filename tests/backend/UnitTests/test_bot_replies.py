@@ -0,0 +1,87 @@
+import asyncio
+import uuid
+
+import pytest
+
+from app.models.messages import Message
+from app.services.ai.bot_replies import BotReplyQueue
+
+
+class _FakeBot:
+    """Drafts that finish only when released, so the test controls the interleaving."""
+
+    def __init__(self):
+        self.drafting = 0
+        self.peak_drafting = 0
+        self.started = []
+        self.saved = []
+        self.release = asyncio.Event()
+
+    async def draft(self, conversation_id, on_delta):
+        self.started.append(conversation_id)
+        self.drafting += 1
+        self.peak_drafting = max(self.peak_drafting, self.drafting)
+        try:
+            await self.release.wait()
+        finally:
+            self.drafting -= 1
+        return f"reply {len(self.started)}"
+
+    async def save(self, conversation_id, body, message_id):
+        self.saved.append((conversation_id, body))
+        return Message(id=message_id, conversation_id=conversation_id, sender_id=uuid.uuid4(), body=body)
+
+
+async def _settle(queue):
+    for _ in range(50):
+        await asyncio.sleep(0)
+    return queue.stats()
+
+
+@pytest.mark.anyio
+async def test_newer_message_cancels_the_running_draft():
+    bot = _FakeBot()
+    queue = BotReplyQueue(workers=2, max_pending=10, draft=bot.draft, save=bot.save)
+    conv = uuid.uuid4()
+    try:
+        assert queue.submit(conv, [])
+        assert (await _settle(queue))["running"] == 1
+
+        # Two more messages while drafting: the draft is cancelled and only the latest waits
+        queue.submit(conv, [])
+        queue.submit(conv, [])
+        stats = await _settle(queue)
+        assert stats["cancelled"] == 1 and stats["superseded"] == 1
+        assert len(bot.started) == 2
+
+        bot.release.set()
+        stats = await _settle(queue)
+        assert bot.saved == [(conv, "reply 2")]
+        assert stats["completed"] == 1 and stats["queue_depth"] == 0 and stats["running"] == 0
+    finally:
+        await queue.stop()
+
+
+@pytest.mark.anyio
+async def test_workers_bound_concurrency_and_queue_is_capped():
+    bot = _FakeBot()
+    queue = BotReplyQueue(workers=2, max_pending=3, draft=bot.draft, save=bot.save)
+    convs = [uuid.uuid4() for _ in range(6)]
+    try:
+        accepted = [queue.submit(conv, []) for conv in convs]
+        # Workers have not picked anything up yet, so the fourth waiting conversation is refused
+        assert accepted == [True, True, True, False, False, False]
+        assert queue.stats()["dropped"] == 3
+
+        stats = await _settle(queue)
+        assert stats["running"] == 2 and stats["queue_depth"] == 1
+
+        bot.release.set()
+        stats = await _settle(queue)
+        assert bot.peak_drafting == 2
+        # One conversation at a time per worker, in submission order
+        assert bot.started == convs[:3]
+        assert sorted(c for c, _ in bot.saved) == sorted(convs[:3])
+        assert stats["completed"] == 3 and stats["peak_queue_depth"] == 3
+    finally:
+        await queue.stop()
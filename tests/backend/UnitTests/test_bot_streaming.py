@@ -0,0 +1,167 @@
+import asyncio
+import json
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from app.models.messages import Message
+from app.services.ai import openai_bot
+from app.services.ai.bot_replies import BotReplyQueue
+from app.services.ai.openai_client import OpenAIClient
+from app.websocket.manager import manager
+
+
+class _StubSSE(ThreadingHTTPServer):
+    """Local stand-in for the streaming Responses API."""
+
+    daemon_threads = True
+
+    def __init__(self, events, pause):
+        super().__init__(("127.0.0.1", 0), _SSEHandler)
+        self.events = events
+        self.pause = pause
+        self.bodies = []
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server_address[1]}/v1"
+
+
+class _SSEHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self):
+        self.server.bodies.append(json.loads(self.rfile.read(int(self.headers["Content-Length"]))))
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        for event in self.server.events:
+            self.wfile.write(f"event: {event['type']}\ndata: {json.dumps(event)}\n\n".encode())
+            self.wfile.flush()
+            time.sleep(self.server.pause)
+        self.close_connection = True
+
+    def log_message(self, *args):
+        pass
+
+
+class _Socket:
+    def __init__(self):
+        self.sent = []
+
+    async def accept(self):
+        pass
+
+    async def send_text(self, text):
+        self.sent.append(json.loads(text))
+
+    async def close(self, code=1000):
+        pass
+
+
+def _delta(text):
+    return {"type": "response.output_text.delta", "delta": text}
+
+
+def _completed(text):
+    content = [{"type": "output_text", "text": text}]
+    return {"type": "response.completed", "response": {"output": [{"content": content}]}}
+
+
+@pytest.fixture
+def streaming_bot(monkeypatch):
+    servers, clients = [], []
+
+    def _serve(events, pause=0.05):
+        server = _StubSSE(events, pause)
+        client = OpenAIClient(base_url=server.url, max_retries=0)
+        servers.append(server)
+        clients.append(client)
+        monkeypatch.setattr(openai_bot, "openai_client", client)
+        monkeypatch.setattr(openai_bot.settings, "OPENAI_STREAM_FLUSH_SECONDS", 0.0)
+        return server
+
+    yield _serve
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+
+@pytest.mark.anyio
+async def test_reply_text_arrives_before_the_stream_ends(streaming_bot):
+    server = streaming_bot([_delta("Hel"), _delta("lo "), _delta("there"), _completed("Hello there")])
+    started = time.perf_counter()
+    arrivals = []
+
+    async def on_delta(text):
+        arrivals.append((time.perf_counter() - started, text))
+
+    body = await openai_bot.draft_openai_reply(uuid.uuid4(), on_delta)
+    total = time.perf_counter() - started
+
+    assert body == "Hello there"
+    assert "".join(text for _, text in arrivals) == "Hello there"
+    assert server.bodies[0]["stream"] is True
+    # The first piece is delivered while the rest is still being generated
+    assert arrivals[0][0] < total - 0.1
+
+
+@pytest.mark.anyio
+@pytest.mark.parametrize("ending", [
+    [{"type": "response.failed", "response": {"error": {"code": "server_error"}}}],
+    # The connection closes cleanly before the response completes
+    [],
+])
+async def test_failed_stream_is_aborted_and_not_stored(streaming_bot, ending):
+    streaming_bot([_delta("Partial")] + ending, pause=0)
+    saved = []
+
+    async def save(conversation_id, body, message_id):
+        saved.append(body)
+        return Message(id=message_id, conversation_id=conversation_id, sender_id=uuid.uuid4(), body=body)
+
+    queue = BotReplyQueue(workers=1, max_pending=10, save=save)
+    try:
+        queue.submit(uuid.uuid4(), [])
+        for _ in range(100):
+            await asyncio.sleep(0.01)
+            if queue.stats()["running"] == 0 and queue.stats()["queue_depth"] == 0:
+                break
+        stats = queue.stats()
+        assert saved == []
+        assert stats["streamed"] == 1 and stats["aborted"] == 1 and stats["completed"] == 0
+    finally:
+        await queue.stop()
+
+
+@pytest.mark.anyio
+async def test_streamed_deltas_stay_out_of_the_resume_buffer(streaming_bot):
+    streaming_bot([_delta("One "), _delta("two "), _delta("three"), _completed("One two three")], pause=0)
+
+    async def save(conversation_id, body, message_id):
+        return Message(id=message_id, conversation_id=conversation_id, sender_id=uuid.uuid4(), body=body)
+
+    user_id = str(uuid.uuid4())
+    ws = _Socket()
+    await manager.connect(user_id, ws)
+    manager.start_session(user_id, ws)
+    queue = BotReplyQueue(workers=1, max_pending=10, save=save)
+    try:
+        queue.submit(uuid.uuid4(), [user_id])
+        for _ in range(100):
+            if len(ws.sent) >= 5:
+                break
+            await asyncio.sleep(0.01)
+        assert [m["event"] for m in ws.sent] == ["session", "message_delta", "message_delta", "message_delta", "new_message"]
+        # Only the stored reply is sequenced and kept for a resuming client
+        assert [m.get("seq") for m in ws.sent[1:]] == [None, None, None, 1]
+        replayed = [json.loads(frame.text)["event"] for _, frame in manager.replay._logs[user_id].frames]
+        assert replayed == ["new_message"]
+    finally:
+        await queue.stop()
+        manager.disconnect(user_id, ws)
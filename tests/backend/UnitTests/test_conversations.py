@@ -1,4 +1,8 @@
+import asyncio
 import pytest
+from sqlalchemy import event
+
+from app.db.session import engine
 
 
 @pytest.mark.anyio
@@ -13,3 +17,55 @@ async def test_list_conversations_ok(client, ensure_test_users):
         item = data[0]
         assert "id" in item
         assert "friendName" in item or "participantNames" in item
+
+
+@pytest.mark.anyio
+async def test_list_conversations_query_count_is_constant(client, ensure_test_users):
+    headers = [{"Authorization": f"Bearer {u['token']}"} for u in ensure_test_users[:3]]
+    ids = [(await client.get("/auth/me", headers=h)).json()["id"] for h in headers]
+    # A direct and a group conversation, so there is more than one row and participant set
+    for participant_ids in ([ids[1]], ids[1:]):
+        resp = await client.post("/messages/new_conversation", headers=headers[0], json={"participant_ids": participant_ids})
+        assert resp.status_code == 200, resp.text
+    statements = []
+
+    def _count(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    event.listen(engine.sync_engine, "before_cursor_execute", _count)
+    try:
+        resp = await client.get("/messages/conversations", headers=headers[0])
+    finally:
+        event.remove(engine.sync_engine, "before_cursor_execute", _count)
+    assert resp.status_code == 200, resp.text
+    assert {frozenset(c["participantIds"]) for c in resp.json()} >= {frozenset(ids[:2]), frozenset(ids)}
+    # Conversations with unread counts, then every participant; the user comes from the auth cache
+    assert len(statements) == 2, statements
+
+
+@pytest.mark.anyio
+async def test_concurrent_creates_share_one_conversation(client, ensure_test_users):
+    headers = [{"Authorization": f"Bearer {u['token']}"} for u in ensure_test_users[:3]]
+    ids = [(await client.get("/auth/me", headers=h)).json()["id"] for h in headers]
+
+    async def _create(participant_ids):
+        resp = await client.post("/messages/new_conversation", headers=headers[0], json={"participant_ids": participant_ids})
+        assert resp.status_code == 200, resp.text
+
+    # Both orders of the same set race each other; all resolve to one row
+    await asyncio.gather(*(_create(ids[1:] if i % 2 else ids[:0:-1]) for i in range(6)))
+    resp = await client.get("/messages/conversations", headers=headers[0])
+    assert sum(set(c["participantIds"]) == set(ids) for c in resp.json()) == 1
+
+
+@pytest.mark.anyio
+async def test_non_member_cannot_rename_conversation(client, ensure_test_users):
+    headers = [{"Authorization": f"Bearer {u['token']}"} for u in ensure_test_users[:3]]
+    ids = [(await client.get("/auth/me", headers=h)).json()["id"] for h in headers]
+    resp = await client.post("/messages/new_conversation", headers=headers[0], json={"participant_ids": [ids[1]]})
+    assert resp.status_code == 200, resp.text
+    resp = await client.get("/messages/conversations", headers=headers[0])
+    conv_id = next(c["id"] for c in resp.json() if set(c["participantIds"]) == set(ids[:2]))
+
+    resp = await client.patch(f"/messages/conversations/{conv_id}", headers=headers[2], json={"title": "Mine now"})
+    assert resp.status_code == 403, resp.text
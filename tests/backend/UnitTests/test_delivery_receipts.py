@@ -0,0 +1,122 @@
+import uuid
+
+import pytest
+
+from app.db.session import AsyncSessionLocal
+from app.db.repositories.messages.get_message import get_message
+from app.websocket import delivery_receipts as receipts_module
+from app.websocket.delivery_receipts import DeliveryReceiptWriter
+
+
+def _auth(token):
+    return {"Authorization": f"Bearer {token}"}
+
+
+@pytest.mark.anyio
+async def test_receipts_are_flushed_in_bulk(client, ensure_test_users):
+    tokens = {u["email"]: u["token"] for u in ensure_test_users}
+    emails = ["ttt@test.com", "yyy@test.com", "uuu@test.com"]
+
+    ids = []
+    for e in emails:
+        r = await client.get("/auth/me", headers=_auth(tokens[e]))
+        ids.append(r.json()["id"])
+
+    rc = await client.post(
+        "/messages/new_conversation",
+        headers=_auth(tokens[emails[0]]),
+        json={"participant_ids": ids[1:]},
+    )
+    assert rc.status_code == 200, rc.text
+    rlist = await client.get("/messages/conversations", headers=_auth(tokens[emails[0]]))
+    assert rlist.status_code == 200, rlist.text
+    conv_id = next(c["id"] for c in rlist.json() if set(c["participantIds"]) == set(ids))
+
+    message_ids = []
+    for i in range(3):
+        rm = await client.post(
+            f"/conversations/{conv_id}/messages",
+            headers=_auth(tokens[emails[0]]),
+            params={"body": f"receipt {i}"},
+        )
+        assert rm.status_code == 200, rm.text
+        message_ids.append(rm.json()["id"])
+
+    # Large batch / long interval so only the explicit flush writes
+    writer = DeliveryReceiptWriter(batch_size=1000, flush_interval=60)
+    for mid in message_ids:
+        for uid in ids[1:]:
+            writer.enqueue(mid, uid)
+    assert writer.queue_depth == len(message_ids) * 2
+
+    await writer.stop()
+    assert writer.queue_depth == 0
+    stats = writer.stats()
+    assert stats["written_total"] == len(message_ids) * 2
+    assert stats["flush_count"] == 1
+
+    async with AsyncSessionLocal() as db:
+        for mid in message_ids:
+            msg = await get_message(db, uuid.UUID(mid))
+            assert set(ids[1:]) <= set(msg.delivered_at or {})
+
+
+
+@pytest.mark.anyio
+async def test_failed_flush_keeps_receipts_for_the_next_one(monkeypatch):
+    writer = DeliveryReceiptWriter(batch_size=1000, flush_interval=60)
+    mid, other = uuid.uuid4(), uuid.uuid4()
+    written, newer = [], {}
+
+    async def _flaky(db, batch):
+        if not written:
+            written.append(None)
+            # Receipts keep arriving while the failing write is in flight
+            batch[mid]["a"] = "2000-01-01T00:00:00"
+            writer.enqueue(mid, "a")
+            writer.enqueue(other, "c")
+            newer["a"] = writer._pending[mid]["a"]
+            raise RuntimeError("database unavailable")
+        written.append(batch)
+
+    monkeypatch.setattr(receipts_module, "mark_delivered", _flaky)
+    writer.enqueue(mid, "a")
+    writer.enqueue(mid, "b")
+    try:
+        assert await writer.flush() == 0
+        assert writer.stats()["flush_errors"] == 1
+        # The failed batch is merged back; the newer receipt time wins
+        assert writer.queue_depth == 3
+        assert writer._pending[mid]["a"] == newer["a"]
+
+        assert await writer.flush() == 3
+        assert set(written[1]) == {mid, other} and set(written[1][mid]) == {"a", "b"}
+        assert writer.queue_depth == 0
+    finally:
+        await writer.stop()
+
+
+@pytest.mark.anyio
+async def test_pending_receipts_are_capped_while_flushes_fail(monkeypatch):
+    async def _down(db, batch):
+        raise RuntimeError("database unavailable")
+
+    monkeypatch.setattr(receipts_module, "mark_delivered", _down)
+    writer = DeliveryReceiptWriter(batch_size=1000, flush_interval=60, max_pending=3)
+    old, new = uuid.uuid4(), uuid.uuid4()
+    try:
+        writer.enqueue(old, "a")
+        writer.enqueue(old, "b")
+        assert await writer.flush() == 0
+        writer.enqueue(new, "a")
+        writer.enqueue(new, "b")
+
+        # The failed batch stays ahead of newer receipts, so its oldest entry goes first
+        assert writer.queue_depth == 3
+        assert set(writer._pending[old]) == {"b"} and set(writer._pending[new]) == {"a", "b"}
+        assert writer.stats()["dropped"] == 1
+
+        assert await writer.flush() == 0
+        assert writer.queue_depth == 3 and list(writer._pending) == [old, new]
+    finally:
+        await writer.stop()
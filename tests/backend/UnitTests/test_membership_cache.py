@@ -0,0 +1,101 @@
+import uuid
+
+import pytest
+from sqlalchemy import event
+
+from app.db.session import engine
+from app.services.conversation_participants.membership_cache import MembershipCache, membership_cache
+from app.websocket.events.presence import _get_related_user_ids
+
+
+def _auth(token):
+    return {"Authorization": f"Bearer {token}"}
+
+
+@pytest.mark.anyio
+async def test_membership_is_cached_and_invalidated(client, ensure_test_users):
+    tokens = {u["email"]: u["token"] for u in ensure_test_users}
+    emails = ["ttt@test.com", "yyy@test.com", "uuu@test.com", "iii@test.com"]
+    ids = []
+    for e in emails:
+        r = await client.get("/auth/me", headers=_auth(tokens[e]))
+        ids.append(r.json()["id"])
+
+    rc = await client.post(
+        "/messages/new_conversation",
+        headers=_auth(tokens[emails[0]]),
+        json={"participant_ids": ids[1:]},
+    )
+    assert rc.status_code == 200, rc.text
+    rlist = await client.get("/messages/conversations", headers=_auth(tokens[emails[0]]))
+    conv_id = next(c["id"] for c in rlist.json() if set(c["participantIds"]) == set(ids))
+
+    assert sorted(await membership_cache.get_members(uuid.UUID(conv_id))) == sorted(ids)
+    misses = membership_cache.misses
+    for i in range(2):
+        rm = await client.post(
+            f"/conversations/{conv_id}/messages",
+            headers=_auth(tokens[emails[0]]),
+            params={"body": f"cached {i}"},
+        )
+        assert rm.status_code == 200, rm.text
+    # Sending returns the members from its own write, so it never loads them
+    assert membership_cache.misses == misses
+
+    rd = await client.delete(f"/messages/conversations/{conv_id}", headers=_auth(tokens[emails[0]]))
+    assert rd.status_code == 200, rd.text
+    assert await membership_cache.get_members(uuid.UUID(conv_id)) == []
+    rm = await client.post(
+        f"/conversations/{conv_id}/messages",
+        headers=_auth(tokens[emails[1]]),
+        params={"body": "after delete"},
+    )
+    assert rm.status_code == 403
+
+
+def test_lru_eviction_and_remote_invalidation():
+    cache = MembershipCache(max_conversations=2)
+    convs = [uuid.uuid4() for _ in range(3)]
+    for conv in convs:
+        cache._store(cache._members, conv, ("u",), cache.max_conversations)
+    assert list(cache._members) == convs[1:]
+
+    user = uuid.uuid4()
+    cache._store(cache._conversations, user, (convs[1],), cache.max_users)
+    cache.on_control("other-worker", {"t": "membership_invalidate", "c": str(convs[1]), "u": [str(user)]})
+    assert convs[1] not in cache._members
+    assert user not in cache._conversations
+    assert cache.stats()["invalidations"] == 1
+
+
+@pytest.mark.anyio
+async def test_cold_presence_fan_out_is_two_queries(client, ensure_test_users):
+    headers = [_auth(u["token"]) for u in ensure_test_users[:3]]
+    ids = [(await client.get("/auth/me", headers=h)).json()["id"] for h in headers]
+    for participant_ids in ([ids[1]], ids[1:]):
+        rc = await client.post("/messages/new_conversation", headers=headers[0], json={"participant_ids": participant_ids})
+        assert rc.status_code == 200, rc.text
+
+    membership_cache.clear()
+    statements = []
+
+    def _count(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    event.listen(engine.sync_engine, "before_cursor_execute", _count)
+    try:
+        related = await _get_related_user_ids(uuid.UUID(ids[0]))
+    finally:
+        event.remove(engine.sync_engine, "before_cursor_execute", _count)
+    assert set(ids[1:]) <= set(related) and ids[0] not in related
+    # The user's conversations, then the members of all of them at once
+    assert len(statements) == 2, statements
+
+    # Warm now: no queries at all
+    statements.clear()
+    event.listen(engine.sync_engine, "before_cursor_execute", _count)
+    try:
+        assert sorted(await _get_related_user_ids(uuid.UUID(ids[0]))) == sorted(related)
+    finally:
+        event.remove(engine.sync_engine, "before_cursor_execute", _count)
+    assert statements == []
@@ -0,0 +1,57 @@
+import pytest
+
+
+def _auth(token):
+    return {"Authorization": f"Bearer {token}"}
+
+
+@pytest.mark.anyio
+async def test_keyset_pagination_walks_history(client, ensure_test_users):
+    tokens = {u["email"]: u["token"] for u in ensure_test_users}
+    emails = ["ttt@test.com", "yyy@test.com", "uuu@test.com", "iii@test.com"]
+    ids = []
+    for e in emails:
+        r = await client.get("/auth/me", headers=_auth(tokens[e]))
+        ids.append(r.json()["id"])
+    headers = _auth(tokens[emails[0]])
+
+    rc = await client.post("/messages/new_conversation", headers=headers, json={"participant_ids": ids[1:]})
+    assert rc.status_code == 200, rc.text
+    rlist = await client.get("/messages/conversations", headers=headers)
+    conv_id = next(c["id"] for c in rlist.json() if set(c["participantIds"]) == set(ids))
+    url = f"/conversations/{conv_id}/messages"
+
+    for i in range(7):
+        rm = await client.post(url, headers=headers, params={"body": f"page {i}"})
+        assert rm.status_code == 200, rm.text
+
+    # Newest page first, returned oldest first
+    r = await client.get(url, headers=headers, params={"limit": 3})
+    assert r.status_code == 200, r.text
+    assert [m["body"] for m in r.json()] == ["page 4", "page 5", "page 6"]
+    assert "x-prev-cursor" not in r.headers
+
+    bodies = [m["body"] for m in r.json()]
+    cursor = r.headers["x-next-cursor"]
+    while cursor:
+        r = await client.get(url, headers=headers, params={"limit": 3, "before": cursor})
+        assert r.status_code == 200, r.text
+        bodies = [m["body"] for m in r.json()] + bodies
+        cursor = r.headers.get("x-next-cursor")
+    assert bodies == [f"page {i}" for i in range(7)]
+
+    # Forward again from the oldest page
+    r = await client.get(url, headers=headers, params={"limit": 4, "after": r.headers["x-prev-cursor"]})
+    assert [m["body"] for m in r.json()] == ["page 1", "page 2", "page 3", "page 4"]
+    assert "x-prev-cursor" in r.headers
+
+    middle = next(m for m in (await client.get(url, headers=headers)).json() if m["body"] == "page 3")
+    r = await client.get(url, headers=headers, params={"limit": 3, "around": middle["id"]})
+    assert [m["body"] for m in r.json()] == ["page 2", "page 3", "page 4"]
+    assert "x-next-cursor" in r.headers and "x-prev-cursor" in r.headers
+
+    r = await client.get(url, headers=headers, params={"before": "not-a-cursor"})
+    assert r.status_code == 400
+
+    rd = await client.delete(f"/messages/conversations/{conv_id}", headers=headers)
+    assert rd.status_code == 200, rd.text
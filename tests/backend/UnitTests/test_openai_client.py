@@ -0,0 +1,119 @@
+import asyncio
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import httpx
+import pytest
+
+from app.services.ai.openai_client import CircuitBreaker, OpenAIClient, OpenAIUnavailable
+
+
+class _StubOpenAI(ThreadingHTTPServer):
+    """Local stand-in for the API: answers with the scripted statuses, then 200."""
+
+    daemon_threads = True
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), _StubHandler)
+        self.script = []
+        self.connections = 0
+        self.requests = 0
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server_address[1]}/v1"
+
+
+class _StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def setup(self):
+        super().setup()
+        self.server.connections += 1
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        self.server.requests += 1
+        status = self.server.script.pop(0) if self.server.script else 200
+        body = json.dumps({"output": []} if status == 200 else {"error": status}).encode()
+        self.send_response(status)
+        if status == 429:
+            self.send_header("Retry-After", "0")
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def stub():
+    server = _StubOpenAI()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.mark.anyio
+async def test_connections_are_reused_and_transient_errors_retried(stub):
+    client = OpenAIClient(base_url=stub.url, max_retries=3, backoff=0.001, backoff_max=0.01)
+    try:
+        for _ in range(3):
+            r = await client.post("/responses", json={"input": []}, api_key="k")
+            assert r.status_code == 200
+        assert stub.connections == 1
+
+        stub.script = [503, 429, 502]
+        r = await client.post("/responses", json={"input": []}, api_key="k")
+        assert r.status_code == 200
+        assert client.stats()["retries"] == 3
+
+        # Client errors are returned at once and are not an outage
+        stub.script = [400]
+        r = await client.post("/responses", json={"input": []}, api_key="k")
+        assert r.status_code == 400
+        assert client.stats()["failures"] == 0
+    finally:
+        await client.close()
+
+
+@pytest.mark.anyio
+async def test_breaker_opens_on_failures_and_recovers_after_a_trial(stub):
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=0.05)
+    client = OpenAIClient(base_url=stub.url, max_retries=0, breaker=breaker)
+    try:
+        stub.script = [500, 500]
+        for _ in range(2):
+            r = await client.post("/responses", json={}, api_key="k")
+            assert r.status_code == 500
+        assert breaker.state == "open"
+
+        seen = stub.requests
+        with pytest.raises(OpenAIUnavailable):
+            await client.post("/responses", json={}, api_key="k")
+        assert stub.requests == seen
+        assert client.stats()["short_circuited"] == 1
+
+        # After the reset timeout a single trial call closes it again
+        await asyncio.sleep(0.06)
+        assert breaker.state == "half_open"
+        r = await client.post("/responses", json={}, api_key="k")
+        assert r.status_code == 200
+        assert breaker.state == "closed"
+    finally:
+        await client.close()
+
+    # Nothing listening: transport errors count as failures too
+    client = OpenAIClient(base_url="http://127.0.0.1:9/v1", max_retries=1, backoff=0.001, breaker=CircuitBreaker(1, 30))
+    try:
+        with pytest.raises(httpx.ConnectError):
+            await client.post("/responses", json={}, api_key="k")
+        assert client.stats()["attempts"] == 2
+        assert client.breaker.state == "open"
+    finally:
+        await client.close()
+
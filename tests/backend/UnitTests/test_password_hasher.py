@@ -0,0 +1,47 @@
+import asyncio
+import time
+
+import pytest
+from fastapi import HTTPException
+from passlib.context import CryptContext
+
+from app.services.auth.password_hasher import PasswordHasher
+
+
+@pytest.mark.anyio
+async def test_hashing_leaves_the_loop_free_and_sheds_load():
+    hasher = PasswordHasher(workers=1, max_pending=2)
+    ticks = []
+
+    async def ticker():
+        while True:
+            ticks.append(time.perf_counter())
+            await asyncio.sleep(0.01)
+
+    tick_task = asyncio.create_task(ticker())
+    try:
+        results = await asyncio.gather(
+            hasher.hash("parolatare1!"), hasher.hash("parolatare1!"), hasher.hash("parolatare1!"),
+            return_exceptions=True,
+        )
+    finally:
+        tick_task.cancel()
+
+    rejected = [r for r in results if isinstance(r, HTTPException)]
+    assert len(rejected) == 1 and rejected[0].status_code == 429
+    assert hasher.stats()["rejected"] == 1 and hasher.stats()["in_flight"] == 0
+    # The loop kept ticking while bcrypt ran on the worker thread
+    assert max(b - a for a, b in zip(ticks, ticks[1:])) < 0.1
+    hasher.stop()
+
+
+@pytest.mark.anyio
+async def test_outdated_cost_is_rehashed_on_verify():
+    hasher = PasswordHasher(workers=1, max_pending=4)
+    cheap = CryptContext(schemes=["bcrypt"], bcrypt__rounds=4).hash("parolatare1!")
+
+    ok, new_hash = await hasher.verify_and_update("parolatare1!", cheap)
+    assert ok and new_hash is not None and new_hash != cheap
+    assert await hasher.verify_and_update("parolatare1!", new_hash) == (True, None)
+    assert await hasher.verify_and_update("wrong", new_hash) == (False, None)
+    hasher.stop()
@@ -0,0 +1,75 @@
+import asyncio
+import os
+
+import pytest
+from sqlalchemy import exc, text
+
+from app.core.config import settings
+from app.db.pool_metrics import PoolMetrics, create_instrumented_engine
+from app.db.session import AsyncSessionLocal, pool_metrics
+
+
+@pytest.mark.anyio
+async def test_pool_metrics_report_checkouts_and_overflow():
+    metrics = PoolMetrics()
+    engine = create_instrumented_engine(
+        os.environ["DATABASE_URL"], metrics, pool_size=1, max_overflow=1, pool_timeout=0.2
+    )
+    try:
+        async def hold(seconds):
+            async with engine.connect() as conn:
+                await conn.execute(text("SELECT pg_sleep(:s)"), {"s": seconds})
+
+        # Two holders fill pool_size + overflow; the third waits for a slot
+        await asyncio.gather(hold(0.1), hold(0.1), hold(0))
+        stats = metrics.stats()
+        assert stats["checkouts"] == 3
+        assert stats["overflow_checkouts"] == 1
+        assert stats["peak_checked_out"] == 2
+        assert stats["checked_out"] == 0 and stats["checkins"] == 3
+        assert stats["connects"] == 2 and stats["connect_ms_max"] > 0
+        # The overflow connection is closed when it comes back to a full pool
+        assert stats["open_connections"] == 1
+
+        # Holding both slots past pool_timeout makes the next checkout fail
+        results = await asyncio.gather(hold(0.5), hold(0.5), hold(0), return_exceptions=True)
+        assert isinstance(results[2], exc.TimeoutError)
+
+        # dispose() swaps in a new pool; the metrics follow it
+        await engine.dispose()
+        await hold(0)
+        assert metrics.pool is engine.sync_engine.pool
+        assert metrics.stats()["checked_in"] == 1
+        assert metrics.stats()["open_connections"] == 1
+    finally:
+        await engine.dispose()
+
+
+@pytest.mark.anyio
+async def test_metrics_endpoint_reports_pool(client):
+    async with AsyncSessionLocal() as db:
+        await db.execute(text("SELECT 1"))
+    resp = await client.get("/metrics")
+    assert resp.status_code == 200, resp.text
+    pool = resp.json()["db_pool"]
+    assert pool["checkouts"] > 0
+    assert {"checked_out", "overflow_checkouts", "timeouts", "connect_ms_avg", "status"} <= set(pool)
+
+
+@pytest.mark.anyio
+async def test_pool_timeout_is_counted_and_answered_with_503():
+    from app.main import on_pool_timeout
+
+    timeouts = pool_metrics.timeouts
+    resp = await on_pool_timeout(None, exc.TimeoutError("QueuePool limit reached"))
+    assert resp.status_code == 503
+    assert pool_metrics.stats()["timeouts"] == timeouts + 1
+
+
+@pytest.mark.anyio
+async def test_metrics_endpoint_requires_the_configured_token(client, monkeypatch):
+    monkeypatch.setattr(settings, "METRICS_TOKEN", "s3cret")
+    assert (await client.get("/metrics")).status_code == 401
+    assert (await client.get("/metrics", headers={"Authorization": "Bearer wrong"})).status_code == 401
+    resp = await client.get("/metrics", headers={"Authorization": "Bearer s3cret"})
+    assert resp.status_code == 200, resp.text
@@ -0,0 +1,55 @@
+import pytest
+from sqlalchemy import event
+
+from app.db.session import engine
+from app.services.users.profile_cache import user_profiles
+
+
+def _auth(token):
+    return {"Authorization": f"Bearer {token}"}
+
+
+@pytest.mark.anyio
+async def test_message_page_resolves_sender_names_in_one_query(client, ensure_test_users):
+    tokens = {u["email"]: u["token"] for u in ensure_test_users}
+    emails = ["ttt@test.com", "yyy@test.com", "uuu@test.com", "iii@test.com"]
+    ids = []
+    for e in emails:
+        r = await client.get("/auth/me", headers=_auth(tokens[e]))
+        ids.append(r.json()["id"])
+
+    rc = await client.post("/messages/new_conversation", headers=_auth(tokens[emails[0]]), json={"participant_ids": ids[1:]})
+    assert rc.status_code == 200, rc.text
+    rlist = await client.get("/messages/conversations", headers=_auth(tokens[emails[0]]))
+    conv_id = next(c["id"] for c in rlist.json() if set(c["participantIds"]) == set(ids))
+    url = f"/conversations/{conv_id}/messages"
+    for e in emails:
+        for i in range(3):
+            rm = await client.post(url, headers=_auth(tokens[e]), params={"body": f"{e} {i}"})
+            assert rm.status_code == 200, rm.text
+
+    user_queries = []
+
+    def _count(conn, cursor, statement, *args):
+        # Profile lookups only; authentication loads the caller separately
+        if statement.startswith("SELECT users.id, users.display_name"):
+            user_queries.append(statement)
+
+    for uid in ids:
+        user_profiles.invalidate(uid)
+    event.listen(engine.sync_engine, "before_cursor_execute", _count)
+    try:
+        r = await client.get(url, headers=_auth(tokens[emails[0]]))
+        assert r.status_code == 200, r.text
+        # Cold cache: every sender is resolved by a single IN query
+        assert len(user_queries) == 1
+        assert {m["sender_name"] for m in r.json()} == {"TTT", "YYY", "UUU", "III"}
+
+        r = await client.get(url, headers=_auth(tokens[emails[1]]))
+        assert r.status_code == 200, r.text
+        assert len(user_queries) == 1
+    finally:
+        event.remove(engine.sync_engine, "before_cursor_execute", _count)
+
+    rd = await client.delete(f"/messages/conversations/{conv_id}", headers=_auth(tokens[emails[0]]))
+    assert rd.status_code == 200, rd.text
@@ -0,0 +1,59 @@
+import json
+import uuid
+
+import pytest
+from sqlalchemy import event, select, text
+
+from app.db.repositories.conversation_participants.get_participant import get_participant
+from app.db.repositories.conversation_participants.get_user_conversation_ids import get_user_conversation_ids
+from app.db.repositories.conversation_repo import ConversationRepository
+from app.db.session import AsyncSessionLocal, engine
+from app.models.conversation_participants import ConversationsParticipants
+from app.services.friends.friend_requests import FriendRequestService
+
+HOT_TABLES = {"conversation_participants", "friendships", "friend_requests"}
+
+
+def _seq_scans(plan):
+    found = []
+    if plan.get("Node Type") == "Seq Scan" and plan.get("Relation Name") in HOT_TABLES:
+        found.append(plan["Relation Name"])
+    for child in plan.get("Plans", []):
+        found += _seq_scans(child)
+    return found
+
+
+@pytest.mark.anyio
+async def test_hot_lookups_use_indexes(ensure_test_users):
+    captured = []
+
+    def _capture(conn, cursor, statement, parameters, context, executemany):
+        captured.append((statement, parameters))
+
+    # Record the SQL the real lookups send, then EXPLAIN each of them
+    async with AsyncSessionLocal() as db:
+        member = (await db.execute(select(ConversationsParticipants).limit(1))).scalar_one()
+        conv_id, a, b = member.conversation_id, member.user_id, uuid.uuid4()
+        event.listen(engine.sync_engine, "before_cursor_execute", _capture)
+        try:
+            await get_participant(db, conv_id, a)
+            await get_user_conversation_ids(db, a)
+            repo = ConversationRepository(db)
+            await repo.get_conversation_summaries(a)
+            await FriendRequestService._existing_friendship(db, a, b)
+            await FriendRequestService._existing_friend_request(db, a, b)
+            await FriendRequestService.list_requests(db, a)
+            await FriendRequestService.list_friends(db, a)
+        finally:
+            event.remove(engine.sync_engine, "before_cursor_execute", _capture)
+
+    assert captured
+    async with engine.connect() as conn:
+        # Small test tables make a seq scan the cheapest plan; rule that out so
+        # only scans that no index could serve remain
+        await conn.execute(text("SET LOCAL enable_seqscan = off"))
+        for statement, parameters in captured:
+            plan = (await conn.exec_driver_sql(f"EXPLAIN (FORMAT JSON) {statement}", parameters)).scalar()
+            if isinstance(plan, str):
+                plan = json.loads(plan)
+            assert _seq_scans(plan[0]["Plan"]) == [], statement
@@ -0,0 +1,51 @@
+import asyncio
+
+import pytest
+
+from app.websocket.typing_state import TypingStateEngine
+
+
+@pytest.mark.anyio
+async def test_only_transitions_are_reported():
+    engine = TypingStateEngine(ttl=60)
+    # A keystroke storm from one user yields one start and one stop
+    results = [engine.start("c1", "alice") for _ in range(50)]
+    assert results.count(True) == 1
+    assert engine.stop("c1", "alice") is True
+    assert engine.stop("c1", "alice") is False
+    assert engine.stats()["refreshes"] == 49
+
+
+@pytest.mark.anyio
+async def test_idle_to_typing_transitions_are_rate_limited():
+    engine = TypingStateEngine(ttl=60, rate=0.0, burst=3)
+    accepted = 0
+    for _ in range(10):
+        if engine.start("c1", "alice"):
+            accepted += 1
+            engine.stop("c1", "alice")
+    assert accepted == 3
+    assert engine.stats()["rate_limited"] == 7
+    # Other users have their own budget
+    assert engine.start("c1", "bob") is True
+
+
+@pytest.mark.anyio
+async def test_unrefreshed_state_expires_with_a_stop():
+    expired = []
+
+    async def on_expire(conversation_id, user_id):
+        expired.append((conversation_id, user_id))
+
+    engine = TypingStateEngine(on_expire=on_expire, ttl=0.05)
+    engine.start("c1", "alice")
+    engine.start("c2", "bob")
+    await asyncio.sleep(0.03)
+    engine.start("c2", "bob")  # bob keeps typing
+    await asyncio.sleep(0.04)
+
+    assert expired == [("c1", "alice")]
+    assert engine.is_typing("c2", "bob")
+    await asyncio.sleep(0.05)
+    assert expired == [("c1", "alice"), ("c2", "bob")]
+    assert engine.stats()["typing"] == 0
@@ -0,0 +1,80 @@
+import uuid
+
+import pytest
+from sqlalchemy import select, update
+
+from app.db.session import AsyncSessionLocal
+from app.db.repositories.conversation_participants.unread_count import reconcile_unread_counts
+from app.models.conversation_participants import ConversationsParticipants
+
+
+def _auth(token):
+    return {"Authorization": f"Bearer {token}"}
+
+
+async def _unread(conv_id, user_id):
+    async with AsyncSessionLocal() as db:
+        return (await db.execute(
+            select(ConversationsParticipants.unread_count).where(
+                ConversationsParticipants.conversation_id == uuid.UUID(conv_id),
+                ConversationsParticipants.user_id == uuid.UUID(user_id),
+            )
+        )).scalar()
+
+
+@pytest.mark.anyio
+async def test_unread_counter_follows_sends_reads_and_deletes(client, ensure_test_users):
+    tokens = {u["email"]: u["token"] for u in ensure_test_users}
+    emails = ["ttt@test.com", "yyy@test.com", "uuu@test.com", "iii@test.com"]
+    ids = []
+    for e in emails:
+        r = await client.get("/auth/me", headers=_auth(tokens[e]))
+        ids.append(r.json()["id"])
+    sender, reader = _auth(tokens[emails[0]]), _auth(tokens[emails[1]])
+
+    # Start from an empty conversation; other tests also write to this group
+    for _ in range(2):
+        rc = await client.post("/messages/new_conversation", headers=sender, json={"participant_ids": ids[1:]})
+        assert rc.status_code == 200, rc.text
+        rlist = await client.get("/messages/conversations", headers=sender)
+        conv_id = next(c["id"] for c in rlist.json() if set(c["participantIds"]) == set(ids))
+        if not next(c for c in rlist.json() if c["id"] == conv_id)["lastMessage"]:
+            break
+        await client.delete(f"/messages/conversations/{conv_id}", headers=sender)
+    url = f"/conversations/{conv_id}/messages"
+
+    sent = []
+    for i in range(4):
+        rm = await client.post(url, headers=sender, params={"body": f"unread {i}"})
+        assert rm.status_code == 200, rm.text
+        sent.append(rm.json()["id"])
+    assert await _unread(conv_id, ids[1]) == 4
+    assert await _unread(conv_id, ids[0]) == 0
+
+    rr = await client.post(f"/conversations/{conv_id}/read", headers=reader, params={"message_id": sent[1]})
+    assert rr.status_code == 200, rr.text
+    assert rr.json()["unread_count"] == 2
+
+    # Deleting an unread message uncounts it; a read one leaves the counter alone
+    for mid in (sent[3], sent[0]):
+        rd = await client.delete(f"{url}/{mid}", headers=sender)
+        assert rd.status_code == 200, rd.text
+    assert await _unread(conv_id, ids[1]) == 1
+    assert await _unread(conv_id, ids[2]) == 2
+
+    rlist = await client.get("/messages/conversations", headers=reader)
+    assert next(c["unreadCount"] for c in rlist.json() if c["id"] == conv_id) == 1
+
+    async with AsyncSessionLocal() as db:
+        await db.execute(
+            update(ConversationsParticipants)
+            .where(ConversationsParticipants.conversation_id == uuid.UUID(conv_id))
+            .values(unread_count=42)
+        )
+        await db.commit()
+        assert await reconcile_unread_counts(db) == len(ids)
+    assert await _unread(conv_id, ids[1]) == 1
+    assert await _unread(conv_id, ids[0]) == 0
+
+    rd = await client.delete(f"/messages/conversations/{conv_id}", headers=sender)
+    assert rd.status_code == 200, rd.text
@@ -0,0 +1,66 @@
+import uuid
+
+import pytest
+
+from app.db.session import AsyncSessionLocal
+from app.db.repositories.conversation_participants.update_last_read import update_last_read
+from app.db.repositories.messages.get_message import get_message
+
+
+def _auth(token):
+    return {"Authorization": f"Bearer {token}"}
+
+
+@pytest.mark.anyio
+async def test_last_read_touches_only_newly_read_messages(client, ensure_test_users):
+    tokens = {u["email"]: u["token"] for u in ensure_test_users}
+    emails = ["ttt@test.com", "yyy@test.com", "uuu@test.com", "iii@test.com"]
+    ids = []
+    for e in emails:
+        r = await client.get("/auth/me", headers=_auth(tokens[e]))
+        ids.append(r.json()["id"])
+    sender = _auth(tokens[emails[0]])
+
+    # Start from an empty conversation; other tests also write to this group
+    for _ in range(2):
+        rc = await client.post("/messages/new_conversation", headers=sender, json={"participant_ids": ids[1:]})
+        assert rc.status_code == 200, rc.text
+        rlist = await client.get("/messages/conversations", headers=sender)
+        conv_id = next(c["id"] for c in rlist.json() if set(c["participantIds"]) == set(ids))
+        if not next(c for c in rlist.json() if c["id"] == conv_id)["lastMessage"]:
+            break
+        await client.delete(f"/messages/conversations/{conv_id}", headers=sender)
+
+    sent = []
+    for i in range(4):
+        rm = await client.post(f"/conversations/{conv_id}/messages", headers=sender, params={"body": f"read {i}"})
+        assert rm.status_code == 200, rm.text
+        sent.append(uuid.UUID(rm.json()["id"]))
+
+    conv_uuid, reader = uuid.UUID(conv_id), uuid.UUID(ids[1])
+    async with AsyncSessionLocal() as db:
+        participant, changed = await update_last_read(db, conv_uuid, reader, sent[1])
+        assert sorted(changed) == sorted(sent[:2])
+        assert participant.last_read_message_id == sent[1]
+
+        _, changed = await update_last_read(db, conv_uuid, reader, sent[3])
+        assert sorted(changed) == sorted(sent[2:])
+
+        # Moving the marker backward is a no-op
+        participant, changed = await update_last_read(db, conv_uuid, reader, sent[0])
+        assert changed == []
+        assert participant.last_read_message_id == sent[3]
+
+        for mid in sent:
+            msg = await get_message(db, mid)
+            assert set(msg.seen_at) == {ids[1]}
+
+    rr = await client.post(
+        f"/conversations/{conv_id}/read",
+        headers=_auth(tokens[emails[2]]),
+        params={"message_id": str(sent[3])},
+    )
+    assert rr.status_code == 200, rr.text
+
+    rd = await client.delete(f"/messages/conversations/{conv_id}", headers=sender)
+    assert rd.status_code == 200, rd.text
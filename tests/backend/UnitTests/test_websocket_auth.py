@@ -0,0 +1,89 @@
+import uuid
+
+import pytest
+from starlette.testclient import TestClient
+from starlette.websockets import WebSocketDisconnect
+
+from app.core.security import create_access_token
+from app.main import app
+from app.websocket.inbound import InboundLimiter, parse_frame
+from app.websocket.manager import ConnectionManager
+
+
+def _rejected(url: str) -> bool:
+    client = TestClient(app)
+    try:
+        with client.websocket_connect(url):
+            return False
+    except WebSocketDisconnect:
+        return True
+
+
+def test_handshake_requires_a_token_for_the_same_user():
+    user_id = str(uuid.uuid4())
+    other_token = create_access_token(data={"id": str(uuid.uuid4()), "email": "x@test.com"})
+
+    assert _rejected(f"/ws/{user_id}")
+    assert _rejected(f"/ws/{user_id}?token=not-a-jwt")
+    assert _rejected(f"/ws/{user_id}?token={other_token}")
+
+
+class FakeWebSocket:
+    async def accept(self):
+        pass
+
+    async def send_text(self, text):
+        pass
+
+    async def close(self, code: int = 1000):
+        pass
+
+
+@pytest.mark.anyio
+async def test_connection_caps():
+    mgr = ConnectionManager(max_connections_per_user=2, max_connections=3)
+    for _ in range(2):
+        assert mgr.admit("a")
+        await mgr.connect("a", FakeWebSocket())
+    assert not mgr.admit("a")
+
+    assert mgr.admit("b")
+    await mgr.connect("b", FakeWebSocket())
+    assert not mgr.admit("c")
+    assert mgr.stats()["rejected"] == {"auth": 0, "user_limit": 1, "global_limit": 1}
+
+
+class _FailingHandshake(FakeWebSocket):
+    async def accept(self):
+        raise RuntimeError("client went away")
+
+
+@pytest.mark.anyio
+async def test_concurrent_handshakes_reserve_their_slots():
+    mgr = ConnectionManager(max_connections_per_user=1, max_connections=2)
+    # Both handshakes are admitted before either has registered its socket
+    assert mgr.admit("a")
+    assert not mgr.admit("a")
+    assert mgr.admit("b")
+    assert not mgr.admit("c")
+    assert mgr.stats()["rejected"] == {"auth": 0, "user_limit": 1, "global_limit": 1}
+
+    await mgr.connect("a", FakeWebSocket())
+    # A handshake that fails gives its slot back
+    with pytest.raises(RuntimeError):
+        await mgr.connect("b", _FailingHandshake())
+    assert mgr.admit("b")
+
+
+def test_inbound_frames_are_rate_limited_and_validated():
+    limiter = InboundLimiter(rate=0.0, burst=3)
+    assert [limiter.allow() for _ in range(4)] == [True, True, True, False]
+    assert not limiter.should_close
+    for _ in range(3):
+        limiter.allow()
+    assert limiter.should_close
+
+    assert parse_frame('{"event": "typing_start"}') == {"event": "typing_start"}
+    assert parse_frame("not json") is None
+    assert parse_frame("[1, 2]") is None
+    assert parse_frame('{"pad": "' + "x" * 100 + '"}', max_bytes=64) is None
@@ -0,0 +1,417 @@
+import asyncio
+import json
+import time
+import uuid
+
+import pytest
+
+from app.core.config import settings
+from app.websocket import encoding
+from app.websocket.backplane import InProcessBackplane, PostgresBackplane
+from app.websocket.manager import ConnectionManager
+
+
+class FakeWebSocket:
+    def __init__(self, delay: float = 0.0, block: bool = False):
+        self.delay = delay
+        self.block = block
+        self.sent = []
+        self.closed_with = None
+        self._release = asyncio.Event()
+
+    async def accept(self):
+        pass
+
+    async def send_text(self, text):
+        if self.block:
+            await self._release.wait()
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        self.sent.append(json.loads(text))
+
+    async def close(self, code: int = 1000):
+        self.closed_with = code
+
+
+async def _drain(*sockets, timeout: float = 1.0, count: int = 1):
+    deadline = time.perf_counter() + timeout
+    while time.perf_counter() < deadline:
+        if all(len(ws.sent) >= count for ws in sockets):
+            return
+        await asyncio.sleep(0.005)
+
+
+@pytest.mark.anyio
+async def test_slow_socket_does_not_delay_others():
+    mgr = ConnectionManager(send_queue_size=16)
+    slow = FakeWebSocket(delay=0.5)
+    fast = [FakeWebSocket() for _ in range(20)]
+    await mgr.connect("slow", slow)
+    for i, ws in enumerate(fast):
+        await mgr.connect(f"u{i}", ws)
+
+    started = time.perf_counter()
+    await mgr.broadcast(["slow"] + [f"u{i}" for i in range(20)], {"event": "new_message"})
+    assert time.perf_counter() - started < 0.05
+
+    await _drain(*fast)
+    assert time.perf_counter() - started < 0.4
+    assert all(ws.sent == [{"event": "new_message"}] for ws in fast)
+    assert slow.sent == []
+
+    mgr.disconnect("slow", slow)
+    for i, ws in enumerate(fast):
+        mgr.disconnect(f"u{i}", ws)
+
+
+@pytest.mark.anyio
+async def test_drop_oldest_policy_keeps_newest_frames():
+    mgr = ConnectionManager(send_queue_size=3, overflow_policy="drop_oldest")
+    ws = FakeWebSocket(block=True)
+    await mgr.connect("u", ws)
+    await mgr.send_personal_message("u", {"event": "new_message", "n": 0})
+    await asyncio.sleep(0)
+
+    for i in range(1, 6):
+        await mgr.send_personal_message("u", {"event": "new_message", "n": i})
+
+    ws._release.set()
+    await _drain(ws, count=4)
+    # The writer had already taken frame 0 before blocking
+    assert [m["n"] for m in ws.sent] == [0, 3, 4, 5]
+    assert mgr.stats()["dropped_total"] == 2
+    mgr.disconnect("u", ws)
+
+
+@pytest.mark.anyio
+async def test_coalesce_policy_replaces_stale_typing_state():
+    mgr = ConnectionManager(send_queue_size=2, overflow_policy="coalesce")
+    ws = FakeWebSocket(block=True)
+    await mgr.connect("u", ws)
+    await mgr.send_personal_message("u", {"event": "new_message", "n": 0})
+    await asyncio.sleep(0)
+
+    typing = {"conversation_id": "c1", "user_id": "other"}
+    await mgr.send_personal_message("u", {"event": "typing_start", **typing})
+    await mgr.send_personal_message("u", {"event": "new_message", "n": 1})
+    await mgr.send_personal_message("u", {"event": "typing_stop", **typing})
+
+    ws._release.set()
+    await _drain(ws, count=3)
+    assert [m["event"] for m in ws.sent] == ["new_message", "new_message", "typing_stop"]
+    assert mgr.stats()["coalesced_total"] == 1
+    mgr.disconnect("u", ws)
+
+
+@pytest.mark.anyio
+async def test_read_receipts_are_not_coalesced():
+    mgr = ConnectionManager(send_queue_size=2, overflow_policy="coalesce")
+    ws = FakeWebSocket(block=True)
+    await mgr.connect("u", ws)
+    await mgr.send_personal_message("u", {"event": "new_message", "n": 0})
+    await asyncio.sleep(0)
+
+    read = {"event": "message_read", "conversation_id": "c1", "user_id": "other"}
+    await mgr.send_personal_message("u", {"event": "presence_update", "user_id": "other", "is_online": True})
+    await mgr.send_personal_message("u", {**read, "message_ids": ["m1"]})
+    await mgr.send_personal_message("u", {**read, "message_ids": ["m2"]})
+
+    ws._release.set()
+    await _drain(ws, count=3)
+    # Each receipt names different messages, so both are delivered
+    assert [m.get("message_ids") for m in ws.sent] == [None, ["m1"], ["m2"]]
+    mgr.disconnect("u", ws)
+
+
+@pytest.mark.anyio
+async def test_streamed_deltas_are_not_coalesced_or_replayed():
+    mgr = ConnectionManager(send_queue_size=2, overflow_policy="coalesce")
+    ws = FakeWebSocket(block=True)
+    await mgr.connect("u", ws)
+    await mgr.send_personal_message("u", {"event": "new_message", "n": 0})
+    await asyncio.sleep(0)
+
+    delta = {"event": "message_delta", "conversation_id": "c1", "message_id": "m1"}
+    await mgr.send_personal_message("u", {"event": "typing_start", "conversation_id": "c1", "user_id": "bot"})
+    await mgr.send_personal_message("u", {**delta, "delta": "Hel"})
+    await mgr.send_personal_message("u", {**delta, "delta": "lo"})
+
+    ws._release.set()
+    await _drain(ws, count=3)
+    # The typing frame makes room; every piece of the reply is kept
+    assert [m.get("delta") for m in ws.sent] == [None, "Hel", "lo"]
+    mgr.disconnect("u", ws)
+
+    # A worker receiving deltas over the backplane keeps them out of the resume buffer too
+    hub = []
+    worker_a = ConnectionManager(backplane=InProcessBackplane(hub))
+    worker_b = ConnectionManager(backplane=InProcessBackplane(hub))
+    await worker_a.start()
+    await worker_b.start()
+    remote = FakeWebSocket()
+    await worker_b.connect("bob", remote)
+    worker_b.start_session("bob", remote)
+    await worker_a.broadcast(["bob"], {**delta, "delta": "Hi"})
+    await _drain(remote, count=2)
+    assert remote.sent[1] == {**delta, "delta": "Hi"}
+    assert list(worker_b.replay._logs["bob"].frames) == []
+    worker_b.disconnect("bob", remote)
+    await worker_a.stop()
+    await worker_b.stop()
+
+
+@pytest.mark.anyio
+async def test_disconnect_policy_closes_slow_consumer():
+    mgr = ConnectionManager(send_queue_size=1, overflow_policy="disconnect")
+    ws = FakeWebSocket(block=True)
+    await mgr.connect("u", ws)
+    await asyncio.sleep(0)
+
+    for i in range(3):
+        await mgr.send_personal_message("u", {"event": "new_message", "n": i})
+    await asyncio.sleep(0.01)
+
+    assert ws.closed_with == 1013
+    mgr.disconnect("u", ws)
+    assert not mgr.is_online("u")
+
+
+@pytest.mark.anyio
+async def test_broadcast_encodes_event_once(monkeypatch):
+    calls = []
+    real_encode = encoding.encode_event
+    monkeypatch.setattr(encoding, "encode_event", lambda m: calls.append(m) or real_encode(m))
+
+    mgr = ConnectionManager()
+    sockets = {}
+    for i in range(5):
+        sockets[f"u{i}"] = [FakeWebSocket(), FakeWebSocket()]
+        for ws in sockets[f"u{i}"]:
+            await mgr.connect(f"u{i}", ws)
+
+    event = {"event": "presence_update", "user_id": "x", "is_online": True}
+    await mgr.broadcast(list(sockets) + ["offline-user"], event)
+    all_ws = [ws for group in sockets.values() for ws in group]
+    await _drain(*all_ws)
+
+    assert len(calls) == 1
+    assert all(ws.sent == [event] for ws in all_ws)
+    for uid, group in sockets.items():
+        for ws in group:
+            mgr.disconnect(uid, ws)
+
+
+@pytest.mark.anyio
+async def test_in_process_backplane_reaches_other_workers():
+    hub = []
+    worker_a = ConnectionManager(backplane=InProcessBackplane(hub))
+    worker_b = ConnectionManager(backplane=InProcessBackplane(hub))
+    await worker_a.start()
+    await worker_b.start()
+
+    ws_a, ws_b = FakeWebSocket(), FakeWebSocket()
+    await worker_a.connect("alice", ws_a)
+    await worker_b.connect("bob", ws_b)
+
+    event = {"event": "new_message", "message": {"id": "m1", "body": "hi"}}
+    await worker_a.broadcast(["alice", "bob"], event)
+    await _drain(ws_a, ws_b)
+
+    assert ws_a.sent == [event]
+    assert ws_b.sent == [event]
+    assert worker_b.backplane.received == 1
+
+    worker_a.disconnect("alice", ws_a)
+    worker_b.disconnect("bob", ws_b)
+    await worker_a.stop()
+    await worker_b.stop()
+
+
+@pytest.mark.anyio
+async def test_postgres_backplane_delivers_across_workers():
+    dsn = settings.database_url.replace("+asyncpg", "")
+    channel = f"ws_test_{uuid.uuid4().hex[:8]}"
+    worker_a = ConnectionManager(backplane=PostgresBackplane(dsn, channel=channel))
+    worker_b = ConnectionManager(backplane=PostgresBackplane(dsn, channel=channel))
+    await worker_a.start()
+    await worker_b.start()
+
+    ws_b = FakeWebSocket()
+    await worker_b.connect("bob", ws_b)
+
+    small = {"event": "presence_update", "user_id": "alice", "is_online": True}
+    # Larger than the NOTIFY payload limit, so it is chunked
+    large = {"event": "new_message", "message": {"id": "m2", "body": "é" * 20000}}
+    await worker_a.broadcast(["bob"], small)
+    await worker_a.broadcast(["bob"], large)
+    await _drain(ws_b, count=2, timeout=5)
+
+    assert ws_b.sent == [small, large]
+    # The publisher does not receive its own events back
+    assert worker_a.backplane.received == 0
+
+    worker_b.disconnect("bob", ws_b)
+    await worker_a.stop()
+    await worker_b.stop()
+
+
+@pytest.mark.anyio
+async def test_presence_is_aggregated_across_workers():
+    hub = []
+    worker_a = ConnectionManager(backplane=InProcessBackplane(hub))
+    worker_b = ConnectionManager(backplane=InProcessBackplane(hub))
+    await worker_a.start()
+    await worker_b.start()
+    await asyncio.sleep(0)
+
+    ws_a, ws_b = FakeWebSocket(), FakeWebSocket()
+    assert await worker_a.connect("alice", ws_a) is True
+    await asyncio.sleep(0)
+    # Second socket on another worker: alice was already online
+    assert await worker_b.connect("alice", ws_b) is False
+    await asyncio.sleep(0)
+
+    assert worker_b.connection_count("alice") == 2
+    assert worker_a.are_online(["alice", "bob"]) == {"alice"}
+
+    assert worker_a.disconnect("alice", ws_a) is False
+    await asyncio.sleep(0)
+    assert worker_b.disconnect("alice", ws_b) is True
+    await asyncio.sleep(0)
+    assert not worker_a.is_online("alice")
+
+    await worker_a.stop()
+    await worker_b.stop()
+
+
+@pytest.mark.anyio
+async def test_presence_of_dead_worker_expires():
+    hub = []
+    worker_a = ConnectionManager(backplane=InProcessBackplane(hub))
+    worker_b = ConnectionManager(backplane=InProcessBackplane(hub))
+    worker_a.presence.ttl = 0.05
+    worker_a.presence.heartbeat_interval = 0.02
+    offline = []
+
+    async def on_offline(user_id):
+        offline.append(user_id)
+
+    worker_a.presence.on_offline = on_offline
+    await worker_a.start()
+    await worker_b.start()
+
+    await worker_b.connect("bob", FakeWebSocket())
+    await worker_b.connect("carol", FakeWebSocket())
+    await worker_a.connect("carol", FakeWebSocket())
+    await asyncio.sleep(0)
+    assert worker_a.is_online("bob")
+
+    # worker_b dies without saying goodbye and stops heartbeating
+    hub.remove(worker_b.backplane)
+    worker_b.presence._task.cancel()
+    await asyncio.sleep(0.1)
+    assert not worker_a.is_online("bob")
+    # carol still has a socket on worker_a, so only bob is announced offline
+    assert offline == ["bob"]
+    assert worker_a.presence.stats()["expired_workers"] == 1
+
+    await worker_a.stop()
+
+
+@pytest.mark.anyio
+async def test_presence_deltas_arrive_in_order():
+    hub = []
+    worker_a = ConnectionManager(backplane=InProcessBackplane(hub))
+    worker_b = ConnectionManager(backplane=InProcessBackplane(hub))
+    await worker_a.start()
+    await worker_b.start()
+
+    ws = FakeWebSocket()
+    for _ in range(5):
+        await worker_b.connect("bob", ws)
+        worker_b.disconnect("bob", ws)
+    await worker_b.connect("bob", ws)
+    await asyncio.sleep(0.01)
+    assert worker_a.presence.remote[worker_b.backplane.worker_id]["counts"] == {"bob": 1}
+
+    worker_b.disconnect("bob", ws)
+    await asyncio.sleep(0.01)
+    assert not worker_a.is_online("bob")
+
+    await worker_a.stop()
+    await worker_b.stop()
+
+
+@pytest.mark.anyio
+async def test_heartbeat_pings_live_sockets_and_reaps_silent_ones():
+    from app.websocket.heartbeat import HeartbeatMonitor
+
+    mgr = ConnectionManager()
+    offline = []
+
+    async def on_offline(user_id):
+        offline.append(user_id)
+
+    monitor = HeartbeatMonitor(mgr, on_offline=on_offline, interval=0.05, timeout=0.2)
+    live, dead_a, dead_b = FakeWebSocket(), FakeWebSocket(), FakeWebSocket()
+    for user_id, ws in (("live", live), ("dead", dead_a), ("dead", dead_b)):
+        await mgr.connect(user_id, ws)
+        monitor.register(user_id, ws)
+
+    await monitor.sweep()
+    await _drain(live, dead_a)
+    assert live.sent == [{"event": "ping"}]
+
+    await asyncio.sleep(0.25)
+    monitor.touch(live)
+    await monitor.sweep()
+    assert offline == ["dead"]
+    assert monitor.stats()["reaped"] == 2
+    assert "dead" not in mgr.active_connections and "live" in mgr.active_connections
+    await asyncio.sleep(0.01)
+    assert dead_a.closed_with == 1001
+
+
+@pytest.mark.anyio
+async def test_reconnect_replays_only_the_missed_events():
+    from app.websocket.replay import ReplayBuffer
+
+    mgr = ConnectionManager()
+    mgr.replay = ReplayBuffer(size=3, retention=60)
+    typing = {"event": "typing_start", "conversation_id": "c1", "user_id": "other"}
+
+    first = FakeWebSocket()
+    await mgr.connect("u", first)
+    mgr.start_session("u", first)
+    await mgr.broadcast(["u"], {"event": "new_message", "n": 1})
+    await mgr.broadcast(["u"], typing)
+    await _drain(first, count=3)
+    session, message, typed = first.sent
+    assert session["event"] == "session" and session["seq"] == 0
+    assert message == {"seq": 1, "event": "new_message", "n": 1}
+    # Ephemeral events carry no sequence number
+    assert typed == typing
+    mgr.disconnect("u", first)
+
+    # Sent while the user is away
+    for n in (2, 3):
+        await mgr.broadcast(["u"], {"event": "new_message", "n": n})
+
+    resumed = FakeWebSocket()
+    await mgr.connect("u", resumed)
+    mgr.start_session("u", resumed, (session["epoch"], 1))
+    await _drain(resumed, count=3)
+    assert [m.get("n") for m in resumed.sent] == [None, 2, 3]
+    assert [m.get("seq") for m in resumed.sent] == [3, 2, 3]
+
+    # Gaps older than the buffer, or from another worker's sequence, need a resync
+    for resume in ((session["epoch"], 0), ("other-epoch", 3)):
+        await mgr.broadcast(["u"], {"event": "new_message", "n": 4})
+        ws = FakeWebSocket()
+        await mgr.connect("u", ws)
+        mgr.start_session("u", ws, resume)
+        await _drain(ws, count=2)
+        assert ws.sent[1]["event"] == "resync_required"
+        mgr.disconnect("u", ws)
+    assert mgr.stats()["replay"]["resyncs"] == 2
+    mgr.disconnect("u", resumed)